@@ -1,15 +1,18 @@
 import argparse
 
-import numpy as np
-
 from plotting.plotter import Plotter
 from src.data_saver import FIEFS_Output
 from src.input import FIEFS_Input
-from src.mesh import FIEFS_Array, get_interm_array
+from src.jit import print_warmup, warmup
 from src.pgen import kh
-from src.reconstruct import get_limited_slopes
-from src.riemann import solve_riemann
-from src.tools import calculate_timestep, get_fluxes_2d
+from src.riemann import (
+    BRANCH_NAMES,
+    HYBRID,
+    count_smooth_interfaces,
+    riemann_branch_counts,
+)
+from src.simulation import Simulation
+from src.tools import get_conserved_variables_into
 
 parser = argparse.ArgumentParser()
 
@@ -19,10 +22,19 @@ parser.add_argument(
     help="Problem name as specified in the problem generation file and input file",
     type=str,
 )
+parser.add_argument(
+    "--warmup",
+    help="Compile every kernel for every precision into the on-disk cache and exit",
+    action="store_true",
+)
 
 args = parser.parse_args()
 
 if __name__ == "__main__":
+    if args.warmup:
+        print_warmup(warmup())
+        raise SystemExit
+
     problem_name = args.problem
 
     input_fname = f"inputs/{problem_name}.in"
@@ -31,9 +43,6 @@ if __name__ == "__main__":
     pin = FIEFS_Input(input_fname=input_fname)
     pin.parse_input_file()
 
-    # Initialize empty problem mesh
-    pmesh = FIEFS_Array(pin, np.float64)
-
     # Load the correct problem generator (implement if more problem types
     # are added)#####################
     # if problem_name == "kh":
@@ -41,146 +50,108 @@ if __name__ == "__main__":
     # else:
     #    raise ValueError("Please use an implemented problem type")
 
+    # Initialize the mesh, the initial conditions and the kernels
+    sim = Simulation(pin, problem_generator)
+
     # Initialize data saving preferences
     pout = FIEFS_Output(input_fname=input_fname)
-    pout.data_preferences(pin)
-
-    # Initialize the simulation
-    problem_generator(pin, pmesh)
-
-    # Initialize time to start loop
-    t = 0.0
-    tmax = float(pin.value_dict["tmax"])
-    cfl = float(pin.value_dict["CFL"])
-    gamma = float(pin.value_dict["gamma"])
+    pout.data_preferences(pin, sim.pmesh.ng)
 
     print_freq = float(pin.value_dict["output_frequency"])
 
-    # Initialize scratch arrays for intermediate calculations
-    nx1 = pin.value_dict["nx1"]
-    nx2 = pin.value_dict["nx2"]
-    ng = pin.value_dict["ng"]
-
-    Unp1 = get_interm_array(4, nx1 + 2 * ng, nx2 + 2 * ng, np.float64)
-
-    U_i_j = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_ip1_j = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_im1_j = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_i_jp1 = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_i_jm1 = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-
-    U_i_L = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_i_R = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-
-    U_j_L = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_j_R = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-
-    U_i_L_bar = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_i_R_bar = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-
-    U_j_L_bar = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
-    U_j_R_bar = get_interm_array(4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 2), np.float64)
+    def riemann_states(sim: Simulation):
+        # The numba step leaves the faces of primitive and characteristic
+        # reconstructions as primitives, the statistics take conserved ones
+        ws = sim.ws
 
-    U_l_i_riemann = get_interm_array(
-        4, nx1 + (2 * ng - 3), nx2 + (2 * ng - 2), np.float64
-    )
-    U_r_i_riemann = get_interm_array(
-        4, nx1 + (2 * ng - 3), nx2 + (2 * ng - 2), np.float64
-    )
+        if sim.variables != "conserved" and sim.backend != "numpy":
+            for W, U in zip(
+                (ws.W_i_L, ws.W_i_R, ws.W_j_L, ws.W_j_R),
+                (ws.U_i_L, ws.U_i_R, ws.U_j_L, ws.U_j_R),
+            ):
+                get_conserved_variables_into(W, sim.gamma, U)
 
-    U_l_j_riemann = get_interm_array(
-        4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 3), np.float64
-    )
-    U_r_j_riemann = get_interm_array(
-        4, nx1 + (2 * ng - 2), nx2 + (2 * ng - 3), np.float64
-    )
+        return ws
 
-    # Main simulation loop for MUSCL-Hancock Scheme
-    iter = 0
-    print("Iteration   |   Time   |   Timestep")
-    while t < tmax:
-        # Calculate timestep
-
-        dt = calculate_timestep(pmesh, cfl, gamma)
-
-        if t + dt > tmax:
-            dt = tmax - t
-
-        # Enforce BCs
-
-        pmesh.enforce_bcs(pin)
+    def save_and_plot(sim: Simulation, dt: float):
+        # Save Data
+        pout.save_data(sim.pmesh.Un, sim.t, sim.tmax, sim.gamma, sim.iter)
+
+        #######################################
+        # Plot during the run
+        #######################################
+        plotter = Plotter(sim.pmesh)
+        plotter.create_plot(
+            pin.value_dict["variables_to_plot"],
+            pin.value_dict["labels"],
+            pin.value_dict["cmaps"],
+            pin.value_dict["stability_name"],
+            pin.value_dict["style_mode"],
+            sim.iter,
+            sim.t,
+        )
+        #######################################
+        print(f"{sim.iter}       {sim.t}       {dt}")
+
+        if (
+            sim.solver == HYBRID
+            and sim.integrator == "unsplit"
+            and sim.tile_size == 0
+            and sim.ranks is None
+        ):
+            # Fraction of interfaces that took the cheap path this step, only
+            # the unsplit step leaves its Riemann states in the workspace
+            ws = riemann_states(sim)
+            n_smooth = count_smooth_interfaces(
+                ws.U_l_i, ws.U_r_i, sim.gamma, "x"
+            ) + count_smooth_interfaces(ws.U_l_j, ws.U_r_j, sim.gamma, "y")
+            frac = n_smooth / (ws.U_l_i[0].size + ws.U_l_j[0].size)
+
+            print(f"    hybrid: {100 * frac:.1f}% HLL, {100 * (1 - frac):.1f}% HLLC")
+
+    # Optional Riemann branch statistics, dumped every step or every output
+    riemann_stats = pin.value_dict.get("riemann_stats", "none")
+
+    def write_riemann_stats(sim: Simulation, dt: float):
+        ws = riemann_states(sim)
+        counts = riemann_branch_counts(
+            ws.U_l_i, ws.U_r_i, sim.gamma, "x", sim.solver
+        ) + riemann_branch_counts(ws.U_l_j, ws.U_r_j, sim.gamma, "y", sim.solver)
+
+        stats_file.write(
+            f"{sim.iter},{sim.t}," + ",".join(str(c) for c in counts) + "\n"
+        )
 
-        # Data Reconstruction
+    if (riemann_stats == "step" or riemann_stats == "output") and sim.tile_size > 0:
+        raise ValueError("Riemann statistics need the untiled step, set tile_size = 0")
 
-        # Getting arrays with shifted indices to calculate slopes
-        U_i_j = pmesh.Un[:, 1:-1, 1:-1]
-        U_ip1_j = pmesh.Un[:, 2:, 1:-1]
-        U_im1_j = pmesh.Un[:, :-2, 1:-1]
-        U_i_jp1 = pmesh.Un[:, 1:-1, 2:]
-        U_i_jm1 = pmesh.Un[:, 1:-1, :-2]
+    if (riemann_stats == "step" or riemann_stats == "output") and sim.num_ranks > 1:
+        raise ValueError("Riemann statistics need a single process, set num_ranks = 1")
 
-        delta_i, delta_j = get_limited_slopes(
-            U_i_j, U_ip1_j, U_im1_j, U_i_jp1, U_i_jm1, beta=1.0
+    if (riemann_stats == "step" or riemann_stats == "output") and (
+        sim.integrator != "unsplit"
+    ):
+        raise ValueError(
+            "Riemann statistics need the unsplit integrator, set integrator = unsplit"
         )
 
-        # Evolution step
-        # Boundary extrapolated values
-        U_i_L = U_i_j - 1 / 2 * delta_i
-        U_i_R = U_i_j + 1 / 2 * delta_i
-        U_j_L = U_i_j - 1 / 2 * delta_j
-        U_j_R = U_i_j + 1 / 2 * delta_j
-
-        # Advance by half timestep
-        F_i_L = get_fluxes_2d(U_i_L, gamma, "x")
-        F_i_R = get_fluxes_2d(U_i_R, gamma, "x")
-        G_j_L = get_fluxes_2d(U_j_L, gamma, "y")
-        G_j_R = get_fluxes_2d(U_j_R, gamma, "y")
-
-        int_flux = 1 / 2 * dt / pmesh.dx1 * (F_i_L - F_i_R) + 1 / 2 * dt / pmesh.dx2 * (
-            G_j_L - G_j_R
-        )
+    if riemann_stats == "step" or riemann_stats == "output":
+        stats_file = open("riemann_stats.csv", "w")
+        stats_file.write("iter,time," + ",".join(BRANCH_NAMES) + "\n")
 
-        U_i_L += int_flux
-        U_i_R += int_flux
-        U_j_L += int_flux
-        U_j_R += int_flux
+        sim.add_callback(
+            write_riemann_stats, 1 if riemann_stats == "step" else print_freq
+        )
 
-        # Riemann Problem
-        # Set up Riemann states
-        U_l_i_riemann = U_i_R[:, :-1, :]
-        U_r_i_riemann = U_i_L[:, 1:, :]
-        U_l_j_riemann = U_j_R[:, :, :-1]
-        U_r_j_riemann = U_j_L[:, :, 1:]
+    elif riemann_stats != "none":
+        raise ValueError("Please use an implemented Riemann statistics mode")
 
-        # Do the solve
-        F = solve_riemann(U_l_i_riemann, U_r_i_riemann, gamma, "x")
-        G = solve_riemann(U_l_j_riemann, U_r_j_riemann, gamma, "y")
+    sim.add_callback(save_and_plot, print_freq)
 
-        # Conservative update
-        pmesh.Un[:, 2:-2, 2:-2] += dt / pmesh.dx1 * (
-            F[:, :-1, 1:-1] - F[:, 1:, 1:-1]
-        ) + dt / pmesh.dx2 * (G[:, 1:-1, :-1] - G[:, 1:-1, 1:])
+    # Main simulation loop for MUSCL-Hancock Scheme
+    print("Iteration   |   Time   |   Timestep")
+    sim.run_until(sim.tmax)
+    sim.close()
 
-        # Save Data
-        if iter % print_freq == 0:
-            pout.save_data(pmesh.Un, t, tmax, gamma, iter)
-
-        if iter % print_freq == 0:
-            #######################################
-            # Plot during the run
-            #######################################
-            plotter = Plotter(pmesh)
-            plotter.create_plot(
-                pin.value_dict["variables_to_plot"],
-                pin.value_dict["labels"],
-                pin.value_dict["cmaps"],
-                pin.value_dict["stability_name"],
-                pin.value_dict["style_mode"],
-                iter,
-                t,
-            )
-            #######################################
-            print(f"{iter}       {t}       {dt}")
-
-        t += dt
-        iter += 1
+    if riemann_stats != "none":
+        stats_file.close()
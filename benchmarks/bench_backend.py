@@ -0,0 +1,59 @@
+###################################################################
+#                                                                 #
+#   Time to solution of the numba and NumPy kernel backends       #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_backend.py --tmax 0.1
+#
+# Each run happens in a fresh interpreter so the numba times include
+# the JIT compilation that a new FIEFS.py process pays on start-up.
+
+import argparse
+import subprocess
+import sys
+import time
+
+from common import kh_run
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-n", "--nx", help="Cells per direction", type=int, nargs="+", default=[32, 128]
+)
+parser.add_argument("--tmax", help="Simulated time", type=float, default=0.1)
+parser.add_argument("--child", help=argparse.SUPPRESS, default=None)
+
+args = parser.parse_args()
+
+if __name__ == "__main__":
+    if args.child is not None:
+        kh_run(args.nx[0], args.tmax, backend=args.child)
+        sys.exit(0)
+
+    print(f"Kelvin-Helmholtz until t = {args.tmax}, fresh process per run")
+    print("Mesh        |   numba (s)   |   numpy (s)")
+
+    for nx in args.nx:
+        wall = {}
+        for backend in ["numba", "numpy"]:
+            start = time.perf_counter()
+            subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    backend,
+                    "-n",
+                    str(nx),
+                    "--tmax",
+                    str(args.tmax),
+                ],
+                check=True,
+            )
+            wall[backend] = time.perf_counter() - start
+
+        print(
+            f"{nx}x{nx}".ljust(12)
+            + f"|   {wall['numba']:.2f}".ljust(16)
+            + f"|   {wall['numpy']:.2f}"
+        )
@@ -0,0 +1,79 @@
+###################################################################
+#                                                                 #
+#   Cost per step and time to tmax of CTU against MUSCL-Hancock   #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_ctu.py -n 256 --tmax 1.0
+#
+# Runs the seeded KH problem to tmax with the unsplit MUSCL-Hancock step
+# at CFL 0.5, the largest it is stable at in 2D, and with the CTU step at
+# CFL 0.5, 0.9 and 1.0. Reports the steps taken, the wall time per step
+# and to tmax, and E_ky, the kinetic energy in the y velocity, at tmax.
+# Past the linear phase the rolls are too sensitive to the timestep for
+# a cell by cell comparison, so E_ky is compared with the unsplit run.
+# The kernels are compiled on a small run first, so the times are
+# stepping only.
+
+import argparse
+import time
+
+import numpy as np
+from common import kh_setup
+
+from src.pgen import kh
+from src.simulation import Simulation
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=256)
+parser.add_argument("--tmax", help="End time of the runs", type=float, default=1.0)
+
+args = parser.parse_args()
+
+
+def run(nx: int, integrator: str, cfl: float, tmax: float):
+    """Steps, wall time and E_ky at the end of a KH run to tmax"""
+    pin, _ = kh_setup(nx, nx)
+    pin.value_dict["backend"] = "numba"
+    pin.value_dict["integrator"] = integrator
+    pin.value_dict["CFL"] = cfl
+
+    np.random.seed(0)
+    sim = Simulation(pin, kh.ProblemGenerator)
+
+    start = time.perf_counter()
+    sim.run_until(tmax)
+    elapsed = time.perf_counter() - start
+
+    ng = sim.pmesh.ng
+    U = sim.pmesh.Un[:, ng:-ng, ng:-ng]
+    energy = 0.5 * np.sum(U[2] ** 2 / U[0]) * sim.pmesh.dx1 * sim.pmesh.dx2
+
+    return sim.iter, elapsed, energy
+
+
+if __name__ == "__main__":
+    cases = [("unsplit", 0.5), ("ctu", 0.5), ("ctu", 0.9), ("ctu", 1.0)]
+
+    for integrator, cfl in cases:
+        run(16, integrator, cfl, 0.01)
+
+    print(f"KH on {args.nx}x{args.nx} to t = {args.tmax}")
+    print(
+        "Integrator   |   CFL   |   Steps   |   Step (ms)   |   Time (s)   |   "
+        "Speedup   |   E_ky        |   vs unsplit"
+    )
+
+    for integrator, cfl in cases:
+        steps, elapsed, energy = run(args.nx, integrator, cfl, args.tmax)
+
+        if integrator == "unsplit":
+            baseline = elapsed
+            energy_ref = energy
+
+        print(
+            f"{integrator:<13}|   {cfl:<6.1f}|   {steps:<8}|   "
+            f"{1e3 * elapsed / steps:<12.2f}|   {elapsed:<11.2f}|   "
+            f"{baseline / elapsed:<10.2f}|   {energy:<10.4e}|   "
+            f"{(energy - energy_ref) / energy_ref:+.2e}"
+        )
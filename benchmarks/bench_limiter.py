@@ -0,0 +1,79 @@
+###################################################################
+#                                                                 #
+#     Time and memory traffic of the NumPy and compiled limiter   #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_limiter.py -n 1024
+#
+# Allocated is the peak of the Python heap during one call. Traffic is
+# the least memory a limiter must move (read Un, write both slopes)
+# divided by the wall time.
+
+import argparse
+import tracemalloc
+
+import numpy as np
+from common import best_time, kh_setup
+
+from src.reconstruct import get_limited_slopes, get_limited_slopes_into
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=1024)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=5)
+
+args = parser.parse_args()
+
+
+def limit_numpy(Un: np.ndarray):
+    """The limiter as FIEFS.py called it before, on shifted views"""
+    return get_limited_slopes(
+        Un[:, 1:-1, 1:-1],
+        Un[:, 2:, 1:-1],
+        Un[:, :-2, 1:-1],
+        Un[:, 1:-1, 2:],
+        Un[:, 1:-1, :-2],
+        beta=1.0,
+    )
+
+
+def peak_allocation(func, args: tuple) -> int:
+    """Peak bytes allocated on the Python heap by one call"""
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak
+
+
+if __name__ == "__main__":
+    pin, pmesh = kh_setup(args.nx, args.nx)
+    Un = pmesh.Un
+
+    delta_i = np.empty_like(Un[:, 1:-1, 1:-1])
+    delta_j = np.empty_like(Un[:, 1:-1, 1:-1])
+
+    delta_i_np, delta_j_np = limit_numpy(Un)
+    get_limited_slopes_into(Un, 1.0, delta_i, delta_j)
+    identical = np.array_equal(delta_i, delta_i_np) and np.array_equal(
+        delta_j, delta_j_np
+    )
+
+    traffic = Un.nbytes + delta_i.nbytes + delta_j.nbytes
+
+    print(f"Minmod limiter on a {args.nx}x{args.nx} Kelvin-Helmholtz mesh")
+    print(f"Identical slopes: {identical}")
+    print("Kernel       |   Time (ms)   |   Allocated (MB)   |   Traffic (GB/s)")
+
+    for name, func, func_args in [
+        ("numpy", limit_numpy, (Un,)),
+        ("compiled", get_limited_slopes_into, (Un, 1.0, delta_i, delta_j)),
+    ]:
+        elapsed = best_time(func, func_args, args.repeat)
+        allocated = peak_allocation(func, func_args)
+
+        print(
+            f"{name:<13}|   {1e3 * elapsed:<12.2f}|   {allocated / 1e6:<17.1f}|   "
+            f"{traffic / elapsed / 1e9:.2f}"
+        )
@@ -0,0 +1,94 @@
+###################################################################
+#                                                                 #
+#      Cost per step and KH accuracy of each slope limiter        #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_limiters.py --nx-run 64 --tmax 1.0
+#
+# Cost is the best wall time of one full step on a --nx mesh, and the
+# wall time of each accuracy run as the cost per physical time. Accuracy
+# runs the KH problem to --tmax with each limiter on --nx-run cells and
+# compares it against an MC run at 4x the resolution, through the
+# vertical kinetic energy (instability growth) and the total variation
+# of the density (how sharp the billows are). Both are integrals over
+# the domain, so they do not depend on the random seed perturbations
+# lining up between meshes. Minmod at twice the resolution is listed for
+# comparison with the less diffusive limiters at the base resolution.
+
+import argparse
+import time
+
+import numpy as np
+from common import kh_run, kh_setup, kh_step, vertical_kinetic_energy
+
+from src.mesh import FIEFS_Array, Workspace
+from src.reconstruct import LIMITERS, MC, MINMOD
+from src.riemann import HLLC
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=512)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=5)
+parser.add_argument(
+    "--nx-run", help="Cells per direction for the runs", type=int, default=64
+)
+parser.add_argument("--tmax", help="End time of the runs", type=float, default=1.0)
+
+args = parser.parse_args()
+
+
+def step_time(limiter: int) -> float:
+    """Best wall time of one step on the --nx mesh after a warm-up step"""
+    pin, pmesh = kh_setup(args.nx, args.nx)
+    cfl = float(pin.value_dict["CFL"])
+    gamma = float(pin.value_dict["gamma"])
+    ws = Workspace(pmesh)
+
+    kh_step(pin, pmesh, cfl, gamma, 1.0, 0.0, HLLC, "numba", limiter, ws=ws)
+
+    best = np.inf
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        kh_step(pin, pmesh, cfl, gamma, 1.0, 0.0, HLLC, "numba", limiter, ws=ws)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def density_variation(pmesh: FIEFS_Array) -> float:
+    """Total variation of the density, scaled by the cell size"""
+    ng = pmesh.ng
+    rho = pmesh.Un[0, ng:-ng, ng:-ng]
+
+    return float(
+        np.sum(np.abs(np.diff(rho, axis=0))) * pmesh.dx2
+        + np.sum(np.abs(np.diff(rho, axis=1))) * pmesh.dx1
+    )
+
+
+if __name__ == "__main__":
+    reference = kh_run(4 * args.nx_run, args.tmax, HLLC, "numba", MC)
+    ke_ref = vertical_kinetic_energy(reference)
+    tv_ref = density_variation(reference)
+
+    print(f"Step cost on {args.nx}x{args.nx}, runs to t = {args.tmax}")
+    print(f"Reference: MC on {4 * args.nx_run}x{4 * args.nx_run}")
+    print(
+        "Limiter      |   Mesh   |   Step (ms)   |   Run (s)   |   KE_y / ref   |"
+        "   TV(rho) / ref"
+    )
+
+    cases = [(name, limiter, args.nx_run) for name, limiter in LIMITERS.items()]
+    cases.append(("minmod", MINMOD, 2 * args.nx_run))
+
+    for name, limiter, nx in cases:
+        start = time.perf_counter()
+        run = kh_run(nx, args.tmax, HLLC, "numba", limiter)
+        run_time = time.perf_counter() - start
+
+        print(
+            f"{name:<13}|   {nx:<6} |   {1e3 * step_time(limiter):<12.2f}|   "
+            f"{run_time:<10.2f}|   "
+            f"{vertical_kinetic_energy(run) / ke_ref:<13.3f}|   "
+            f"{density_variation(run) / tv_ref:.3f}"
+        )
@@ -0,0 +1,104 @@
+###################################################################
+#                                                                 #
+#     Kelvin-Helmholtz growth rate in each floating precision     #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_precision.py -n 256 --window 0.7 1.5
+#
+# Runs the same seeded KH problem in double, single and mixed precision
+# and fits the linear growth rate of the instability, half the slope of
+# log(E_ky), the kinetic energy in the y velocity, over the time window.
+# Also reports the wall time per step (without the recording), the bytes
+# of the mesh and workspace, and the largest density difference from the
+# double run.
+
+import argparse
+import time
+
+import numpy as np
+from common import kh_setup
+
+from src.pgen import kh
+from src.simulation import Simulation
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=256)
+parser.add_argument(
+    "-w",
+    "--window",
+    help="Start and end of the linear growth phase",
+    type=float,
+    nargs=2,
+    default=[0.7, 1.5],
+)
+
+args = parser.parse_args()
+
+
+def run(precision: str):
+    """Steps KH to the end of the window, recording E_ky after every step"""
+    pin, _ = kh_setup(args.nx, args.nx)
+    pin.value_dict["backend"] = "numba"
+    pin.value_dict["precision"] = precision
+
+    np.random.seed(0)
+    sim = Simulation(pin, kh.ProblemGenerator)
+
+    ng = sim.pmesh.ng
+    times = []
+    energies = []
+    overhead = [0.0]
+
+    def record(sim, dt):
+        start = time.perf_counter()
+        U = sim.pmesh.Un[:, ng:-ng, ng:-ng].astype(np.float64)
+
+        times.append(sim.t + dt)
+        energies.append(0.5 * np.sum(U[2] ** 2 / U[0]) * sim.pmesh.dx1 * sim.pmesh.dx2)
+        overhead[0] += time.perf_counter() - start
+
+    sim.add_callback(record)
+
+    # Warm-up step compiles the kernels of the precision
+    sim.step()
+
+    start = time.perf_counter()
+    overhead[0] = 0.0
+    sim.run_until(args.window[1])
+    elapsed = (time.perf_counter() - start - overhead[0]) / (sim.iter - 1)
+
+    nbytes = sim.pmesh.Un.nbytes + sum(
+        v.nbytes for v in vars(sim.ws).values() if isinstance(v, np.ndarray)
+    )
+
+    times = np.array(times)
+    in_window = times >= args.window[0]
+    growth = 0.5 * np.polyfit(times[in_window], np.log(energies)[in_window], 1)[0]
+
+    return growth, elapsed, nbytes, sim.pmesh.Un[0, ng:-ng, ng:-ng]
+
+
+if __name__ == "__main__":
+    print(
+        f"KH on {args.nx}x{args.nx}, growth rate fitted over "
+        f"t = {args.window[0]} to {args.window[1]}"
+    )
+    print(
+        "Precision  |   Growth rate   |   vs double   |   Step (ms)   |   "
+        "Memory (MB)   |   Max density diff"
+    )
+
+    results = {}
+    for precision in ["double", "single", "mixed"]:
+        results[precision] = run(precision)
+
+        growth, elapsed, nbytes, rho = results[precision]
+        growth_ref, _, _, rho_ref = results["double"]
+
+        print(
+            f"{precision:<11}|   {growth:<14.6f}|   "
+            f"{(growth - growth_ref) / growth_ref:<+12.2e}|   "
+            f"{1e3 * elapsed:<12.2f}|   {nbytes / 1e6:<14.1f}|   "
+            f"{np.abs(rho.astype(np.float64) - rho_ref).max():.2e}"
+        )
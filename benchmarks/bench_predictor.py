@@ -0,0 +1,138 @@
+###################################################################
+#                                                                 #
+#    Time and memory bandwidth of the fused MUSCL-Hancock         #
+#    predictor against the reconstruction and flux passes         #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_predictor.py -n 512 2048
+#
+# Three versions of the conserved half-step predictor on the KH mesh:
+#   allocating  the reconstruction kernel, get_fluxes_2d_x/y on each face
+#               and the int_flux expression, as FIEFS.py did before the
+#               workspace
+#   in-place    the same passes writing into preallocated buffers
+#   fused       muscl_hancock_predictor_into, one pass over the mesh
+# Bandwidth is the least memory the predictor must move (read Un, write
+# the four face arrays) divided by the wall time.
+
+import argparse
+
+import numpy as np
+from common import best_time, kh_setup
+
+from src.reconstruct import get_face_values_into
+from src.tools import (
+    get_fluxes_2d_x,
+    get_fluxes_2d_x_into,
+    get_fluxes_2d_y,
+    get_fluxes_2d_y_into,
+    muscl_hancock_predictor_into,
+)
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-n", "--nx", help="Cells per direction", type=int, nargs="+", default=[512, 2048]
+)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=5)
+
+args = parser.parse_args()
+
+GAMMA = 1.4
+DT = 1.0e-3
+
+
+def predict_allocating(Un, ng, dx1, dx2, U_i_L, U_i_R, U_j_L, U_j_R):
+    """The predictor with the allocating flux kernels"""
+    get_face_values_into(Un, ng, 1.0, U_i_L, U_i_R, U_j_L, U_j_R)
+
+    int_flux = 1 / 2 * DT / dx1 * (
+        get_fluxes_2d_x(U_i_L, GAMMA) - get_fluxes_2d_x(U_i_R, GAMMA)
+    ) + 1 / 2 * DT / dx2 * (
+        get_fluxes_2d_y(U_j_L, GAMMA) - get_fluxes_2d_y(U_j_R, GAMMA)
+    )
+
+    U_i_L += int_flux
+    U_i_R += int_flux
+    U_j_L += int_flux
+    U_j_R += int_flux
+
+
+def predict_in_place(
+    Un, ng, dx1, dx2, U_i_L, U_i_R, U_j_L, U_j_R, flux_L, flux_R, int_flux
+):
+    """The predictor with every pass writing into preallocated buffers"""
+    get_face_values_into(Un, ng, 1.0, U_i_L, U_i_R, U_j_L, U_j_R)
+
+    get_fluxes_2d_x_into(U_i_L, GAMMA, flux_L)
+    get_fluxes_2d_x_into(U_i_R, GAMMA, flux_R)
+    np.subtract(flux_L, flux_R, out=int_flux)
+    int_flux *= 1 / 2 * DT / dx1
+
+    get_fluxes_2d_y_into(U_j_L, GAMMA, flux_L)
+    get_fluxes_2d_y_into(U_j_R, GAMMA, flux_R)
+    np.subtract(flux_L, flux_R, out=flux_R)
+    flux_R *= 1 / 2 * DT / dx2
+    int_flux += flux_R
+
+    U_i_L += int_flux
+    U_i_R += int_flux
+    U_j_L += int_flux
+    U_j_R += int_flux
+
+
+def predict_fused(Un, ng, dx1, dx2, U_i_L, U_i_R, U_j_L, U_j_R):
+    """The fused predictor"""
+    muscl_hancock_predictor_into(
+        Un,
+        ng,
+        1.0,
+        GAMMA,
+        1 / 2 * DT / dx1,
+        1 / 2 * DT / dx2,
+        U_i_L,
+        U_i_R,
+        U_j_L,
+        U_j_R,
+    )
+
+
+if __name__ == "__main__":
+    print("Conserved MUSCL-Hancock predictor, minmod, on the KH mesh")
+    print(
+        "Grid     |   Predictor     |   Time (ms)   |   Bandwidth (GB/s)   |   Speedup"
+    )
+
+    for nx in args.nx:
+        pin, pmesh = kh_setup(nx, nx)
+        Un = pmesh.Un
+        ng = pmesh.ng
+
+        shape = (pmesh.nvar, nx + 2, nx + 2)
+        faces = [np.empty(shape) for _ in range(4)]
+        buffers = [np.empty(shape) for _ in range(3)]
+
+        traffic = Un.nbytes + sum(face.nbytes for face in faces)
+
+        common_args = (Un, ng, pmesh.dx1, pmesh.dx2, *faces)
+
+        for name, func, func_args in [
+            ("allocating", predict_allocating, common_args),
+            ("in-place", predict_in_place, (*common_args, *buffers)),
+            ("fused", predict_fused, common_args),
+        ]:
+            elapsed = best_time(func, func_args, args.repeat)
+
+            # Every version must produce the same face states
+            func(*func_args)
+            if name == "allocating":
+                reference = [face.copy() for face in faces]
+                baseline = elapsed
+            else:
+                assert all(np.array_equal(a, b) for a, b in zip(faces, reference))
+
+            print(
+                f"{f'{nx}^2':<9}|   {name:<14}|   "
+                f"{1e3 * elapsed:<12.2f}|   {traffic / elapsed / 1e9:<19.2f}|   "
+                f"{baseline / elapsed:.2f}x"
+            )
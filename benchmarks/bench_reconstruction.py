@@ -0,0 +1,99 @@
+###################################################################
+#                                                                 #
+#     Convergence and cost of the MUSCL, PPM and WENO5 schemes    #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_reconstruction.py -n 16 32 64 128
+#
+# A smooth density wave, rho = 1 + 0.2 sin(2 pi x), is advected with
+# u = 1 at constant pressure for one period through the periodic x
+# direction of the KH input, so the exact solution is the initial one.
+# Each scheme reports the L1 density error, the measured order of
+# convergence and the wall time of the run (compilation excluded), which
+# together give the error reached per unit of cost.
+
+import argparse
+import time
+
+import numpy as np
+from common import kh_setup, kh_step
+
+from src.mesh import FIEFS_Array, Workspace
+from src.reconstruct import MINMOD, RECONSTRUCTIONS
+from src.riemann import HLLC
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-n",
+    "--nx",
+    help="Cells in the x direction",
+    type=int,
+    nargs="+",
+    default=[16, 32, 64, 128],
+)
+parser.add_argument("--nx2", help="Cells in the y direction", type=int, default=4)
+
+args = parser.parse_args()
+
+
+def wave_density(pmesh: FIEFS_Array) -> np.ndarray:
+    """Cell averages of the density wave on every cell, ghosts included"""
+    i = np.arange(pmesh.Un.shape[1])
+    x = pmesh.x1min + (i - pmesh.ng + 0.5) * pmesh.dx1
+    sinc = np.sin(np.pi * pmesh.dx1) / (np.pi * pmesh.dx1)
+
+    rho = 1.0 + 0.2 * sinc * np.sin(2.0 * np.pi * x)
+
+    return np.repeat(rho[:, None], pmesh.Un.shape[2], axis=1)
+
+
+def advect(nx: int, scheme: int) -> tuple:
+    """Advects the wave for one period, returns the L1 error and wall time"""
+    pin, pmesh = kh_setup(nx, args.nx2, scheme=scheme)
+    cfl = float(pin.value_dict["CFL"])
+    gamma = float(pin.value_dict["gamma"])
+
+    rho = wave_density(pmesh)
+    pmesh.Un[0] = rho
+    pmesh.Un[1] = rho
+    pmesh.Un[2] = 0.0
+    # Unit pressure through the internal energy of get_primitive_variables
+    pmesh.Un[3] = 1.0 / (gamma - 1.0) + 0.5 * rho**2
+
+    tmax = pmesh.x1max - pmesh.x1min
+
+    ng = pmesh.ng
+    ws = Workspace(pmesh)
+
+    t = 0.0
+    start = time.perf_counter()
+    while t < tmax:
+        t += kh_step(pin, pmesh, cfl, gamma, tmax, t, HLLC, "numba", MINMOD, scheme, ws)
+    elapsed = time.perf_counter() - start
+
+    error = np.mean(np.abs(pmesh.Un[0, ng:-ng, ng:-ng] - rho[ng:-ng, ng:-ng]))
+
+    return error, elapsed
+
+
+if __name__ == "__main__":
+    print("Smooth density wave advected for one period")
+    print("Scheme   |   nx     |   L1(rho)      |   Order   |   Time (s)")
+
+    for name, scheme in RECONSTRUCTIONS.items():
+        # Compile the kernels for this scheme outside the timings
+        pin, pmesh = kh_setup(8, args.nx2, scheme=scheme)
+        kh_step(pin, pmesh, 0.1, 1.4, 1.0, 0.0, HLLC, "numba", MINMOD, scheme)
+
+        previous = None
+        for nx in args.nx:
+            error, elapsed = advect(nx, scheme)
+
+            order = "" if previous is None else f"{np.log2(previous / error):.2f}"
+            previous = error
+
+            print(
+                f"{name:<9}|   {nx:<6} |   {error:<12.4e} |   {order:<7} |   "
+                f"{elapsed:.3f}"
+            )
@@ -0,0 +1,52 @@
+###################################################################
+#                                                                 #
+#   Interface throughput of the allocating and in-place HLLC      #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_riemann.py -n 1024
+
+import argparse
+
+import numpy as np
+from common import best_time, kh_setup
+
+from src.riemann import solve_riemann, solve_riemann_into
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=1024)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=5)
+
+args = parser.parse_args()
+
+if __name__ == "__main__":
+    pin, pmesh = kh_setup(args.nx, args.nx)
+    gamma = float(pin.value_dict["gamma"])
+
+    print(f"HLLC on a {args.nx}x{args.nx} Kelvin-Helmholtz mesh")
+    print("Direction   |   Kernel               |   Interfaces/s")
+
+    for direction in ["x", "y"]:
+        if direction == "x":
+            U_l = pmesh.Un[:, :-1, :]
+            U_r = pmesh.Un[:, 1:, :]
+        else:
+            U_l = pmesh.Un[:, :, :-1]
+            U_r = pmesh.Un[:, :, 1:]
+
+        F = np.zeros_like(U_l)
+        n_interfaces = U_l.shape[1] * U_l.shape[2]
+
+        t_old = best_time(solve_riemann, (U_l, U_r, gamma, direction), args.repeat)
+        t_new = best_time(
+            solve_riemann_into, (U_l, U_r, gamma, direction, F), args.repeat
+        )
+
+        assert np.array_equal(F, solve_riemann(U_l, U_r, gamma, direction))
+
+        for name, t_kernel in [
+            ("solve_riemann", t_old),
+            ("solve_riemann_into", t_new),
+        ]:
+            print(f"{direction:<12}|   {name:<20} |   {n_interfaces / t_kernel:.3e}")
+        print(f"{direction:<12}|   {'speed-up':<20} |   {t_old / t_new:.2f}x")
@@ -0,0 +1,89 @@
+###################################################################
+#                                                                 #
+#   Thread scaling of the parallel HLLC solver on the KH mesh     #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_riemann_scaling.py -n 1024
+#
+# Thread counts run in powers of two up to, and including, the number of threads
+# numba can use (NUMBA_NUM_THREADS, by default the core count).
+#
+# Single core, 1024x1024, NUMBA_NUM_THREADS=4, -r 10, after `FIEFS.py --warmup`
+# (serial kernel 1.557e+07 interfaces/s):
+#
+#   Threads | Interfaces/s | Speed-up | Efficiency
+#   1       | 1.806e+07    | 1.16     | 1.16
+#   2       | 1.653e+07    | 1.06     | 0.53
+#   4       | 1.801e+07    | 1.16     | 0.29
+#
+# One core cannot show scaling: the forced thread counts share it, so the
+# rows differ only by run-to-run noise (a second run gave 1.37, 1.30 and
+# 1.22). Near-linear scaling up to the core count still needs a run on a
+# multicore node.
+
+import argparse
+import os
+
+import numba
+import numpy as np
+from common import best_time, kh_setup
+
+from src.riemann import solve_riemann_into, solve_riemann_into_parallel
+from src.tools import set_threads
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=1024)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=5)
+
+args = parser.parse_args()
+
+
+def solve_both(U_l_x, U_r_x, U_l_y, U_r_y, gamma, F, G, riemann):
+    """Solves the x and y interfaces of one step"""
+    riemann(U_l_x, U_r_x, gamma, "x", F)
+    riemann(U_l_y, U_r_y, gamma, "y", G)
+
+
+if __name__ == "__main__":
+    pin, pmesh = kh_setup(args.nx, args.nx)
+    gamma = float(pin.value_dict["gamma"])
+
+    U_l_x, U_r_x = pmesh.Un[:, :-1, :], pmesh.Un[:, 1:, :]
+    U_l_y, U_r_y = pmesh.Un[:, :, :-1], pmesh.Un[:, :, 1:]
+    F = np.zeros_like(U_l_x)
+    G = np.zeros_like(U_l_y)
+
+    n_interfaces = F.shape[1] * F.shape[2] + G.shape[1] * G.shape[2]
+
+    t_serial = best_time(
+        solve_both,
+        (U_l_x, U_r_x, U_l_y, U_r_y, gamma, F, G, solve_riemann_into),
+        args.repeat,
+    )
+
+    print(
+        f"HLLC thread scaling on a {args.nx}x{args.nx} Kelvin-Helmholtz mesh, "
+        f"{os.cpu_count()} cores, {numba.config.NUMBA_NUM_THREADS} numba threads"
+    )
+    print(f"Serial kernel: {n_interfaces / t_serial:.3e} interfaces/s")
+    print("Threads   |   Interfaces/s   |   Speed-up   |   Efficiency")
+
+    max_threads = numba.config.NUMBA_NUM_THREADS
+    thread_counts = [
+        2**k for k in range(max_threads.bit_length()) if 2**k < max_threads
+    ]
+
+    for threads in [*thread_counts, max_threads]:
+        set_threads(threads)
+
+        t_par = best_time(
+            solve_both,
+            (U_l_x, U_r_x, U_l_y, U_r_y, gamma, F, G, solve_riemann_into_parallel),
+            args.repeat,
+        )
+
+        print(
+            f"{threads:<10}|   {n_interfaces / t_par:.3e}      |   "
+            f"{t_serial / t_par:<10.2f} |   {t_serial / t_par / threads:.2f}"
+        )
@@ -0,0 +1,103 @@
+###################################################################
+#                                                                 #
+#   Throughput and KH accuracy of each registered Riemann solver  #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_riemann_solvers.py -n 512 --nx-run 128
+#
+# Throughput is measured on the x and y interfaces of the KH initial
+# conditions. Accuracy runs the KH problem to --tmax with each solver
+# and reports the L1 density difference from the HLLC run on the same
+# mesh, and the vertical kinetic energy as a measure of the instability
+# growth (less dissipative solvers grow faster). For the hybrid solver
+# the fraction of interfaces that took the cheap HLL path is reported
+# for the initial conditions and for the end of its run.
+
+import argparse
+
+import numpy as np
+from common import best_time, kh_run, kh_setup, vertical_kinetic_energy
+
+from src.riemann import (
+    HLLC,
+    HYBRID,
+    RIEMANN_SOLVERS,
+    count_smooth_interfaces,
+    solve_riemann_x,
+    solve_riemann_y,
+)
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=512)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=5)
+parser.add_argument(
+    "--nx-run", help="Cells per direction for the runs", type=int, default=128
+)
+parser.add_argument("--tmax", help="End time of the runs", type=float, default=1.0)
+
+args = parser.parse_args()
+
+
+def solve_both(U_l_x, U_r_x, U_l_y, U_r_y, gamma, F, G, solver):
+    """Solves the x and y interfaces of one step"""
+    solve_riemann_x(U_l_x, U_r_x, gamma, F, solver)
+    solve_riemann_y(U_l_y, U_r_y, gamma, G, solver)
+
+
+if __name__ == "__main__":
+    pin, pmesh = kh_setup(args.nx, args.nx)
+    gamma = float(pin.value_dict["gamma"])
+
+    U_l_x, U_r_x = pmesh.Un[:, :-1, :], pmesh.Un[:, 1:, :]
+    U_l_y, U_r_y = pmesh.Un[:, :, :-1], pmesh.Un[:, :, 1:]
+    F = np.zeros_like(U_l_x)
+    G = np.zeros_like(U_l_y)
+
+    n_interfaces = F.shape[1] * F.shape[2] + G.shape[1] * G.shape[2]
+
+    throughput = {}
+    for name, solver in RIEMANN_SOLVERS.items():
+        t_solve = best_time(
+            solve_both,
+            (U_l_x, U_r_x, U_l_y, U_r_y, gamma, F, G, solver),
+            args.repeat,
+        )
+        throughput[name] = n_interfaces / t_solve
+
+    reference = kh_run(args.nx_run, args.tmax, HLLC)
+    ng = reference.ng
+    rho_ref = reference.Un[0, ng:-ng, ng:-ng]
+
+    print(f"Throughput on {args.nx}x{args.nx}, runs on {args.nx_run}x{args.nx_run}")
+    print(f"to t = {args.tmax}")
+    print(
+        "Solver     |   Interfaces/s   |   vs HLLC   |   L1(rho - rho_hllc)   |   KE_y"
+    )
+
+    for name, solver in RIEMANN_SOLVERS.items():
+        if solver == HLLC:
+            run = reference
+        else:
+            run = kh_run(args.nx_run, args.tmax, solver)
+
+        l1 = np.mean(np.abs(run.Un[0, ng:-ng, ng:-ng] - rho_ref))
+
+        print(
+            f"{name:<11}|   {throughput[name]:.3e}      |   "
+            f"{throughput[name] / throughput['hllc']:<9.2f} |   "
+            f"{l1:<20.3e} |   {vertical_kinetic_energy(run):.4e}"
+        )
+
+        if solver == HYBRID:
+            hybrid_run = run
+
+    for label, Un in [("initial", pmesh.Un), ("final", hybrid_run.Un)]:
+        n_smooth = count_smooth_interfaces(
+            Un[:, :-1, :], Un[:, 1:, :], gamma, "x"
+        ) + count_smooth_interfaces(Un[:, :, :-1], Un[:, :, 1:], gamma, "y")
+        n_total = Un[0, :-1, :].size + Un[0, :, :-1].size
+
+        print(
+            f"hybrid, {label} state: {100 * n_smooth / n_total:.1f}% of interfaces HLL"
+        )
@@ -0,0 +1,153 @@
+###################################################################
+#                                                                 #
+#     Wall time to a fixed error of the SSP Runge-Kutta steps     #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_rk.py -n 16 32 64 128 256 --error 1e-4
+#
+# A smooth density wave, rho = 1 + 0.2 sin(2 pi (x + y)), is advected
+# diagonally with u = v = 1 at constant pressure, for half a period, on
+# square meshes with the periodic boundaries of the KH input. Each
+# integrator and reconstruction reports the L1 density error against the
+# exact solution, the steps taken and the wall time of the run
+# (compilation excluded). The last table interpolates the wall time at
+# which each one reaches --error, in log-log between the two meshes
+# around it.
+
+import argparse
+import time
+
+import numpy as np
+from common import kh_setup
+
+from src.integrator import ctu_step, muscl_hancock_step, ssp_rk_step
+from src.mesh import FIEFS_Array, Workspace
+from src.reconstruct import RECONSTRUCTIONS
+from src.tools import calculate_timestep
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-n",
+    "--nx",
+    help="Cells per direction",
+    type=int,
+    nargs="+",
+    default=[16, 32, 64, 128, 256],
+)
+parser.add_argument("--tmax", help="End time of the runs", type=float, default=0.5)
+parser.add_argument("--error", help="Target L1 density error", type=float, default=1e-4)
+
+args = parser.parse_args()
+
+
+def wave_density(pmesh: FIEFS_Array, t: float) -> np.ndarray:
+    """Cell averages of the density wave at time t, ghosts included"""
+    x = pmesh.x1min + (np.arange(pmesh.Un.shape[1]) - pmesh.ng + 0.5) * pmesh.dx1
+    y = pmesh.x2min + (np.arange(pmesh.Un.shape[2]) - pmesh.ng + 0.5) * pmesh.dx2
+    sinc = np.sinc(pmesh.dx1) * np.sinc(pmesh.dx2)
+
+    return 1.0 + 0.2 * sinc * np.sin(2.0 * np.pi * (x[:, None] + y[None, :] - 2 * t))
+
+
+def advect(nx: int, integrator: str, scheme: int, cfl: float, tmax: float):
+    """Advects the wave to tmax, returns the L1 error, steps and wall time"""
+    pin, _ = kh_setup(nx, nx, scheme=scheme)
+    gamma = float(pin.value_dict["gamma"])
+
+    pmesh = FIEFS_Array(pin, np.float64)
+
+    rho = wave_density(pmesh, 0.0)
+    pmesh.Un[0] = rho
+    pmesh.Un[1] = rho
+    pmesh.Un[2] = rho
+    # Unit pressure through the internal energy of get_primitive_variables
+    pmesh.Un[3] = 1.0 / (gamma - 1.0) + rho**2
+
+    ws = Workspace(pmesh, integrator=integrator)
+
+    t = 0.0
+    steps = 0
+    start = time.perf_counter()
+    while t < tmax:
+        dt = min(calculate_timestep(pmesh, cfl, gamma), tmax - t)
+
+        if integrator == "unsplit":
+            muscl_hancock_step(pin, pmesh, ws, dt, gamma, scheme=scheme)
+        elif integrator == "ctu":
+            ctu_step(pin, pmesh, ws, dt, gamma, scheme=scheme)
+        else:
+            ssp_rk_step(pin, pmesh, ws, dt, gamma, scheme=scheme, integrator=integrator)
+
+        t += dt
+        steps += 1
+    elapsed = time.perf_counter() - start
+
+    ng = pmesh.ng
+    error = np.mean(
+        np.abs(pmesh.Un[0, ng:-ng, ng:-ng] - wave_density(pmesh, t)[ng:-ng, ng:-ng])
+    )
+
+    return error, steps, elapsed
+
+
+def time_to_error(errors: list, times: list, target: float) -> str:
+    """Wall time at the target error, interpolated in log-log"""
+    for k in range(1, len(errors)):
+        if errors[k - 1] > target >= errors[k]:
+            w = np.log(errors[k - 1] / target) / np.log(errors[k - 1] / errors[k])
+
+            return f"{times[k - 1] * (times[k] / times[k - 1]) ** w:.3f}"
+
+    if errors[0] <= target:
+        return f"< {times[0]:.3f}"
+
+    return "not reached"
+
+
+if __name__ == "__main__":
+    cases = [
+        ("unsplit", "muscl", 0.5),
+        ("ctu", "muscl", 0.9),
+        ("rk2", "muscl", 0.5),
+        ("rk3", "muscl", 0.5),
+        ("rk3", "ppm", 0.5),
+        ("rk2", "weno5", 0.5),
+        ("rk3", "weno5", 0.5),
+    ]
+
+    print(f"Diagonal density wave to t = {args.tmax}")
+    print(
+        "Integrator   |   Scheme   |   CFL   |   nx     |   L1(rho)      |   "
+        "Order   |   Steps   |   Time (s)"
+    )
+
+    results = []
+    for integrator, name, cfl in cases:
+        scheme = RECONSTRUCTIONS[name]
+
+        # Compile the kernels of this case outside the timings
+        advect(8, integrator, scheme, cfl, 0.01)
+
+        errors = []
+        times = []
+        for nx in args.nx:
+            error, steps, elapsed = advect(nx, integrator, scheme, cfl, args.tmax)
+
+            order = "" if not errors else f"{np.log2(errors[-1] / error):.2f}"
+            errors.append(error)
+            times.append(elapsed)
+
+            print(
+                f"{integrator:<13}|   {name:<9}|   {cfl:<6.1f}|   {nx:<6} |   "
+                f"{error:<12.4e} |   {order:<7} |   {steps:<8}|   {elapsed:.3f}"
+            )
+
+        results.append((integrator, name, time_to_error(errors, times, args.error)))
+
+    print()
+    print(f"Wall time to an L1 error of {args.error:.0e}")
+    print("Integrator   |   Scheme   |   Time (s)")
+
+    for integrator, name, elapsed in results:
+        print(f"{integrator:<13}|   {name:<9}|   {elapsed}")
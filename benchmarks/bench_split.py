@@ -0,0 +1,71 @@
+###################################################################
+#                                                                 #
+#       Strang split sweeps against the unsplit step              #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_split.py -n 256 1024 2048
+#
+# Best wall time of one KH step with the unsplit MUSCL-Hancock step and
+# with the split step (a boundary fill and a sweep of pencils along each
+# direction), and of each sweep on its own. The x1 sweep transposes
+# blocks of pencils out of the mesh, the x2 sweep copies contiguous rows,
+# so the two sweep times show what the transpose costs.
+
+import argparse
+
+from common import best_time, kh_setup
+
+from src.integrator import muscl_hancock_step, split_step
+from src.mesh import Workspace
+from src.split import split_sweep
+from src.tools import calculate_timestep
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-n",
+    "--nx",
+    help="Cells per direction",
+    type=int,
+    nargs="+",
+    default=[256, 1024, 2048],
+)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=3)
+
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(
+        "Grid     |   Step            |   Time (ms)   |   Zone-updates/s   |   Speedup"
+    )
+
+    for nx in args.nx:
+        pin, pmesh = kh_setup(nx, nx)
+        cfl = float(pin.value_dict["CFL"])
+        gamma = float(pin.value_dict["gamma"])
+
+        dt = calculate_timestep(pmesh, cfl, gamma)
+
+        ws = Workspace(pmesh)
+        ws_split = Workspace(pmesh, integrator="split")
+
+        buffers = (ws_split.pencils, ws_split.pencil_faces, ws_split.pencil_fluxes)
+        x1_sweep = (pmesh.Un, pmesh.ng, gamma, dt / pmesh.dx1, False, *buffers)
+        x2_sweep = (pmesh.Un, pmesh.ng, gamma, dt / pmesh.dx2, True, *buffers)
+
+        for name, func, func_args in [
+            ("unsplit", muscl_hancock_step, (pin, pmesh, ws, dt, gamma)),
+            ("split", split_step, (pin, pmesh, ws_split, dt, gamma)),
+            ("x1 sweep", split_sweep, x1_sweep),
+            ("x2 sweep", split_sweep, x2_sweep),
+        ]:
+            elapsed = best_time(func, func_args, args.repeat)
+
+            if name == "unsplit":
+                baseline = elapsed
+
+            print(
+                f"{f'{nx}^2':<9}|   {name:<16}|   {1e3 * elapsed:<12.1f}|   "
+                f"{nx**2 / elapsed:<17.3e}|   {baseline / elapsed:.2f}x"
+            )
@@ -0,0 +1,169 @@
+###################################################################
+#                                                                 #
+#      Strong scaling of the thread pool over mesh tiles          #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_tile_scaling.py -n 2048 -t 64 -p 1 2 4 8 16 32
+#
+# Best wall time of one full KH step (timestep reduction, boundary fill,
+# tiled predictor, Riemann solve and update) with the strips of tiles on
+# each number of threads, against the serial tiled step. Next to it is the
+# untiled step on the same number of numba threads (the prange builds,
+# tile_size = 0), against the serial untiled step. Both are plotted as
+# speed-up and efficiency against threads, saved to --plot. Thread counts
+# above the core count only measure oversubscription, and numba caps its
+# threads at NUMBA_NUM_THREADS, printed in the header.
+#
+# Single core, 2048x2048, tiles of 64, after `FIEFS.py --warmup`:
+#
+#   Threads | Strips (ms) | Speed-up | prange (ms) | Speed-up
+#   1       | 2222        | 1.00     | 2136        | 1.00
+#   2       | 2319        | 0.96     | 2096        | 1.02
+#   4       | 2267        | 0.98     | 1918        | 1.11
+#
+# One core cannot show scaling: the strips are oversubscribed and the
+# prange builds are capped at one thread, so the prange rows differ only
+# by run-to-run noise. The 1-32 thread table and plot still need a run on
+# a multicore node.
+
+import argparse
+import os
+import time
+
+import matplotlib.pyplot as plt
+import numba
+import numpy as np
+from common import kh_setup
+
+from src.integrator import muscl_hancock_step
+from src.mesh import Workspace
+from src.tiles import threaded_timestep
+from src.tools import calculate_timestep, set_threads
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=2048)
+parser.add_argument("-t", "--tile", help="Tile size", type=int, default=64)
+parser.add_argument(
+    "-p",
+    "--threads",
+    help="Thread counts",
+    type=int,
+    nargs="+",
+    default=[1, 2, 4, 8, 16, 32],
+)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=3)
+parser.add_argument(
+    "--plot", help="Figure to save", type=str, default="figures/tile_scaling.png"
+)
+
+args = parser.parse_args()
+
+
+def step_time(num_threads: int, tile_size: int) -> float:
+    """Best wall time of one step after a warm-up step, untiled on the
+    numba threads if tile_size is 0"""
+    pin, pmesh = kh_setup(args.nx, args.nx)
+    cfl = float(pin.value_dict["CFL"])
+    gamma = float(pin.value_dict["gamma"])
+
+    if tile_size == 0:
+        num_threads = set_threads(num_threads)
+
+    ws = Workspace(pmesh, num_threads=num_threads, tile_size=tile_size)
+
+    def step():
+        if tile_size == 0:
+            dt = calculate_timestep(pmesh, cfl, gamma, num_threads)
+        elif ws.pool is None:
+            dt = calculate_timestep(pmesh, cfl, gamma)
+        else:
+            dt = threaded_timestep(
+                ws.pool,
+                pmesh.Un,
+                pmesh.ng,
+                gamma,
+                cfl,
+                pmesh.dx1,
+                pmesh.dx2,
+                tile_size,
+                num_threads,
+            )
+
+        muscl_hancock_step(
+            pin,
+            pmesh,
+            ws,
+            dt,
+            gamma,
+            num_threads=num_threads,
+            tile_size=tile_size,
+        )
+
+    step()
+
+    best = np.inf
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        step()
+        best = min(best, time.perf_counter() - start)
+
+    if ws.pool is not None:
+        ws.pool.shutdown()
+
+    set_threads(1)
+
+    return best
+
+
+if __name__ == "__main__":
+    print(
+        f"KH step on {args.nx}x{args.nx}, tiles of {args.tile}, "
+        f"{os.cpu_count()} cores, {numba.config.NUMBA_NUM_THREADS} numba threads"
+    )
+    print(
+        "Threads   |   Strips (ms)   |   Speed-up   |   Efficiency   |   "
+        "prange (ms)   |   Speed-up   |   Efficiency"
+    )
+
+    t_strips = step_time(1, args.tile)
+    t_prange = step_time(1, 0)
+    speedups = {"strips": [], "prange": []}
+
+    for threads in args.threads:
+        strips = t_strips if threads == 1 else step_time(threads, args.tile)
+        prange = t_prange if threads == 1 else step_time(threads, 0)
+
+        speedups["strips"].append(t_strips / strips)
+        speedups["prange"].append(t_prange / prange)
+
+        print(
+            f"{threads:<10}|   {1e3 * strips:<14.1f}|   {t_strips / strips:<11.2f}|   "
+            f"{t_strips / strips / threads:<13.2f}|   {1e3 * prange:<14.1f}|   "
+            f"{t_prange / prange:<11.2f}|   {t_prange / prange / threads:.2f}"
+        )
+
+    fig, (ax_speedup, ax_efficiency) = plt.subplots(1, 2, figsize=(10, 4))
+
+    for name, label in [("strips", "Strips of tiles"), ("prange", "Untiled prange")]:
+        ax_speedup.loglog(args.threads, speedups[name], "o-", base=2, label=label)
+        ax_efficiency.semilogx(
+            args.threads,
+            np.array(speedups[name]) / np.array(args.threads),
+            "o-",
+            base=2,
+            label=label,
+        )
+
+    ax_speedup.loglog(args.threads, args.threads, "k--", base=2, label="Ideal")
+    ax_speedup.set_xlabel("Threads")
+    ax_speedup.set_ylabel("Speed-up")
+    ax_speedup.legend()
+
+    ax_efficiency.set_xlabel("Threads")
+    ax_efficiency.set_ylabel("Parallel efficiency")
+    ax_efficiency.set_ylim(0, 1.1)
+
+    fig.suptitle(f"Strong scaling, {args.nx}x{args.nx} KH, tiles of {args.tile}")
+    fig.tight_layout()
+    fig.savefig(args.plot)
@@ -0,0 +1,82 @@
+###################################################################
+#                                                                 #
+#         Zone-updates per second of the tiled step engine        #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_tiles.py -n 2048 -t 0 16 32 64 128 256 512
+#
+# Best wall time of one full KH step (timestep, boundaries, reconstruction
+# and predictor, Riemann solve and update) for each tile size, 0 being the
+# untiled step. Working set is what one tile touches between its stages:
+# the tile of Un with its halo and its start of step copy, the four face
+# arrays and two flux rows.
+
+import argparse
+import time
+
+import numpy as np
+from common import kh_setup
+
+from src.integrator import muscl_hancock_step
+from src.mesh import Workspace
+from src.tools import calculate_timestep
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--nx", help="Cells per direction", type=int, default=2048)
+parser.add_argument(
+    "-t",
+    "--tile",
+    help="Tile sizes, 0 is untiled",
+    type=int,
+    nargs="+",
+    default=[0, 16, 32, 64, 128, 256, 512],
+)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=3)
+
+args = parser.parse_args()
+
+
+def step_time(tile_size: int) -> float:
+    """Best wall time of one step after a warm-up step"""
+    pin, pmesh = kh_setup(args.nx, args.nx)
+    cfl = float(pin.value_dict["CFL"])
+    gamma = float(pin.value_dict["gamma"])
+
+    ws = Workspace(pmesh, tile_size=tile_size)
+
+    def step():
+        dt = calculate_timestep(pmesh, cfl, gamma)
+        muscl_hancock_step(pin, pmesh, ws, dt, gamma, tile_size=tile_size)
+
+    step()
+
+    best = np.inf
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        step()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def working_set(tile_size: int, ng: int = 2) -> float:
+    """Bytes one tile touches between its stages"""
+    n = args.nx if tile_size == 0 else min(tile_size, args.nx)
+    copies = 1 if tile_size == 0 else 2
+
+    return 8 * 4 * (copies * (n + 2 * ng) ** 2 + 4 * (n + 2) ** 2 + 2 * n)
+
+
+if __name__ == "__main__":
+    print(f"KH step on {args.nx}x{args.nx}, MUSCL, minmod, HLLC")
+    print("Tile      |   Working set (KB)   |   Step (ms)   |   Zone-updates/s")
+
+    for tile_size in args.tile:
+        elapsed = step_time(tile_size)
+        name = "untiled" if tile_size == 0 else str(tile_size)
+
+        print(
+            f"{name:<10}|   {working_set(tile_size) / 1e3:<19.0f}|   "
+            f"{1e3 * elapsed:<12.1f}|   {args.nx**2 / elapsed:.3e}"
+        )
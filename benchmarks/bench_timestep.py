@@ -0,0 +1,150 @@
+###################################################################
+#                                                                 #
+#        Time of the CFL reduction against its array version      #
+#                                                                 #
+###################################################################
+#
+# Usage: python benchmarks/bench_timestep.py -n 512 2048 --tmax 0.5
+#
+# Versions of the CFL timestep on the KH mesh:
+#   allocating  get_primitive_variables_2d over the whole array, ghosts
+#               included, then the sound speed, |u| + a and |v| + a arrays
+#               and two np.amax passes, limited by dx1 only
+#   numpy       the NumPy backend's interior reduction over both directions
+#   fused       min_crossing_time, one pass over the interior
+#   threaded    min_crossing_time_parallel on every numba thread
+# Bandwidth is the interior of Un read once divided by the wall time. The
+# second table shows the dx1-only step is too large once dx2 < dx1. The
+# last one runs KH to --tmax with the timestep reduced every step and
+# with it taken from the Riemann signal speeds at two safety factors,
+# reporting the steps taken and the wall time of the run. At the default
+# safety of 1 the riemann mode takes the reduction's steps and skips the
+# reduction, at 0.9 it takes about 10% more steps and loses.
+
+import argparse
+import time
+
+import numba
+import numpy as np
+from common import best_time, kh_setup
+
+from src import numpy_backend
+from src.pgen import kh
+from src.simulation import Simulation
+from src.tools import (
+    calculate_timestep,
+    get_primitive_variables_2d,
+    min_crossing_time,
+    min_crossing_time_parallel,
+)
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-n", "--nx", help="Cells per direction", type=int, nargs="+", default=[512, 2048]
+)
+parser.add_argument("-r", "--repeat", help="Timed repetitions", type=int, default=5)
+parser.add_argument("--tmax", help="End time of the runs", type=float, default=0.5)
+
+args = parser.parse_args()
+
+GAMMA = 1.4
+CFL = 0.5
+
+
+def timestep_allocating(pmesh):
+    """The whole-array timestep limited by dx1, as FIEFS computed it"""
+    rho, u, v, p = get_primitive_variables_2d(pmesh.Un, GAMMA)
+
+    a = np.sqrt(GAMMA * p / rho)
+
+    max_vel = max(np.amax(np.abs(u) + a), np.amax(np.abs(v) + a))
+
+    return CFL * pmesh.dx1 / max_vel
+
+
+def timestep_fused(pmesh):
+    """The single pass interior reduction"""
+    return CFL * min_crossing_time(pmesh.Un, pmesh.ng, GAMMA, pmesh.dx1, pmesh.dx2)
+
+
+def timestep_threaded(pmesh):
+    """The single pass interior reduction on every numba thread"""
+    return CFL * min_crossing_time_parallel(
+        pmesh.Un, pmesh.ng, GAMMA, pmesh.dx1, pmesh.dx2
+    )
+
+
+def run_time(nx: int, mode: str, safety: float):
+    """Steps taken and wall time of a KH run to tmax, after a warm-up step"""
+    pin, _ = kh_setup(nx, nx)
+    pin.value_dict["backend"] = "numba"
+    pin.value_dict["timestep"] = mode
+    pin.value_dict["timestep_safety"] = safety
+
+    np.random.seed(0)
+    sim = Simulation(pin, kh.ProblemGenerator)
+    sim.step()
+
+    start = time.perf_counter()
+    sim.run_until(args.tmax)
+
+    return sim.iter, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"CFL timestep on the KH mesh, {numba.get_num_threads()} numba threads")
+    print(
+        "Grid     |   Version       |   Time (ms)   |   Bandwidth (GB/s)   |   Speedup"
+    )
+
+    for nx in args.nx:
+        pin, pmesh = kh_setup(nx, nx)
+        ng = pmesh.ng
+
+        traffic = pmesh.Un[:, ng:-ng, ng:-ng].nbytes
+
+        for name, func in [
+            ("allocating", timestep_allocating),
+            (
+                "numpy",
+                lambda pmesh: numpy_backend.calculate_timestep(pmesh, CFL, GAMMA),
+            ),
+            ("fused", timestep_fused),
+            ("threaded", timestep_threaded),
+        ]:
+            elapsed = best_time(func, (pmesh,), args.repeat)
+
+            if name == "allocating":
+                baseline = elapsed
+
+            print(
+                f"{f'{nx}^2':<9}|   {name:<14}|   "
+                f"{1e3 * elapsed:<12.2f}|   {traffic / elapsed / 1e9:<19.2f}|   "
+                f"{baseline / elapsed:.2f}x"
+            )
+
+    print()
+    print("Anisotropic KH mesh, nx2 = 4 nx1")
+    print("Grid       |   dx1-only dt   |   Crossing time dt   |   Ratio")
+
+    nx = args.nx[0]
+    pin, pmesh = kh_setup(nx // 4, nx)
+    dt_dx1 = timestep_allocating(pmesh)
+    dt = calculate_timestep(pmesh, CFL, GAMMA)
+
+    print(
+        f"{f'{nx // 4}x{nx}':<11}|   {dt_dx1:<14.3e}|   {dt:<19.3e}|   "
+        f"{dt_dx1 / dt:.2f}"
+    )
+
+    print()
+    print(f"KH on {nx}x{nx} to t = {args.tmax}")
+    print("Timestep    |   Safety   |   Steps   |   Time (s)   |   Step (ms)")
+
+    for mode, safety in [("reduction", 1.0), ("riemann", 1.0), ("riemann", 0.9)]:
+        steps, elapsed = run_time(nx, mode, safety)
+
+        print(
+            f"{mode:<12}|   {safety:<9.2f}|   {steps:<8}|   {elapsed:<11.2f}|   "
+            f"{1e3 * elapsed / (steps - 1):.2f}"
+        )
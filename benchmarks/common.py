@@ -0,0 +1,152 @@
+###################################################################
+#                                                                 #
+#        Shared set-up helpers for the benchmark scripts          #
+#                                                                 #
+###################################################################
+
+import os
+import sys
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+
+current_script_path = os.path.abspath(__file__)
+parent_directory = os.path.dirname(os.path.dirname(current_script_path))
+sys.path.append(parent_directory)
+
+from src import numpy_backend
+from src.input import FIEFS_Input
+from src.integrator import muscl_hancock_step
+from src.mesh import FIEFS_Array, Workspace
+from src.pgen import kh
+from src.reconstruct import MINMOD, MUSCL, RECONSTRUCTIONS
+from src.riemann import HLLC
+from src.tools import calculate_timestep
+
+
+def kh_setup(
+    nx1: int, nx2: int, dtype: np.dtype = np.float64, scheme: int = MUSCL
+) -> Tuple[FIEFS_Input, FIEFS_Array]:
+    """Builds the Kelvin-Helmholtz problem from `inputs/kh.in` at a given size
+
+    Parameters
+    ----------
+    nx1, nx2 : int
+        Number of cells in the x1 and x2 directions
+    dtype : dtype
+        Type of the conserved variables
+    scheme : int
+        Reconstruction id, which sets the number of ghost zones
+
+    Returns
+    -------
+    pin : FIEFS_Input
+        Parsed input with the grid size overridden
+    pmesh : FIEFS_Array
+        Mesh holding the initial conditions with the boundaries filled
+
+    """
+    np.random.seed(0)
+
+    pin = FIEFS_Input(input_fname=os.path.join(parent_directory, "inputs", "kh.in"))
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = nx1
+    pin.value_dict["nx2"] = nx2
+    pin.value_dict["reconstruction"] = {v: k for k, v in RECONSTRUCTIONS.items()}[
+        scheme
+    ]
+
+    pmesh = FIEFS_Array(pin, dtype)
+    kh.ProblemGenerator(pin, pmesh)
+    pmesh.enforce_bcs(pin)
+
+    return pin, pmesh
+
+
+def best_time(func: Callable, args: tuple, repeat: int) -> float:
+    """Returns the best wall time of `repeat` calls after one warm-up call"""
+    func(*args)
+
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def kh_step(
+    pin: FIEFS_Input,
+    pmesh: FIEFS_Array,
+    cfl: float,
+    gamma: float,
+    tmax: float,
+    t: float,
+    solver: int = HLLC,
+    backend: str = "numba",
+    limiter: int = MINMOD,
+    scheme: int = MUSCL,
+    ws: Workspace = None,
+) -> float:
+    """Advances the mesh by one MUSCL-Hancock step, as in FIEFS.py
+
+    `backend` is 'numba' or 'numpy' and picks the kernels used for the
+    timestep, the reconstruction, the predictor fluxes and the Riemann
+    solve. A workspace is allocated for the call if none is given.
+
+    Returns
+    -------
+    float
+        The timestep that was taken
+
+    """
+    if backend == "numpy":
+        timestep = numpy_backend.calculate_timestep
+    else:
+        timestep = calculate_timestep
+
+    if ws is None:
+        ws = Workspace(pmesh, backend=backend)
+
+    dt = min(timestep(pmesh, cfl, gamma), tmax - t)
+
+    muscl_hancock_step(
+        pin, pmesh, ws, dt, gamma, solver, scheme, limiter, backend=backend
+    )
+
+    return dt
+
+
+def kh_run(
+    nx: int,
+    tmax: float,
+    solver: int = HLLC,
+    backend: str = "numba",
+    limiter: int = MINMOD,
+    scheme: int = MUSCL,
+) -> FIEFS_Array:
+    """Runs the Kelvin-Helmholtz problem on an nx by nx mesh until tmax"""
+    pin, pmesh = kh_setup(nx, nx, scheme=scheme)
+
+    cfl = float(pin.value_dict["CFL"])
+    gamma = float(pin.value_dict["gamma"])
+
+    ws = Workspace(pmesh, backend=backend)
+
+    t = 0.0
+    while t < tmax:
+        t += kh_step(
+            pin, pmesh, cfl, gamma, tmax, t, solver, backend, limiter, scheme, ws
+        )
+
+    return pmesh
+
+
+def vertical_kinetic_energy(pmesh: FIEFS_Array) -> float:
+    """Domain integral of rho v^2 / 2, the KH growth diagnostic"""
+    ng = pmesh.ng
+    Un = pmesh.Un[:, ng:-ng, ng:-ng]
+
+    return float(np.sum(0.5 * Un[2] ** 2 / Un[0]) * pmesh.dx1 * pmesh.dx2)
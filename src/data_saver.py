@@ -5,7 +5,7 @@ import numpy as np
 
 import src.input
 import src.mesh
-from src.tools import get_primitive_variables_2d
+from src.numpy_backend import get_primitive_variables_2d
 
 sys.path.append("../..")
 
@@ -32,7 +32,7 @@ class FIEFS_Output:
         # Dictionary containing all problem information
         self.value_dict = dict()
 
-    def data_preferences(self, pin: src.input.FIEFS_Input) -> None:
+    def data_preferences(self, pin: src.input.FIEFS_Input, ng: int) -> None:
         """
         This function is called in `FIEFS.py` and sets the data preferences
         specified in the problem input (pin).
@@ -43,6 +43,10 @@ class FIEFS_Output:
             Contains the problem information stored in the FIEFS_Input
             object
 
+        ng : int
+            Number of ghost cells of the mesh, which can be more than the
+            input asks for (see `FIEFS_Array`)
+
         """
 
         self.Nx = pin.value_dict["nx1"]
@@ -51,6 +55,9 @@ class FIEFS_Output:
 
         self.shape = (self.Nx, self.Ny)
 
+        # Ghost zones around the interior, as sized by FIEFS_Array
+        self.ng = ng
+
         # Get output variables as a list
         self.variables = pin.value_dict["output_variables"]
 
@@ -154,9 +161,9 @@ class FIEFS_Output:
 
             self.xvelocity = np.empty(self.shape, dtype=float)
 
-            for j in reversed(range(u.shape[0] - 4)):
-                for i in range(u.shape[1] - 4):
-                    self.xvelocity[i][j] = u[i + 2][j + 2]
+            for j in reversed(range(u.shape[0] - 2 * self.ng)):
+                for i in range(u.shape[1] - 2 * self.ng):
+                    self.xvelocity[i][j] = u[i + self.ng][j + self.ng]
 
             if self.file_type_check == 1:  # writing to txt file
                 for j in reversed(range(self.xvelocity.shape[0])):
@@ -184,9 +191,9 @@ class FIEFS_Output:
 
             self.yvelocity = np.empty(self.shape, dtype=float)
 
-            for j in reversed(range(v.shape[0] - 4)):
-                for i in range(v.shape[1] - 4):
-                    self.yvelocity[i][j] = v[i + 2][j + 2]
+            for j in reversed(range(v.shape[0] - 2 * self.ng)):
+                for i in range(v.shape[1] - 2 * self.ng):
+                    self.yvelocity[i][j] = v[i + self.ng][j + self.ng]
 
             if self.file_type_check == 1:  # write to txt
                 for j in reversed(range(self.yvelocity.shape[0])):
@@ -214,9 +221,9 @@ class FIEFS_Output:
 
             self.density = np.empty(self.shape, dtype=float)
 
-            for j in reversed(range(rho.shape[0] - 4)):
-                for i in range(rho.shape[1] - 4):
-                    self.density[i][j] = rho[i + 2][j + 2]
+            for j in reversed(range(rho.shape[0] - 2 * self.ng)):
+                for i in range(rho.shape[1] - 2 * self.ng):
+                    self.density[i][j] = rho[i + self.ng][j + self.ng]
 
             if self.file_type_check == 1:  # write to txt
                 for j in reversed(range(self.density.shape[0])):
@@ -244,9 +251,9 @@ class FIEFS_Output:
 
             self.pressure = np.empty(self.shape, dtype=float)
 
-            for j in reversed(range(p.shape[0] - 4)):
-                for i in range(p.shape[1] - 4):
-                    self.pressure[i][j] = p[i + 2][j + 2]
+            for j in reversed(range(p.shape[0] - 2 * self.ng)):
+                for i in range(p.shape[1] - 2 * self.ng):
+                    self.pressure[i][j] = p[i + self.ng][j + self.ng]
 
             if self.file_type_check == 1:  # write to txt
                 for j in reversed(range(self.pressure.shape[0])):
@@ -0,0 +1,428 @@
+###################################################################
+#                                                                 #
+#   Domain decomposition of the mesh over processes on one node   #
+#                                                                 #
+###################################################################
+
+import copy
+import multiprocessing as mp
+import os
+import sys
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+current_script_path = os.path.abspath(__file__)
+parent_directory = os.path.dirname(os.path.dirname(current_script_path))
+sys.path.append(parent_directory)
+
+from src.input import FIEFS_Input
+from src.integrator import muscl_hancock_step
+from src.mesh import FIEFS_Array, Workspace
+from src.tiles import strip_rows
+from src.tools import min_crossing_time
+
+
+def rank_slabs(nx1: int, num_ranks: int) -> List[Tuple[int, int]]:
+    """Splits the interior rows of cells into one slab per rank
+
+    Parameters
+    ----------
+    nx1 : int
+        Number of cells in the x1 direction
+    num_ranks : int
+        Number of ranks
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        First and one past the last interior row of each rank, covering
+        the mesh in order
+
+    """
+    return [
+        (rank * nx1 // num_ranks, (rank + 1) * nx1 // num_ranks)
+        for rank in range(num_ranks)
+    ]
+
+
+def get_slab(pmesh: FIEFS_Array, i_begin: int, i_end: int) -> FIEFS_Array:
+    """Copy of the interior rows i_begin to i_end of a mesh with their ghosts
+
+    Parameters
+    ----------
+    pmesh : FIEFS_Array
+        Whole mesh
+    i_begin, i_end : int
+        First and one past the last interior row of the slab
+
+    Returns
+    -------
+    FIEFS_Array
+        Mesh of the slab, with the cell sizes of the whole mesh
+
+    """
+    slab = copy.copy(pmesh)
+
+    slab.nx1 = i_end - i_begin
+    slab.x1min = pmesh.x1min + i_begin * pmesh.dx1
+    slab.x1max = pmesh.x1min + i_end * pmesh.dx1
+    slab.Un = pmesh.Un[:, i_begin : i_end + 2 * pmesh.ng].copy()
+    slab.ghost_buffers = [None, None]
+
+    return slab
+
+
+def rank_input(pin: FIEFS_Input, rank: int, num_ranks: int) -> FIEFS_Input:
+    """Input of one rank, leaving the ghosts the halo exchange fills alone
+
+    `enforce_bcs` does not touch the ghosts of a 'wall' boundary, so the
+    x1 boundaries between ranks and the periodic x1 boundaries, which
+    wrap around from the last rank to the first, are set to 'wall'.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Input of the whole problem
+    rank : int
+        Index of the rank
+    num_ranks : int
+        Number of ranks
+
+    Returns
+    -------
+    FIEFS_Input
+        Copy of the input with the boundaries of the rank
+
+    """
+    bcs = pin.value_dict
+
+    pin_rank = copy.copy(pin)
+    pin_rank.value_dict = dict(bcs)
+
+    if rank > 0 or bcs["left_bc"] == "periodic":
+        pin_rank.value_dict["left_bc"] = "wall"
+
+    if rank < num_ranks - 1 or bcs["right_bc"] == "periodic":
+        pin_rank.value_dict["right_bc"] = "wall"
+
+    return pin_rank
+
+
+def shared_array(
+    block: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype: np.dtype
+) -> np.ndarray:
+    """Array of the given shape and type on a block of shared memory"""
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def rank_main(
+    rank: int,
+    num_ranks: int,
+    pin: FIEFS_Input,
+    mesh: FIEFS_Array,
+    names: List[str],
+    options: Dict,
+    barrier: mp.Barrier,
+    conn: Connection,
+) -> None:
+    """Steps the slab of one rank on the commands of the parent process
+
+    The rank keeps its slab of Un to itself between commands. Every step
+    the ranks reduce the cell crossing time through shared memory, so they all
+    take the same timestep, then post their first and last ng interior
+    rows and fill their x1 ghosts from their neighbours' rows before
+    stepping. Each command is a (t, t_end, max_steps) tuple, answered
+    once the slab is copied back into the shared mesh with the time
+    before the last step, the number of steps and the last timestep.
+    None stops the rank.
+
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+
+    ng = mesh.ng
+    shape = (mesh.nvar, mesh.nx1 + 2 * ng, mesh.nx2 + 2 * ng)
+    dtype = options["dtype"]
+
+    Un = shared_array(blocks[0], shape, dtype)
+    edges = shared_array(blocks[1], (num_ranks, 2, mesh.nvar, ng, shape[2]), dtype)
+    crossing_times = shared_array(blocks[2], (num_ranks,), np.float64)
+
+    slabs = rank_slabs(mesh.nx1, num_ranks)
+    i_begin, i_end = slabs[rank]
+
+    mesh.Un = Un
+    pmesh = get_slab(mesh, i_begin, i_end)
+    pin_rank = rank_input(pin, rank, num_ranks)
+
+    ws = Workspace(
+        pmesh,
+        None,
+        options["backend"],
+        options["variables"],
+        1,
+        options["tile_size"],
+        options["accum_dtype"],
+    )
+
+    # Rows of Un the rank writes back, the ghosts of the mesh belong to the
+    # first and last ranks
+    row_begin, row_end = strip_rows(slabs, ng)[rank]
+
+    bcs = pin.value_dict
+    wrap_lower = bcs["left_bc"] == "periodic"
+    wrap_upper = bcs["right_bc"] == "periodic"
+
+    while True:
+        command = conn.recv()
+
+        if command is None:
+            break
+
+        t, t_end, max_steps = command
+
+        try:
+            steps = 0
+
+            while True:
+                # CFL reduction across ranks
+                crossing_times[rank] = min_crossing_time(
+                    pmesh.Un, ng, options["gamma"], pmesh.dx1, pmesh.dx2
+                )
+                barrier.wait()
+
+                dt = options["cfl"] * crossing_times.min()
+
+                if t + dt > t_end:
+                    dt = t_end - t
+
+                # Halo exchange
+                edges[rank, 0] = pmesh.Un[:, ng : 2 * ng]
+                edges[rank, 1] = pmesh.Un[:, -2 * ng : -ng]
+                barrier.wait()
+
+                if rank > 0:
+                    pmesh.Un[:, :ng] = edges[rank - 1, 1]
+                elif wrap_lower:
+                    pmesh.Un[:, :ng] = edges[num_ranks - 1, 1]
+
+                if rank < num_ranks - 1:
+                    pmesh.Un[:, -ng:] = edges[rank + 1, 0]
+                elif wrap_upper:
+                    pmesh.Un[:, -ng:] = edges[0, 0]
+
+                muscl_hancock_step(
+                    pin_rank,
+                    pmesh,
+                    ws,
+                    dt,
+                    options["gamma"],
+                    options["solver"],
+                    options["scheme"],
+                    options["limiter"],
+                    options["variables"],
+                    options["backend"],
+                    1,
+                    options["tile_size"],
+                )
+
+                steps += 1
+
+                if steps == max_steps or t + dt >= t_end:
+                    break
+
+                t += dt
+
+            Un[:, row_begin:row_end] = pmesh.Un[
+                :, row_begin - i_begin : row_end - i_begin
+            ]
+
+            conn.send((t, steps, dt))
+
+        except Exception as error:
+            # Release the ranks waiting on this one before reporting
+            barrier.abort()
+            conn.send(error)
+            break
+
+    # The blocks can only be closed once nothing maps them
+    del Un, edges, crossing_times
+    mesh.Un = None
+
+    for block in blocks:
+        block.close()
+
+
+class DomainDecomposition:
+    """Mesh split into slabs of rows, each stepped by its own process
+
+    Lays the ranks out like an MPI run along x1, but on one node with no
+    MPI install: every rank is a process holding a private slab of Un
+    with ng ghost rows on each side, which it exchanges with its
+    neighbours through shared memory. The physical boundaries are still
+    filled by `enforce_bcs` on each slab, and the timestep is reduced
+    across the ranks, so the decomposed run gives the single process
+    result bit for bit.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Input of the problem
+    pmesh : FIEFS_Array
+        Mesh with the initial conditions, gathered into after every
+        advance
+    cfl, gamma : float
+        CFL number and specific heat ratio
+    solver, scheme, limiter : int
+        Riemann solver, reconstruction and slope limiter ids
+    variables : str
+        Variables the reconstruction works on
+    backend : str
+        Kernel backend of the ranks
+    tile_size : int
+        Cells per side of the tiles the ranks step, 0 if untiled
+    num_ranks : int
+        Number of processes
+    accum_dtype : dtype
+        Type the ranks accumulate the fluxes in, the type of the mesh if
+        not given
+
+    """
+
+    def __init__(
+        self,
+        pin: FIEFS_Input,
+        pmesh: FIEFS_Array,
+        cfl: float,
+        gamma: float,
+        solver: int,
+        scheme: int,
+        limiter: int,
+        variables: str,
+        backend: str,
+        tile_size: int,
+        num_ranks: int,
+        accum_dtype: np.dtype = None,
+    ) -> None:
+        if pmesh.nx1 // num_ranks < pmesh.ng:
+            raise ValueError(
+                "Every rank needs at least as many rows of cells as ghost zones"
+            )
+
+        self.pmesh = pmesh
+
+        ng = pmesh.ng
+        edge_shape = (num_ranks, 2, pmesh.nvar, ng, pmesh.Un.shape[2])
+
+        self.blocks = [
+            shared_memory.SharedMemory(create=True, size=pmesh.Un.nbytes),
+            shared_memory.SharedMemory(
+                create=True, size=int(np.prod(edge_shape)) * pmesh.Un.itemsize
+            ),
+            shared_memory.SharedMemory(create=True, size=8 * num_ranks),
+        ]
+
+        self.Un = shared_array(self.blocks[0], pmesh.Un.shape, pmesh.Un.dtype)
+        self.Un[:] = pmesh.Un
+
+        options = {
+            "cfl": cfl,
+            "gamma": gamma,
+            "solver": solver,
+            "scheme": scheme,
+            "limiter": limiter,
+            "variables": variables,
+            "backend": backend,
+            "tile_size": tile_size,
+            "dtype": pmesh.Un.dtype,
+            "accum_dtype": accum_dtype,
+        }
+
+        # The ranks map Un from shared memory instead of being sent it
+        mesh = copy.copy(pmesh)
+        mesh.Un = None
+
+        # Spawned ranks do not inherit the threads of numba or of the pools
+        ctx = mp.get_context("spawn")
+
+        # Held here so it outlives the start of the ranks
+        self.barrier = ctx.Barrier(num_ranks)
+
+        self.pipes = []
+        self.ranks = []
+
+        for rank in range(num_ranks):
+            conn, rank_conn = ctx.Pipe()
+
+            process = ctx.Process(
+                target=rank_main,
+                args=(
+                    rank,
+                    num_ranks,
+                    pin,
+                    mesh,
+                    [block.name for block in self.blocks],
+                    options,
+                    self.barrier,
+                    rank_conn,
+                ),
+                daemon=True,
+            )
+            process.start()
+
+            self.pipes.append(conn)
+            self.ranks.append(process)
+
+    def advance(
+        self, t: float, t_end: float, max_steps: int
+    ) -> Tuple[float, int, float]:
+        """Steps the ranks and gathers their slabs into the mesh
+
+        Parameters
+        ----------
+        t : float
+            Current time
+        t_end : float
+            Time the steps may not go past
+        max_steps : int
+            Largest number of steps to take
+
+        Returns
+        -------
+        Tuple[float, int, float]
+            Time before the last step, number of steps taken and the last
+            timestep
+
+        """
+        for conn in self.pipes:
+            conn.send((t, t_end, max_steps))
+
+        results = [conn.recv() for conn in self.pipes]
+
+        for result in results:
+            if isinstance(result, Exception):
+                self.close()
+                raise result
+
+        np.copyto(self.pmesh.Un, self.Un)
+
+        return results[0]
+
+    def close(self) -> None:
+        """Stops the ranks and frees the shared memory"""
+        for conn, process in zip(self.pipes, self.ranks):
+            if process.is_alive():
+                conn.send(None)
+            process.join()
+
+        self.pipes = []
+        self.ranks = []
+        self.Un = None
+
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+        self.blocks = []
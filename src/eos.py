@@ -10,7 +10,7 @@ import numpy as np
 from numba import njit
 
 
-@njit()
+@njit(cache=True)
 def p_EOS(
     rho: Union[float, np.ndarray], e: Union[float, np.ndarray], gamma: float
 ) -> Union[float, np.ndarray]:
@@ -38,7 +38,7 @@ def p_EOS(
     return rho * (gamma - 1.0) * e
 
 
-@njit()
+@njit(cache=True)
 def e_EOS(
     rho: Union[float, np.ndarray], p: Union[float, np.ndarray], gamma: float
 ) -> Union[float, np.ndarray]:
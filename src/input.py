@@ -62,6 +62,15 @@ class FIEFS_Input:
                         or key == "output_variables"
                         or key == "output_frequency"
                         or key == "data_file_type"
+                        or key == "riemann_solver"
+                        or key == "riemann_stats"
+                        or key == "backend"
+                        or key == "limiter"
+                        or key == "reconstruction"
+                        or key == "reconstruction_variables"
+                        or key == "precision"
+                        or key == "timestep"
+                        or key == "integrator"
                     ):
                         self.value_dict[key] = str(val)
                     elif (
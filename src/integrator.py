@@ -0,0 +1,658 @@
+###################################################################
+#                                                                 #
+#       Time integration of the conserved variables on a mesh     #
+#                                                                 #
+###################################################################
+
+import os
+import sys
+
+import numpy as np
+
+current_script_path = os.path.abspath(__file__)
+parent_directory = os.path.dirname(os.path.dirname(current_script_path))
+sys.path.append(parent_directory)
+
+from src import numpy_backend
+from src.ctu import ctu_predictor_into, ctu_transverse_into
+from src.input import FIEFS_Input
+from src.mesh import FIEFS_Array, Workspace
+from src.reconstruct import (
+    MINMOD,
+    MUSCL,
+    get_characteristic_face_values_into,
+    get_face_values_into,
+)
+from src.riemann import (
+    HLLC,
+    riemann_update,
+    riemann_update_parallel,
+    solve_riemann_x,
+    solve_riemann_x_parallel,
+    solve_riemann_y,
+    solve_riemann_y_parallel,
+)
+from src.rk import get_ssp_weights, ssp_combine, ssp_combine_parallel
+from src.split import split_sweep, split_sweep_parallel
+from src.tiles import strip_edges_into, threaded_tiled_update, tiled_update
+from src.tools import (
+    get_conserved_variables_into,
+    get_primitive_variables_into,
+    muscl_hancock_predictor_into,
+    primitive_hancock_into,
+)
+
+
+def muscl_hancock_step(
+    pin: FIEFS_Input,
+    pmesh: FIEFS_Array,
+    ws: Workspace,
+    dt: float,
+    gamma: float,
+    solver: int = HLLC,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+    variables: str = "conserved",
+    backend: str = "numba",
+    num_threads: int = 1,
+    tile_size: int = 0,
+) -> None:
+    """Advances the conserved variables by one MUSCL-Hancock step
+
+    Every intermediate result is written into the buffers of the
+    workspace, so with the numba backend a step allocates no arrays. The
+    Riemann states of the step are left in the workspace, and with the
+    numba backend so are the fastest signal speeds of its Riemann solves.
+    With primitive or characteristic reconstruction variables the numba
+    backend leaves them as primitives in the W face arrays.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Contains the boundary conditions of the problem
+    pmesh : FIEFS_Array
+        Mesh whose conserved variables Un are updated in place
+    ws : Workspace
+        Scratch buffers sized for pmesh
+    dt : float
+        Timestep
+    gamma : float
+        Specific heat ratio
+    solver : int
+        Riemann solver id
+    scheme : int
+        Reconstruction id
+    limiter : int
+        Slope limiter id
+    variables : str
+        Variables the reconstruction works on, 'conserved', 'primitive'
+        or 'characteristic'. With the numba backend the predicted faces
+        of the last two stay primitive for the Riemann solve
+    backend : str
+        'numba' or 'numpy', the kernels used for the conserved
+        reconstruction and predictor, the Riemann solve and the
+        conservative update
+    num_threads : int
+        Threads of the numba kernels, the threaded Riemann solve is used
+        above one
+    tile_size : int
+        Cells per side of the tiles the numba backend steps one at a
+        time, 0 steps the whole mesh at once. Tiling needs conserved
+        reconstruction variables and a workspace built for it, and runs
+        on the thread pool of the workspace if it has one.
+
+    """
+    if backend == "numpy":
+        face_values = numpy_backend.get_face_values_into
+    else:
+        face_values = get_face_values_into
+
+    if num_threads > 1:
+        riemann = riemann_update_parallel
+    else:
+        riemann = riemann_update
+
+    ng = pmesh.ng
+
+    # Enforce BCs
+
+    pmesh.enforce_bcs(pin)
+
+    if backend != "numpy":
+        # Raised by the Riemann solves of this step
+        ws.wave_speeds.fill(0.0)
+
+    if tile_size > 0 and backend != "numpy":
+        if variables != "conserved":
+            raise ValueError(
+                "The tiled step only implements conserved reconstruction variables"
+            )
+
+        if ws.pool is not None:
+            # Strips of tiles on the threads of the workspace, which only
+            # wait for the rows between the strips to be saved
+            threaded_tiled_update(
+                ws.pool,
+                pmesh.Un,
+                ng,
+                gamma,
+                dt / pmesh.dx1,
+                dt / pmesh.dx2,
+                tile_size,
+                ws.tile_cells,
+                ws.tile_rows,
+                ws.tile_cols,
+                ws.tile_faces,
+                ws.flux_rows,
+                ws.wave_speeds,
+                scheme,
+                limiter,
+                solver,
+            )
+
+            return
+
+        # The ghost rows below and above the mesh, where the tiles start
+        # and end
+        strip_edges_into(pmesh.Un, ng, 0, pmesh.nx1, ws.tile_rows[0])
+
+        tiled_update(
+            pmesh.Un,
+            ng,
+            gamma,
+            dt / pmesh.dx1,
+            dt / pmesh.dx2,
+            tile_size,
+            tile_size,
+            ws.tile_cells[0],
+            ws.tile_rows[0],
+            ws.tile_cols[0],
+            ws.U_i_L,
+            ws.U_i_R,
+            ws.U_j_L,
+            ws.U_j_R,
+            ws.flux_rows,
+            ws.wave_speeds,
+            scheme,
+            limiter,
+            solver,
+        )
+
+        return
+
+    # Data Reconstruction
+
+    if variables == "conserved" and backend != "numpy":
+        # Boundary extrapolated values, evolved by half a timestep in the
+        # same pass
+        muscl_hancock_predictor_into(
+            pmesh.Un,
+            ng,
+            1.0,
+            gamma,
+            1 / 2 * dt / pmesh.dx1,
+            1 / 2 * dt / pmesh.dx2,
+            ws.U_i_L,
+            ws.U_i_R,
+            ws.U_j_L,
+            ws.U_j_R,
+            scheme,
+            limiter,
+        )
+
+    elif variables == "conserved":
+        # Boundary extrapolated values from the reconstruction
+        face_values(
+            pmesh.Un,
+            ng,
+            1.0,
+            ws.U_i_L,
+            ws.U_i_R,
+            ws.U_j_L,
+            ws.U_j_R,
+            scheme,
+            limiter,
+        )
+
+        # Evolution step
+
+        # Advance by half timestep, int_flux = 1/2 dt/dx1 (F_i_L - F_i_R)
+        # + 1/2 dt/dx2 (G_j_L - G_j_R) built in the workspace
+        numpy_backend.get_fluxes_2d_x_into(ws.U_i_L, gamma, ws.flux_L)
+        numpy_backend.get_fluxes_2d_x_into(ws.U_i_R, gamma, ws.flux_R)
+        np.subtract(ws.flux_L, ws.flux_R, out=ws.int_flux)
+        ws.int_flux *= 1 / 2 * dt / pmesh.dx1
+
+        numpy_backend.get_fluxes_2d_y_into(ws.U_j_L, gamma, ws.flux_L)
+        numpy_backend.get_fluxes_2d_y_into(ws.U_j_R, gamma, ws.flux_R)
+        np.subtract(ws.flux_L, ws.flux_R, out=ws.flux_R)
+        ws.flux_R *= 1 / 2 * dt / pmesh.dx2
+        ws.int_flux += ws.flux_R
+
+        ws.U_i_L += ws.int_flux
+        ws.U_i_R += ws.int_flux
+        ws.U_j_L += ws.int_flux
+        ws.U_j_R += ws.int_flux
+
+    else:
+        # Cell primitives for the reconstruction, the predictor and the
+        # Riemann solve
+        get_primitive_variables_into(pmesh.Un, gamma, ws.W)
+
+        if variables == "primitive":
+            face_values(
+                ws.W,
+                ng,
+                1.0,
+                ws.W_i_L,
+                ws.W_i_R,
+                ws.W_j_L,
+                ws.W_j_R,
+                scheme,
+                limiter,
+            )
+        else:
+            get_characteristic_face_values_into(
+                ws.W,
+                ng,
+                gamma,
+                1.0,
+                ws.W_i_L,
+                ws.W_i_R,
+                ws.W_j_L,
+                ws.W_j_R,
+                scheme,
+                limiter,
+            )
+
+        # Advance by half timestep, fluxes straight from the primitives
+        primitive_hancock_into(
+            ws.W,
+            ng,
+            gamma,
+            dt / pmesh.dx1,
+            dt / pmesh.dx2,
+            ws.W_i_L,
+            ws.W_i_R,
+            ws.W_j_L,
+            ws.W_j_R,
+        )
+
+        if backend == "numpy":
+            # The NumPy solvers take conserved states
+            get_conserved_variables_into(ws.W_i_L, gamma, ws.U_i_L)
+            get_conserved_variables_into(ws.W_i_R, gamma, ws.U_i_R)
+            get_conserved_variables_into(ws.W_j_L, gamma, ws.U_j_L)
+            get_conserved_variables_into(ws.W_j_R, gamma, ws.U_j_R)
+
+    # Riemann Problem and conservative update
+    if backend == "numpy":
+        numpy_backend.solve_riemann_x(ws.U_l_i, ws.U_r_i, gamma, ws.F, solver)
+        numpy_backend.solve_riemann_y(ws.U_l_j, ws.U_r_j, gamma, ws.G, solver)
+
+        numpy_backend.conservative_update(
+            pmesh.Un, ws.F, ws.G, ng, dt / pmesh.dx1, dt / pmesh.dx2
+        )
+
+    elif variables == "conserved":
+        # Each interface flux goes straight into its two cells
+        riemann(
+            ws.U_i_L,
+            ws.U_i_R,
+            ws.U_j_L,
+            ws.U_j_R,
+            gamma,
+            dt / pmesh.dx1,
+            dt / pmesh.dx2,
+            pmesh.Un,
+            ng,
+            ws.flux_rows,
+            ws.wave_speeds,
+            solver,
+            False,
+        )
+
+    else:
+        riemann(
+            ws.W_i_L,
+            ws.W_i_R,
+            ws.W_j_L,
+            ws.W_j_R,
+            gamma,
+            dt / pmesh.dx1,
+            dt / pmesh.dx2,
+            pmesh.Un,
+            ng,
+            ws.flux_rows,
+            ws.wave_speeds,
+            solver,
+            True,
+        )
+
+
+def split_step(
+    pin: FIEFS_Input,
+    pmesh: FIEFS_Array,
+    ws: Workspace,
+    dt: float,
+    gamma: float,
+    solver: int = HLLC,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+    num_threads: int = 1,
+    x1_first: bool = True,
+) -> None:
+    """Advances the conserved variables by one dimensionally split step
+
+    A full-timestep MUSCL-Hancock sweep along one direction is followed by
+    one along the other, with the boundaries filled before each. Taking
+    the sweeps in the opposite order every other step (x1-x2, x2-x1) is
+    Strang splitting, second order in time over each pair of steps. The
+    sweeps run on pencils copied into contiguous buffers, with the same
+    Riemann solve in both directions. The split step only implements
+    conserved reconstruction variables and always runs the numba kernels.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Contains the boundary conditions of the problem
+    pmesh : FIEFS_Array
+        Mesh whose conserved variables Un are updated in place
+    ws : Workspace
+        Scratch buffers sized for pmesh, built for the split integrator
+    dt : float
+        Timestep
+    gamma : float
+        Specific heat ratio
+    solver : int
+        Riemann solver id
+    scheme : int
+        Reconstruction id
+    limiter : int
+        Slope limiter id
+    num_threads : int
+        Threads of the sweeps, the threaded sweep is used above one
+    x1_first : bool
+        True to sweep along x1 and then x2, False for the reverse order
+
+    """
+    if num_threads > 1:
+        sweep = split_sweep_parallel
+    else:
+        sweep = split_sweep
+
+    if x1_first:
+        directions = [(False, dt / pmesh.dx1), (True, dt / pmesh.dx2)]
+    else:
+        directions = [(True, dt / pmesh.dx2), (False, dt / pmesh.dx1)]
+
+    for ydir, dtdx in directions:
+        pmesh.enforce_bcs(pin)
+
+        sweep(
+            pmesh.Un,
+            pmesh.ng,
+            gamma,
+            dtdx,
+            ydir,
+            ws.pencils,
+            ws.pencil_faces,
+            ws.pencil_fluxes,
+            scheme,
+            limiter,
+            solver,
+        )
+
+
+def ctu_step(
+    pin: FIEFS_Input,
+    pmesh: FIEFS_Array,
+    ws: Workspace,
+    dt: float,
+    gamma: float,
+    solver: int = HLLC,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+    num_threads: int = 1,
+) -> None:
+    """Advances the conserved variables by one corner transport upwind step
+
+    Colella's CTU scheme: the faces are reconstructed and evolved by half
+    a timestep with the fluxes of their own direction only, the Riemann
+    problems at every interface are solved with those states, and half a
+    timestep of the transverse Riemann flux differences is added to the
+    faces. The second solve is fused with the conservative update. The
+    corner coupling keeps the step stable up to a CFL number near one,
+    against about one half for `muscl_hancock_step`, at the cost of a
+    second Riemann solve per interface. The CTU step only implements
+    conserved reconstruction variables and always runs the numba kernels.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Contains the boundary conditions of the problem
+    pmesh : FIEFS_Array
+        Mesh whose conserved variables Un are updated in place
+    ws : Workspace
+        Scratch buffers sized for pmesh, built for the CTU integrator
+    dt : float
+        Timestep
+    gamma : float
+        Specific heat ratio
+    solver : int
+        Riemann solver id
+    scheme : int
+        Reconstruction id
+    limiter : int
+        Slope limiter id
+    num_threads : int
+        Threads of the Riemann solves, the threaded kernels are used
+        above one
+
+    """
+    if num_threads > 1:
+        riemann_x = solve_riemann_x_parallel
+        riemann_y = solve_riemann_y_parallel
+        riemann = riemann_update_parallel
+    else:
+        riemann_x = solve_riemann_x
+        riemann_y = solve_riemann_y
+        riemann = riemann_update
+
+    ng = pmesh.ng
+
+    pmesh.enforce_bcs(pin)
+    ws.wave_speeds.fill(0.0)
+
+    # Normal predictor
+    ctu_predictor_into(
+        pmesh.Un,
+        ng,
+        1.0,
+        gamma,
+        1 / 2 * dt / pmesh.dx1,
+        1 / 2 * dt / pmesh.dx2,
+        ws.U_i_L,
+        ws.U_i_R,
+        ws.U_j_L,
+        ws.U_j_R,
+        scheme,
+        limiter,
+    )
+
+    # Transverse corrections from the first Riemann solve
+    riemann_x(ws.U_l_i, ws.U_r_i, gamma, ws.F, solver)
+    riemann_y(ws.U_l_j, ws.U_r_j, gamma, ws.G, solver)
+
+    ctu_transverse_into(
+        ws.F,
+        ws.G,
+        1 / 2 * dt / pmesh.dx1,
+        1 / 2 * dt / pmesh.dx2,
+        ws.U_i_L,
+        ws.U_i_R,
+        ws.U_j_L,
+        ws.U_j_R,
+    )
+
+    # Second Riemann solve and conservative update
+    riemann(
+        ws.U_i_L,
+        ws.U_i_R,
+        ws.U_j_L,
+        ws.U_j_R,
+        gamma,
+        dt / pmesh.dx1,
+        dt / pmesh.dx2,
+        pmesh.Un,
+        ng,
+        ws.flux_rows,
+        ws.wave_speeds,
+        solver,
+        False,
+    )
+
+
+def ssp_stage(
+    pin: FIEFS_Input,
+    pmesh: FIEFS_Array,
+    ws: Workspace,
+    dt: float,
+    gamma: float,
+    a: float,
+    solver: int = HLLC,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+    num_threads: int = 1,
+) -> None:
+    """One stage of an SSP Runge-Kutta step, U = a U0 + (1 - a) (U + dt L(U))
+
+    L is the method of lines spatial operator: the faces are
+    reconstructed with no predictor, and the Riemann solve is fused with
+    the update of the cells. U0 is the start of step state in
+    `ws.Un_old`, not read when a is zero.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Contains the boundary conditions of the problem
+    pmesh : FIEFS_Array
+        Mesh whose conserved variables Un are the stage state, updated in
+        place
+    ws : Workspace
+        Scratch buffers sized for pmesh, built for an SSP integrator
+    dt : float
+        Timestep
+    gamma : float
+        Specific heat ratio
+    a : float
+        Weight of the start of step state
+    solver : int
+        Riemann solver id
+    scheme : int
+        Reconstruction id
+    limiter : int
+        Slope limiter id
+    num_threads : int
+        Threads of the Riemann solve and the combination, the threaded
+        kernels are used above one
+
+    """
+    if num_threads > 1:
+        riemann = riemann_update_parallel
+        combine = ssp_combine_parallel
+    else:
+        riemann = riemann_update
+        combine = ssp_combine
+
+    ng = pmesh.ng
+
+    pmesh.enforce_bcs(pin)
+
+    get_face_values_into(
+        pmesh.Un,
+        ng,
+        1.0,
+        ws.U_i_L,
+        ws.U_i_R,
+        ws.U_j_L,
+        ws.U_j_R,
+        scheme,
+        limiter,
+    )
+
+    riemann(
+        ws.U_i_L,
+        ws.U_i_R,
+        ws.U_j_L,
+        ws.U_j_R,
+        gamma,
+        dt / pmesh.dx1,
+        dt / pmesh.dx2,
+        pmesh.Un,
+        ng,
+        ws.flux_rows,
+        ws.wave_speeds,
+        solver,
+        False,
+    )
+
+    if a > 0.0:
+        combine(pmesh.Un, ws.Un_old, ng, a)
+
+
+def ssp_rk_step(
+    pin: FIEFS_Input,
+    pmesh: FIEFS_Array,
+    ws: Workspace,
+    dt: float,
+    gamma: float,
+    solver: int = HLLC,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+    num_threads: int = 1,
+    integrator: str = "rk2",
+) -> None:
+    """Advances the conserved variables by one SSP Runge-Kutta step
+
+    The second and third order strong stability preserving schemes of Shu
+    and Osher, in the form where every stage is a forward Euler step of
+    the last stage combined with the start of step state. The stages run
+    in place on the mesh and only the start of step state is kept, in the
+    workspace, so a step allocates no arrays whatever its number of
+    stages. The SSP step only implements conserved reconstruction
+    variables and always runs the numba kernels.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Contains the boundary conditions of the problem
+    pmesh : FIEFS_Array
+        Mesh whose conserved variables Un are updated in place
+    ws : Workspace
+        Scratch buffers sized for pmesh, built for an SSP integrator
+    dt : float
+        Timestep
+    gamma : float
+        Specific heat ratio
+    solver : int
+        Riemann solver id
+    scheme : int
+        Reconstruction id
+    limiter : int
+        Slope limiter id
+    num_threads : int
+        Threads of the stages, the threaded kernels are used above one
+    integrator : str
+        'rk2' or 'rk3'
+
+    """
+    weights = get_ssp_weights(integrator)
+
+    np.copyto(ws.Un_old, pmesh.Un)
+
+    # Raised by the Riemann solves of every stage
+    ws.wave_speeds.fill(0.0)
+
+    for a in weights:
+        ssp_stage(pin, pmesh, ws, dt, gamma, a, solver, scheme, limiter, num_threads)
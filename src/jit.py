@@ -0,0 +1,332 @@
+###################################################################
+#                                                                 #
+#      Explicit kernel signatures and the JIT cache warm-up       #
+#                                                                 #
+###################################################################
+
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numba
+import numpy as np
+from numba import types
+
+current_script_path = os.path.abspath(__file__)
+parent_directory = os.path.dirname(os.path.dirname(current_script_path))
+sys.path.append(parent_directory)
+
+from src.ctu import ctu_predictor_into, ctu_transverse_into
+from src.eos import e_EOS, p_EOS
+from src.mesh import get_precision
+from src.reconstruct import (
+    get_characteristic_face_values_into,
+    get_face_values_into,
+    get_limited_slopes_into,
+)
+from src.riemann import (
+    count_smooth_interfaces,
+    riemann_branch_counts,
+    riemann_update,
+    riemann_update_parallel,
+    solve_riemann,
+    solve_riemann_into,
+    solve_riemann_into_parallel,
+    solve_riemann_x,
+    solve_riemann_x_parallel,
+    solve_riemann_y,
+    solve_riemann_y_parallel,
+)
+from src.rk import ssp_combine, ssp_combine_parallel
+from src.split import split_sweep, split_sweep_parallel
+from src.tiles import tiled_update
+from src.tools import (
+    conservative_update,
+    get_conserved_variables_into,
+    get_fluxes_1d,
+    get_fluxes_1d_x,
+    get_fluxes_1d_y,
+    get_fluxes_2d,
+    get_fluxes_2d_x,
+    get_fluxes_2d_x_into,
+    get_fluxes_2d_y,
+    get_fluxes_2d_y_into,
+    get_primitive_variables_1d,
+    get_primitive_variables_2d,
+    get_primitive_variables_into,
+    min_crossing_time,
+    min_crossing_time_parallel,
+    muscl_hancock_predictor_into,
+    primitive_hancock_into,
+)
+
+# Precisions the kernels are warmed up for
+WARMUP_PRECISIONS = ["single", "double", "mixed"]
+
+# Kernels of the numba step on conserved variables, which carry most of its
+# compile time
+STEP_KERNELS = ["min_crossing_time", "muscl_hancock_predictor_into", "riemann_update"]
+
+
+def kernel_signatures(
+    dtype: np.dtype,
+    accum_dtype: np.dtype = None,
+) -> List[Tuple[str, numba.core.registry.CPUDispatcher, tuple]]:
+    """Returns the signatures FIEFS calls each kernel with for a mesh type
+
+    The threaded builds run with num_threads > 1 are listed after their
+    serial kernels, so the warm-up caches them too.
+    The layouts follow the arrays of a step: the mesh and the workspace
+    buffers are C-contiguous, while the left and right interface states
+    are strided slices.
+    Python floats and ints arrive as float64 and int64.
+
+    Parameters
+    ----------
+    dtype : dtype
+        Type of the conserved variables
+    accum_dtype : dtype
+        Type of the flux buffers of the update, dtype if not given
+
+    Returns
+    -------
+    List[Tuple[str, CPUDispatcher, tuple]]
+        Kernel name, dispatcher and argument types
+
+    """
+    f = numba.from_dtype(np.dtype(dtype))
+    f64 = types.float64
+    i64 = types.int64
+    string = types.unicode_type
+
+    C1 = types.Array(f, 1, "C")
+    C2 = types.Array(f, 2, "C")
+    C3 = types.Array(f, 3, "C")
+    A3 = types.Array(f, 3, "A")
+
+    if accum_dtype is None:
+        accum_dtype = dtype
+
+    C4 = types.Array(f, 4, "C")
+    R3 = types.Array(numba.from_dtype(np.dtype(accum_dtype)), 3, "C")
+    R4 = types.Array(numba.from_dtype(np.dtype(accum_dtype)), 4, "C")
+
+    # Signal speeds of the Riemann solves are kept in double precision
+    S2 = types.Array(f64, 2, "C")
+
+    return [
+        ("p_EOS", p_EOS, (C2, C2, f64)),
+        ("e_EOS", e_EOS, (C2, C2, f64)),
+        ("get_primitive_variables_1d", get_primitive_variables_1d, (C1, f64)),
+        ("get_primitive_variables_2d", get_primitive_variables_2d, (C3, f64)),
+        (
+            "get_limited_slopes_into",
+            get_limited_slopes_into,
+            (C3, f64, C3, C3, i64),
+        ),
+        (
+            "get_face_values_into",
+            get_face_values_into,
+            (C3, i64, f64, C3, C3, C3, C3, i64, i64),
+        ),
+        (
+            "get_characteristic_face_values_into",
+            get_characteristic_face_values_into,
+            (C3, i64, f64, f64, C3, C3, C3, C3, i64, i64),
+        ),
+        (
+            "get_primitive_variables_into",
+            get_primitive_variables_into,
+            (C3, f64, C3),
+        ),
+        (
+            "muscl_hancock_predictor_into",
+            muscl_hancock_predictor_into,
+            (C3, i64, f64, f64, f64, f64, C3, C3, C3, C3, i64, i64),
+        ),
+        (
+            "ctu_predictor_into",
+            ctu_predictor_into,
+            (C3, i64, f64, f64, f64, f64, C3, C3, C3, C3, i64, i64),
+        ),
+        (
+            "ctu_transverse_into",
+            ctu_transverse_into,
+            (C3, C3, f64, f64, C3, C3, C3, C3),
+        ),
+        (
+            "primitive_hancock_into",
+            primitive_hancock_into,
+            (C3, i64, f64, f64, f64, C3, C3, C3, C3),
+        ),
+        (
+            "get_conserved_variables_into",
+            get_conserved_variables_into,
+            (C3, f64, C3),
+        ),
+        ("get_fluxes_1d_x", get_fluxes_1d_x, (C1, f64)),
+        ("get_fluxes_1d_y", get_fluxes_1d_y, (C1, f64)),
+        ("get_fluxes_1d", get_fluxes_1d, (C1, f64, string)),
+        ("get_fluxes_2d_x", get_fluxes_2d_x, (C3, f64)),
+        ("get_fluxes_2d_y", get_fluxes_2d_y, (C3, f64)),
+        ("get_fluxes_2d", get_fluxes_2d, (C3, f64, string)),
+        ("get_fluxes_2d_x_into", get_fluxes_2d_x_into, (C3, f64, C3)),
+        ("get_fluxes_2d_y_into", get_fluxes_2d_y_into, (C3, f64, C3)),
+        ("min_crossing_time", min_crossing_time, (C3, i64, f64, f64, f64, i64, i64)),
+        (
+            "min_crossing_time_parallel",
+            min_crossing_time_parallel,
+            (C3, i64, f64, f64, f64, i64, i64),
+        ),
+        ("conservative_update", conservative_update, (C3, C3, C3, i64, f64, f64)),
+        ("solve_riemann_x", solve_riemann_x, (A3, A3, f64, C3, i64)),
+        ("solve_riemann_y", solve_riemann_y, (A3, A3, f64, C3, i64)),
+        ("solve_riemann_x_parallel", solve_riemann_x_parallel, (A3, A3, f64, C3, i64)),
+        ("solve_riemann_y_parallel", solve_riemann_y_parallel, (A3, A3, f64, C3, i64)),
+        (
+            "riemann_update",
+            riemann_update,
+            (C3, C3, C3, C3, f64, f64, f64, C3, i64, R4, S2, i64, types.boolean),
+        ),
+        (
+            "riemann_update_parallel",
+            riemann_update_parallel,
+            (C3, C3, C3, C3, f64, f64, f64, C3, i64, R4, S2, i64, types.boolean),
+        ),
+        (
+            "tiled_update",
+            tiled_update,
+            (
+                C3,
+                i64,
+                f64,
+                f64,
+                f64,
+                i64,
+                i64,
+                C3,
+                C4,
+                C3,
+                C3,
+                C3,
+                C3,
+                C3,
+                R4,
+                S2,
+                i64,
+                i64,
+                i64,
+                i64,
+                i64,
+            ),
+        ),
+        ("ssp_combine", ssp_combine, (C3, C3, i64, f64)),
+        ("ssp_combine_parallel", ssp_combine_parallel, (C3, C3, i64, f64)),
+        (
+            "split_sweep",
+            split_sweep,
+            (C3, i64, f64, f64, types.boolean, C4, C4, R3, i64, i64, i64),
+        ),
+        (
+            "split_sweep_parallel",
+            split_sweep_parallel,
+            (C3, i64, f64, f64, types.boolean, C4, C4, R3, i64, i64, i64),
+        ),
+        ("solve_riemann_into", solve_riemann_into, (A3, A3, f64, string, C3)),
+        (
+            "solve_riemann_into_parallel",
+            solve_riemann_into_parallel,
+            (A3, A3, f64, string, C3),
+        ),
+        ("solve_riemann", solve_riemann, (A3, A3, f64, string)),
+        ("count_smooth_interfaces", count_smooth_interfaces, (A3, A3, f64, string)),
+        ("riemann_branch_counts", riemann_branch_counts, (A3, A3, f64, string, i64)),
+    ]
+
+
+def kernels_cached(
+    names: List[str], dtype: np.dtype, accum_dtype: np.dtype = None
+) -> bool:
+    """Checks whether kernels are ready to run without compiling
+
+    A kernel is ready when it is compiled in this process or when numba's
+    on-disk cache holds a build for its signature. numba empties the cache
+    index of a kernel whose source file changed, so a stale cache does not
+    count.
+
+    Parameters
+    ----------
+    names : List[str]
+        Names of the kernels, see `kernel_signatures`
+    dtype : dtype
+        Type of the conserved variables
+    accum_dtype : dtype
+        Type of the flux buffers of the update, dtype if not given
+
+    Returns
+    -------
+    bool
+        True if none of the kernels would be compiled on its first call
+
+    """
+    for name, kernel, signature in kernel_signatures(dtype, accum_dtype):
+        if name not in names or signature in kernel.signatures:
+            continue
+
+        index = kernel._cache._cache_file._load_index()
+
+        if not any(key[0] == signature for key in index):
+            return False
+
+    return True
+
+
+def warmup(
+    precisions: List[str] = WARMUP_PRECISIONS,
+) -> Dict[Tuple[str, str], Tuple[float, bool]]:
+    """Compiles every kernel ahead of time and fills the on-disk cache
+
+    Kernels already in the cache are loaded instead of compiled, so a
+    second warm-up only pays the loading time.
+
+    Parameters
+    ----------
+    precisions : List[str]
+        Precisions of the run to compile for, see `mesh.PRECISIONS`
+
+    Returns
+    -------
+    Dict[Tuple[str, str], Tuple[float, bool]]
+        Wall time in seconds and whether it came from the cache, keyed by
+        kernel name and precision
+
+    """
+    timings = {}
+
+    for precision in precisions:
+        dtype, accum_dtype = get_precision(precision)
+
+        for name, kernel, signature in kernel_signatures(dtype, accum_dtype):
+            hits = sum(kernel.stats.cache_hits.values())
+
+            start = time.perf_counter()
+            kernel.compile(signature)
+            elapsed = time.perf_counter() - start
+
+            cached = sum(kernel.stats.cache_hits.values()) > hits
+            timings[(name, precision)] = (elapsed, cached)
+
+    return timings
+
+
+def print_warmup(timings: Dict[Tuple[str, str], Tuple[float, bool]]):
+    """Prints the per-kernel warm-up times returned by `warmup`"""
+    print("Kernel                        |   Precision   |   Time (s)   |   Source")
+
+    for (name, precision), (elapsed, cached) in timings.items():
+        source = "cache" if cached else "compiled"
+        print(f"{name:<30}|   {precision:<11} |   {elapsed:<10.3f} |   {source}")
+
+    total = sum(elapsed for elapsed, _ in timings.values())
+    print(f"Total: {total:.3f} s")
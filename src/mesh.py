@@ -6,6 +6,8 @@
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
 
 import numpy as np
 
@@ -14,6 +16,41 @@ parent_directory = os.path.dirname(os.path.dirname(current_script_path))
 sys.path.append(parent_directory)
 
 from src.input import FIEFS_Input
+from src.reconstruct import RECONSTRUCTION_GHOST_ZONES, get_reconstruction
+
+# Storage type of the mesh and of the face values, and type the fluxes
+# are accumulated into the conserved variables in, of each precision
+PRECISIONS = {
+    "double": (np.float64, np.float64),
+    "single": (np.float32, np.float32),
+    "mixed": (np.float32, np.float64),
+}
+
+
+# Pencils of cells the split integrator copies out of the mesh together,
+# one cache line of doubles wide
+PENCIL_BLOCK = 8
+
+
+def get_precision(name: str) -> Tuple[np.dtype, np.dtype]:
+    """Looks up a precision in the registry
+
+    Parameters
+    ----------
+    name : str
+        Name of the precision: 'double', 'single' or 'mixed'
+
+    Returns
+    -------
+    Tuple[dtype, dtype]
+        Storage type and accumulation type
+
+    """
+    if name.lower() in PRECISIONS:
+        return PRECISIONS[name.lower()]
+
+    else:
+        raise ValueError("Please use an implemented precision")
 
 
 class FIEFS_Array:
@@ -41,7 +78,8 @@ class FIEFS_Array:
         Number of cells in the x2 direction
 
     ng : int
-        Number of ghost cells
+        Number of ghost cells, raised to what the `reconstruction` scheme
+        of the input file needs
 
     x1min, x2min : float
         Min x1 and x2 values
@@ -55,13 +93,22 @@ class FIEFS_Array:
     Un : ndarray[dtype]
         Conserved variables
 
+    ghost_buffers : list[ndarray[dtype]]
+        Scratch layers of the boundary fill along x1 and x2, allocated by
+        the first fill
+
     """
 
     def __init__(self, pin: FIEFS_Input, dtype: np.dtype) -> None:
         self.nvar = pin.value_dict["nvar"]
         self.nx1 = pin.value_dict["nx1"]
         self.nx2 = pin.value_dict["nx2"]
-        self.ng = pin.value_dict["ng"]
+        self.ng = max(
+            pin.value_dict["ng"],
+            RECONSTRUCTION_GHOST_ZONES[
+                get_reconstruction(pin.value_dict.get("reconstruction", "muscl"))
+            ],
+        )
 
         self.x1min = pin.value_dict["x1min"]
         self.x1max = pin.value_dict["x1max"]
@@ -75,6 +122,45 @@ class FIEFS_Array:
             (self.nvar, self.nx1 + 2 * self.ng, self.nx2 + 2 * self.ng), dtype=dtype
         )
 
+        self.ghost_buffers = [None, None]
+
+    def copy_ghosts(self, axis: int, dst: int, src: int) -> None:
+        """Copies the ng layers of cells of Un from src to dst along an axis
+
+        Numpy cannot tell that two slabs of Un do not overlap, so a plain
+        assignment between them copies the source into a temporary array
+        first. The layers go through a scratch buffer instead, allocated
+        on the first fill and again only if Un changes shape, so the
+        boundary fill allocates nothing.
+
+        Parameters
+        ----------
+        axis : int
+            1 for layers of x1, 2 for layers of x2
+        dst, src : int
+            First layer of the destination and of the source
+
+        """
+        ng = self.ng
+
+        if axis == 1:
+            shape = (self.Un.shape[0], ng, self.Un.shape[2])
+            dst_view = self.Un[:, dst : dst + ng, :]
+            src_view = self.Un[:, src : src + ng, :]
+        else:
+            shape = (self.Un.shape[0], self.Un.shape[1], ng)
+            dst_view = self.Un[:, :, dst : dst + ng]
+            src_view = self.Un[:, :, src : src + ng]
+
+        buffer = self.ghost_buffers[axis - 1]
+
+        if buffer is None or buffer.shape != shape or buffer.dtype != self.Un.dtype:
+            buffer = np.empty(shape, dtype=self.Un.dtype)
+            self.ghost_buffers[axis - 1] = buffer
+
+        np.copyto(buffer, src_view)
+        np.copyto(dst_view, buffer)
+
     def enforce_bcs(self, pin: FIEFS_Input) -> None:
         """Implements the desired boundary conditions
 
@@ -86,13 +172,16 @@ class FIEFS_Array:
             object
 
         """
+        ng = self.ng
+        n1 = self.Un.shape[1]
+        n2 = self.Un.shape[2]
 
         # Left boundary
         if pin.value_dict["left_bc"] == "transmissive":
-            self.Un[:, : self.ng, :] = self.Un[:, self.ng : 2 * self.ng, :]
+            self.copy_ghosts(1, 0, ng)
 
         elif pin.value_dict["left_bc"] == "periodic":
-            self.Un[:, : self.ng, :] = self.Un[:, -2 * self.ng : -self.ng, :]
+            self.copy_ghosts(1, 0, n1 - 2 * ng)
 
         elif pin.value_dict["left_bc"] == "wall":
             pass
@@ -102,10 +191,10 @@ class FIEFS_Array:
 
         # Right boundary
         if pin.value_dict["right_bc"] == "transmissive":
-            self.Un[:, -self.ng :, :] = self.Un[:, -2 * self.ng : -self.ng, :]
+            self.copy_ghosts(1, n1 - ng, n1 - 2 * ng)
 
         elif pin.value_dict["right_bc"] == "periodic":
-            self.Un[:, -self.ng :, :] = self.Un[:, self.ng : 2 * self.ng, :]
+            self.copy_ghosts(1, n1 - ng, ng)
 
         elif pin.value_dict["right_bc"] == "wall":
             pass
@@ -115,10 +204,10 @@ class FIEFS_Array:
 
         # Top boundary
         if pin.value_dict["top_bc"] == "transmissive":
-            self.Un[:, :, : self.ng] = self.Un[:, :, self.ng : 2 * self.ng]
+            self.copy_ghosts(2, n2 - ng, n2 - 2 * ng)
 
         elif pin.value_dict["top_bc"] == "periodic":
-            self.Un[:, : self.ng] = self.Un[:, -2 * self.ng : -self.ng, :]
+            self.copy_ghosts(2, n2 - ng, ng)
 
         elif pin.value_dict["top_bc"] == "wall":
             pass
@@ -128,10 +217,10 @@ class FIEFS_Array:
 
         # Bottom boundary
         if pin.value_dict["bottom_bc"] == "transmissive":
-            self.Un[:, :, : self.ng] = self.Un[:, :, self.ng : 2 * self.ng]
+            self.copy_ghosts(2, 0, ng)
 
         elif pin.value_dict["bottom_bc"] == "periodic":
-            self.Un[:, :, : self.ng] = self.Un[:, :, -2 * self.ng : -self.ng]
+            self.copy_ghosts(2, 0, n2 - 2 * ng)
 
         elif pin.value_dict["bottom_bc"] == "wall":
             pass
@@ -143,6 +232,232 @@ class FIEFS_Array:
         print(self.arr[indvar, indx1, indx2])
 
 
+class Workspace:
+    """Scratch buffers for one MUSCL-Hancock step on a mesh
+
+    Every array the step writes into is allocated here once, so stepping
+    the mesh does not allocate. Face arrays cover the interior cells and
+    one ghost layer on each side. Only the buffers used by the backend and
+    reconstruction variables of the run are allocated, the others are
+    None.
+
+    Parameters
+    ----------
+    pmesh : FIEFS_Array
+        Mesh the buffers are sized for
+
+    dtype : dtype
+        Type of the buffers, the type of the conserved variables if not
+        given
+
+    backend : str
+        'numba' or 'numpy', the kernel backend of the step
+
+    variables : str
+        Variables the reconstruction works on, 'conserved', 'primitive'
+        or 'characteristic'
+
+    num_threads : int
+        Number of threads the step runs on, the tiled step gets a pool of
+        that many threads
+
+    tile_size : int
+        Cells per side of the tiles of the tiled step, 0 for the untiled
+        step. The face arrays then hold a single tile.
+
+    accum_dtype : dtype
+        Type of the buffers the Riemann fluxes are held in until they are
+        added to the conserved variables, the type of the buffers if not
+        given
+
+    integrator : str
+        Time integrator the step runs, 'unsplit', 'split', 'ctu', 'rk2'
+        or 'rk3'
+
+    Attributes
+    ----------
+    U_i_L, U_i_R, U_j_L, U_j_R : ndarray[dtype]
+        Conserved values on the left, right, bottom and top faces, of the
+        whole mesh or of one tile
+
+    U_l_i, U_r_i, U_l_j, U_r_j : ndarray[dtype]
+        Left and right Riemann states in x and y, views of the face arrays
+
+    W : ndarray[dtype]
+        Primitive variables of every cell, ghosts included, when
+        reconstructing in primitive or characteristic variables
+
+    W_i_L, W_i_R, W_j_L, W_j_R : ndarray[dtype]
+        Primitive values on the left, right, bottom and top faces, when
+        reconstructing in primitive or characteristic variables, evolved
+        by half a timestep in place
+
+    flux_rows : ndarray[accum_dtype]
+        Two rows of x fluxes per thread, for the Riemann solve fused with
+        the update of the numba backend
+
+    wave_speeds : ndarray[float64]
+        Fastest x and y signal speeds of the last Riemann solve, one row
+        per thread, numba backend
+
+    pencils : ndarray[dtype]
+        Blocks of pencils of cells copied out of the mesh, one per thread,
+        for the split integrator
+
+    pencil_faces : ndarray[dtype]
+        Face values of one pencil per thread, split integrator
+
+    pencil_fluxes : ndarray[accum_dtype]
+        Interface fluxes of one pencil per thread, split integrator
+
+    Un_old : ndarray[dtype]
+        Conserved variables at the start of the step, read by the stages
+        of the SSP integrators
+
+    tile_cells, tile_rows, tile_cols : ndarray[dtype]
+        Start of step cells of one tile, and the halo rows and columns
+        the tiles hand on to each other, per thread of the tiled step
+
+    tile_faces : ndarray[dtype]
+        Face values of one tile per thread of the tiled step, the first
+        thread's being U_i_L, U_i_R, U_j_L and U_j_R
+
+    pool : ThreadPoolExecutor
+        Threads stepping strips of tiles, when the tiled step runs on
+        more than one thread
+
+    flux_L, flux_R : ndarray[dtype]
+        Predictor fluxes of a pair of opposite faces, for the unfused
+        predictor of the NumPy backend
+
+    int_flux : ndarray[dtype]
+        Half-step update shared by the four faces of a cell, NumPy backend
+
+    F, G : ndarray[accum_dtype]
+        Riemann fluxes through the x and y interfaces, NumPy backend, or
+        of the first Riemann solve of the CTU integrator, in dtype
+
+    """
+
+    def __init__(
+        self,
+        pmesh: FIEFS_Array,
+        dtype: np.dtype = None,
+        backend: str = "numba",
+        variables: str = "conserved",
+        num_threads: int = 1,
+        tile_size: int = 0,
+        accum_dtype: np.dtype = None,
+        integrator: str = "unsplit",
+    ) -> None:
+        if dtype is None:
+            dtype = pmesh.Un.dtype
+
+        if accum_dtype is None:
+            accum_dtype = dtype
+
+        nvar = pmesh.nvar
+        nx1 = pmesh.nx1
+        nx2 = pmesh.nx2
+        ng = pmesh.ng
+
+        self.Un_old = None
+        self.tile_cells = None
+        self.tile_rows = None
+        self.tile_cols = None
+        self.tile_faces = None
+        self.pool = None
+
+        if tile_size > 0 and backend != "numpy":
+            self.tile_rows = np.zeros(
+                (num_threads, 4, nvar, ng, nx2 + 2 * ng), dtype=dtype
+            )
+
+            # Face and flux buffers only need to hold one tile per thread
+            nx1 = min(tile_size, nx1)
+            nx2 = min(tile_size, nx2)
+
+            self.tile_cells = np.zeros(
+                (num_threads, nvar, nx1 + 2 * ng, nx2 + 2 * ng), dtype=dtype
+            )
+            self.tile_cols = np.zeros(
+                (num_threads, nvar, nx1 + 2 * ng, ng), dtype=dtype
+            )
+
+            self.tile_faces = np.zeros(
+                (num_threads, 4, nvar, nx1 + 2, nx2 + 2), dtype=dtype
+            )
+
+            if num_threads > 1:
+                self.pool = ThreadPoolExecutor(num_threads)
+
+            self.U_i_L, self.U_i_R, self.U_j_L, self.U_j_R = self.tile_faces[0]
+        else:
+            self.U_i_L = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.U_i_R = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.U_j_L = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.U_j_R = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+
+        self.U_l_i = self.U_i_R[:, :-1, :]
+        self.U_r_i = self.U_i_L[:, 1:, :]
+        self.U_l_j = self.U_j_R[:, :, :-1]
+        self.U_r_j = self.U_j_L[:, :, 1:]
+
+        self.W = None
+        self.W_i_L = None
+        self.W_i_R = None
+        self.W_j_L = None
+        self.W_j_R = None
+
+        if variables != "conserved":
+            self.W = get_interm_array(nvar, nx1 + 2 * ng, nx2 + 2 * ng, dtype)
+
+            self.W_i_L = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.W_i_R = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.W_j_L = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.W_j_R = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+
+        self.flux_rows = None
+        self.wave_speeds = None
+        self.flux_L = None
+        self.flux_R = None
+        self.int_flux = None
+        self.F = None
+        self.G = None
+
+        if backend == "numpy":
+            self.flux_L = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.flux_R = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+            self.int_flux = get_interm_array(nvar, nx1 + 2, nx2 + 2, dtype)
+
+            self.F = get_interm_array(nvar, nx1 + 1, nx2 + 2, accum_dtype)
+            self.G = get_interm_array(nvar, nx1 + 2, nx2 + 1, accum_dtype)
+        else:
+            self.flux_rows = np.zeros((num_threads, 2, nvar, nx2), dtype=accum_dtype)
+            self.wave_speeds = np.zeros((num_threads, 2))
+
+        if integrator == "ctu" and backend != "numpy":
+            # First Riemann solve of the CTU step, read by the transverse
+            # corrections
+            self.F = get_interm_array(nvar, nx1 + 1, nx2 + 2, dtype)
+            self.G = get_interm_array(nvar, nx1 + 2, nx2 + 1, dtype)
+
+        if integrator == "rk2" or integrator == "rk3":
+            # Start of step state, the stages themselves run in place
+            self.Un_old = np.zeros_like(pmesh.Un, dtype=dtype)
+
+        self.pencils = None
+        self.pencil_faces = None
+        self.pencil_fluxes = None
+
+        if integrator == "split":
+            N = max(pmesh.nx1, pmesh.nx2) + 2 * ng
+
+            self.pencils = np.zeros((num_threads, PENCIL_BLOCK, nvar, N), dtype=dtype)
+            self.pencil_faces = np.zeros((num_threads, 2, nvar, N), dtype=dtype)
+            self.pencil_fluxes = np.zeros((num_threads, nvar, N), dtype=accum_dtype)
+
+
 def get_interm_array(nvar: int, nx1: int, nx2: int, dtype: np.dtype) -> np.ndarray:
     """Generates empty scratch array for intermediate calculations
 
@@ -0,0 +1,496 @@
+###################################################################
+#                                                                 #
+#   Whole-array NumPy versions of the per-step numba kernels      #
+#                                                                 #
+###################################################################
+
+import os
+import sys
+
+import numpy as np
+
+current_script_path = os.path.abspath(__file__)
+parent_directory = os.path.dirname(os.path.dirname(current_script_path))
+sys.path.append(parent_directory)
+
+from src.jit import STEP_KERNELS, kernels_cached
+from src.mesh import FIEFS_Array
+from src.reconstruct import (
+    MC,
+    MINMOD,
+    MUSCL,
+    SUPERBEE,
+    VANLEER,
+    get_limited_slopes,
+)
+from src.riemann import HLLC
+
+# Cell-steps below which the NumPy backend finishes before the numba kernels
+# would be compiled (about 10 s of JIT against roughly 2 us per cell-step
+# saved by the compiled kernels). Only used while the kernels are not in the
+# on-disk cache, once they are numba wins from the first step.
+NUMPY_BACKEND_MAX_WORK = 5e6
+
+
+def get_primitive_variables_2d(Un: np.ndarray, gamma: float):
+    """NumPy version of `tools.get_primitive_variables_2d`
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    rho, u, v, p : ndarray[float]
+        Density, horizontal velocity, vertical velocity and pressure
+
+    """
+    rho = Un[0, :, :]
+    u = Un[1, :, :] / rho
+    v = Un[2, :, :] / rho
+    e = Un[3, :, :] / rho - 1 / 2 * rho * (u * u + v * v)
+
+    p = rho * (gamma - 1.0) * e
+
+    return rho, u, v, p
+
+
+def get_fluxes_2d_x(Un: np.ndarray, gamma: float) -> np.ndarray:
+    """NumPy version of `tools.get_fluxes_2d_x`"""
+    F = np.zeros_like(Un)
+    rho, u, v, p = get_primitive_variables_2d(Un, gamma)
+
+    F[0, :, :] = rho * u
+    F[1, :, :] = rho * u * u + p
+    F[2, :, :] = rho * u * v
+    F[3, :, :] = u * (Un[3, :, :] + p)
+
+    return F
+
+
+def get_fluxes_2d_y(Un: np.ndarray, gamma: float) -> np.ndarray:
+    """NumPy version of `tools.get_fluxes_2d_y`"""
+    F = np.zeros_like(Un)
+    rho, u, v, p = get_primitive_variables_2d(Un, gamma)
+
+    F[0, :, :] = rho * v
+    F[1, :, :] = rho * u * v
+    F[2, :, :] = rho * v * v + p
+    F[3, :, :] = v * (Un[3, :, :] + p)
+
+    return F
+
+
+def get_fluxes_2d_x_into(Un: np.ndarray, gamma: float, F: np.ndarray) -> np.ndarray:
+    """NumPy version of `tools.get_fluxes_2d_x_into`"""
+    F[:] = get_fluxes_2d_x(Un, gamma)
+
+    return F
+
+
+def get_fluxes_2d_y_into(Un: np.ndarray, gamma: float, F: np.ndarray) -> np.ndarray:
+    """NumPy version of `tools.get_fluxes_2d_y_into`"""
+    F[:] = get_fluxes_2d_y(Un, gamma)
+
+    return F
+
+
+def conservative_update(
+    Un: np.ndarray, F: np.ndarray, G: np.ndarray, ng: int, dtdx1: float, dtdx2: float
+) -> np.ndarray:
+    """NumPy version of `tools.conservative_update`"""
+    Un[:, ng:-ng, ng:-ng] += dtdx1 * (F[:, :-1, 1:-1] - F[:, 1:, 1:-1]) + dtdx2 * (
+        G[:, 1:-1, :-1] - G[:, 1:-1, 1:]
+    )
+
+    return Un
+
+
+def calculate_timestep(pmesh: FIEFS_Array, cfl: float, gamma: float) -> float:
+    """NumPy version of `tools.calculate_timestep`"""
+    ng = pmesh.ng
+    rho, u, v, p = get_primitive_variables_2d(pmesh.Un[:, ng:-ng, ng:-ng], gamma)
+
+    a = np.sqrt(gamma * p / rho)
+
+    max_rate = max(
+        np.amax((np.abs(u) + a) * (1.0 / pmesh.dx1)),
+        np.amax((np.abs(v) + a) * (1.0 / pmesh.dx2)),
+    )
+
+    return cfl * (1.0 / max_rate)
+
+
+def smooth_limiter_slopes(
+    delta_moh: np.ndarray, delta_poh: np.ndarray, limiter: int
+) -> np.ndarray:
+    """NumPy version of the van Leer, MC and van Albada limiters in
+    `reconstruct.slope_limiter`"""
+    a = delta_moh
+    b = delta_poh
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if limiter == VANLEER:
+            slope = 2.0 * a * b / (a + b)
+        elif limiter == MC:
+            slope = np.minimum(
+                np.minimum(0.5 * np.abs(a + b), 2.0 * np.abs(a)), 2.0 * np.abs(b)
+            )
+            slope = np.where(a > 0.0, slope, -slope)
+        else:
+            slope = a * b * (a + b) / (a * a + b * b)
+
+    return np.where(a * b <= 0.0, 0.0, slope)
+
+
+def get_limited_slopes_into(
+    Un: np.ndarray,
+    beta: float,
+    delta_i: np.ndarray,
+    delta_j: np.ndarray,
+    limiter: int = MINMOD,
+):
+    """NumPy version of `reconstruct.get_limited_slopes_into`"""
+    if limiter == MINMOD or limiter == SUPERBEE:
+        delta_i[...], delta_j[...] = get_limited_slopes(
+            Un[:, 1:-1, 1:-1],
+            Un[:, 2:, 1:-1],
+            Un[:, :-2, 1:-1],
+            Un[:, 1:-1, 2:],
+            Un[:, 1:-1, :-2],
+            beta if limiter == MINMOD else 2.0,
+        )
+
+    else:
+        U_i_j = Un[:, 1:-1, 1:-1]
+
+        delta_i[...] = smooth_limiter_slopes(
+            U_i_j - Un[:, :-2, 1:-1], Un[:, 2:, 1:-1] - U_i_j, limiter
+        )
+        delta_j[...] = smooth_limiter_slopes(
+            U_i_j - Un[:, 1:-1, :-2], Un[:, 1:-1, 2:] - U_i_j, limiter
+        )
+
+    return delta_i, delta_j
+
+
+def get_face_values_into(
+    Un: np.ndarray,
+    ng: int,
+    beta: float,
+    U_i_L: np.ndarray,
+    U_i_R: np.ndarray,
+    U_j_L: np.ndarray,
+    U_j_R: np.ndarray,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+):
+    """NumPy version of `reconstruct.get_face_values_into`, MUSCL only"""
+    if scheme != MUSCL:
+        raise ValueError("Please use an implemented reconstruction type")
+
+    n1 = Un.shape[1]
+    n2 = Un.shape[2]
+    U_c = Un[:, ng - 2 : n1 - ng + 2, ng - 2 : n2 - ng + 2]
+    U_i_j = U_c[:, 1:-1, 1:-1]
+
+    delta_i = np.empty_like(U_i_j)
+    delta_j = np.empty_like(U_i_j)
+    get_limited_slopes_into(U_c, beta, delta_i, delta_j, limiter)
+
+    U_i_L[...] = U_i_j - 1 / 2 * delta_i
+    U_i_R[...] = U_i_j + 1 / 2 * delta_i
+    U_j_L[...] = U_i_j - 1 / 2 * delta_j
+    U_j_R[...] = U_i_j + 1 / 2 * delta_j
+
+    return U_i_L, U_i_R, U_j_L, U_j_R
+
+
+def state_fluxes(
+    rho: np.ndarray,
+    mn: np.ndarray,
+    mt: np.ndarray,
+    E: np.ndarray,
+    gamma: float,
+    ydir: bool,
+):
+    """NumPy version of `riemann.state_flux` for arrays of states"""
+    if ydir:
+        u = mt / rho
+        v = mn / rho
+    else:
+        u = mn / rho
+        v = mt / rho
+
+    e = E / rho - 1 / 2 * rho * (u * u + v * v)
+    p = rho * (gamma - 1.0) * e
+
+    if ydir:
+        return rho * v, rho * v * v + p, rho * u * v, v * (E + p)
+
+    return rho * u, rho * u**2 + p, rho * u * v, u * (E + p)
+
+
+def hllc_fluxes(
+    rho_l: np.ndarray,
+    mn_l: np.ndarray,
+    mt_l: np.ndarray,
+    E_l: np.ndarray,
+    rho_r: np.ndarray,
+    mn_r: np.ndarray,
+    mt_r: np.ndarray,
+    E_r: np.ndarray,
+    gamma: float,
+    ydir: bool,
+):
+    """Whole-array HLLC fluxes
+
+    Same HLLC solver as `riemann.hllc_flux`, evaluated on whole arrays of
+    interfaces. The two-rarefaction and two-shock pressure estimates are
+    only evaluated on the interfaces that need them, and the flux is
+    picked from the R, R*, L* and L regions with masks.
+
+    Parameters
+    ----------
+    rho_l, mn_l, mt_l, E_l : ndarray[float]
+        Density, normal momentum, tangential momentum and total energy
+        of the left states
+    rho_r, mn_r, mt_r, E_r : ndarray[float]
+        Same for the right states
+    gamma : float
+        Specific heat ratio
+    ydir : bool
+        True if the interface normal is the y direction
+
+    Returns
+    -------
+    f0, fn, ft, f3 : ndarray[float]
+        Mass, normal momentum, tangential momentum and energy fluxes
+
+    """
+    un_l = mn_l / rho_l
+    ut_l = mt_l / rho_l
+    p_l = np.maximum(
+        (E_l - 0.5 * rho_l * (un_l**2 + ut_l**2)) * (gamma - 1.0), 1e-5
+    )
+
+    un_r = mn_r / rho_r
+    ut_r = mt_r / rho_r
+    p_r = np.maximum(
+        (E_r - 0.5 * rho_r * (un_r**2 + ut_r**2)) * (gamma - 1.0), 1e-5
+    )
+
+    # compute the sound speeds
+    c_l = np.maximum(1e-5, np.sqrt(gamma * p_l / rho_l))
+    c_r = np.maximum(1e-5, np.sqrt(gamma * p_r / rho_r))
+
+    p_max = np.maximum(p_l, p_r)
+    p_min = np.minimum(p_l, p_r)
+
+    Q = p_max / p_min
+
+    # primitive variable Riemann solver (Toro, 9.3)
+    factor = 0.5 * (rho_l + rho_r) * (0.5 * (c_l + c_r))
+
+    pstar = 0.5 * (p_l + p_r) + 0.5 * (un_l - un_r) * factor
+
+    two_rarefaction = np.nonzero((Q > 2) & (pstar < p_min))
+    two_shock = np.nonzero((Q > 2) & (pstar > p_max))
+
+    # 2-rarefaction Riemann solver where the pressure ratio is large
+    m = two_rarefaction
+
+    if m[0].size > 0:
+        z = (gamma - 1.0) / (2.0 * gamma)
+        p_lr = (p_l[m] / p_r[m]) ** z
+
+        ustar = (
+            p_lr * un_l[m] / c_l[m]
+            + un_r[m] / c_r[m]
+            + 2.0 * (p_lr - 1.0) / (gamma - 1.0)
+        ) / (p_lr / c_l[m] + 1.0 / c_r[m])
+
+        # Strong rarefactions give a negative base, which is NaN here just
+        # like in the compiled kernel
+        with np.errstate(invalid="ignore"):
+            pstar[m] = 0.5 * (
+                p_l[m]
+                * (1.0 + (gamma - 1.0) * (un_l[m] - ustar) / (2.0 * c_l[m]))
+                ** (1.0 / z)
+                + p_r[m]
+                * (1.0 + (gamma - 1.0) * (ustar - un_r[m]) / (2.0 * c_r[m]))
+                ** (1.0 / z)
+            )
+
+    # 2-shock Riemann solver where the pressure ratio is large
+    m = two_shock
+
+    if m[0].size > 0:
+        A_r = 2.0 / ((gamma + 1.0) * rho_r[m])
+        B_r = p_r[m] * (gamma - 1.0) / (gamma + 1.0)
+
+        A_l = 2.0 / ((gamma + 1.0) * rho_l[m])
+        B_l = p_l[m] * (gamma - 1.0) / (gamma + 1.0)
+
+        p_guess = np.maximum(0.0, pstar[m])
+
+        g_l = np.sqrt(A_l / (p_guess + B_l))
+        g_r = np.sqrt(A_r / (p_guess + B_r))
+
+        pstar[m] = (g_l * p_l[m] + g_r * p_r[m] - (un_r[m] - un_l[m])) / (g_l + g_r)
+
+    # Wave speeds, the square roots are only taken where they are used (the
+    # masks negate the compiled kernel's tests so NaNs take the same branch)
+    S_l = un_l - c_l
+    m = np.nonzero(~(pstar <= p_l))
+    S_l[m] = un_l[m] - c_l[m] * np.sqrt(
+        1.0 + ((gamma + 1.0) / (2.0 * gamma)) * (pstar[m] / p_l[m] - 1.0)
+    )
+
+    S_r = un_r + c_r
+    m = np.nonzero(~(pstar <= p_r))
+    S_r[m] = un_r[m] + c_r[m] * np.sqrt(
+        1.0 + ((gamma + 1.0) / (2.0 / gamma)) * (pstar[m] / p_r[m] - 1.0)
+    )
+
+    S_c = (p_r - p_l + rho_l * un_l * (S_l - un_l) - rho_r * un_r * (S_r - un_r)) / (
+        rho_l * (S_l - un_l) - rho_r * (S_r - un_r)
+    )
+
+    # Start from the L region and overwrite the other three
+    f0, fn, ft, f3 = state_fluxes(rho_l, mn_l, mt_l, E_l, gamma, ydir)
+    f0_r, fn_r, ft_r, f3_r = state_fluxes(rho_r, mn_r, mt_r, E_r, gamma, ydir)
+
+    region_r = S_r <= 0.0
+    region_r_star = (S_r > 0.0) & (S_c <= 0)
+    region_l_star = ~region_r & ~region_r_star & (S_c > 0.0) & (S_l < 0.0)
+
+    # R region
+    m = np.nonzero(region_r)
+    f0[m], fn[m], ft[m], f3[m] = f0_r[m], fn_r[m], ft_r[m], f3_r[m]
+
+    # R* region
+    m = np.nonzero(region_r_star)
+    HLLCfactor = rho_r[m] * (S_r[m] - un_r[m]) / (S_r[m] - S_c[m])
+    E_star = HLLCfactor * (
+        E_r[m] / rho_r[m]
+        + (S_c[m] - un_r[m]) * (S_c[m] + p_r[m] / (rho_r[m] * (S_r[m] - un_r[m])))
+    )
+
+    f0[m] = f0_r[m] + S_r[m] * (HLLCfactor - rho_r[m])
+    fn[m] = fn_r[m] + S_r[m] * (HLLCfactor * S_c[m] - mn_r[m])
+    ft[m] = ft_r[m] + S_r[m] * (HLLCfactor * ut_r[m] - mt_r[m])
+    f3[m] = f3_r[m] + S_r[m] * (E_star - E_r[m])
+
+    # L* region
+    m = np.nonzero(region_l_star)
+    HLLCfactor = rho_l[m] * (S_l[m] - un_l[m]) / (S_l[m] - S_c[m])
+    E_star = HLLCfactor * (
+        E_l[m] / rho_l[m]
+        + (S_c[m] - un_l[m]) * (S_c[m] + p_l[m] / (rho_l[m] * (S_l[m] - un_l[m])))
+    )
+
+    f0[m] = f0[m] + S_l[m] * (HLLCfactor - rho_l[m])
+    fn[m] = fn[m] + S_l[m] * (HLLCfactor * S_c[m] - mn_l[m])
+    ft[m] = ft[m] + S_l[m] * (HLLCfactor * ut_l[m] - mt_l[m])
+    f3[m] = f3[m] + S_l[m] * (E_star - E_l[m])
+
+    return f0, fn, ft, f3
+
+
+def solve_riemann_x(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, F: np.ndarray, solver: int = HLLC
+) -> np.ndarray:
+    """NumPy version of `riemann.solve_riemann_x` (HLLC only)"""
+    if solver != HLLC:
+        raise ValueError("The NumPy backend only implements the HLLC solver")
+
+    F[0], F[1], F[2], F[3] = hllc_fluxes(*U_l, *U_r, gamma, False)
+
+    return F
+
+
+def solve_riemann_y(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, F: np.ndarray, solver: int = HLLC
+) -> np.ndarray:
+    """NumPy version of `riemann.solve_riemann_y` (HLLC only)"""
+    if solver != HLLC:
+        raise ValueError("The NumPy backend only implements the HLLC solver")
+
+    F[0], F[2], F[1], F[3] = hllc_fluxes(
+        U_l[0], U_l[2], U_l[1], U_l[3], U_r[0], U_r[2], U_r[1], U_r[3], gamma, True
+    )
+
+    return F
+
+
+def choose_backend(
+    backend: str,
+    pmesh: FIEFS_Array,
+    tmax: float,
+    cfl: float,
+    gamma: float,
+    solver: int,
+    scheme: int = MUSCL,
+    variables: str = "conserved",
+    accum_dtype: np.dtype = None,
+) -> str:
+    """Picks the kernel backend for a run
+
+    With ``backend = auto`` the NumPy kernels are used when the numba
+    kernels of the step are not cached yet and the estimated amount of
+    work (cells times steps to reach `tmax`, with the step count estimated
+    from the initial timestep) is too small to pay back their compile
+    time. Only HLLC and MUSCL on conserved variables have NumPy versions,
+    so the other options always run on numba.
+
+    Parameters
+    ----------
+    backend : str
+        Requested backend: 'auto', 'numba' or 'numpy'
+    pmesh : FIEFS_Array
+        Mesh holding the initial conditions
+    tmax : float
+        End time of the simulation
+    cfl : float
+        Courant-Freidrichs-Lewy number
+    gamma : float
+        Specific heat ratio
+    solver : int
+        Riemann solver id from `riemann.RIEMANN_SOLVERS`
+    scheme : int
+        Reconstruction id from `reconstruct.RECONSTRUCTIONS`
+    variables : str
+        Variables the reconstruction works on
+    accum_dtype : dtype
+        Type of the flux buffers of the update, that of the mesh if not
+        given
+
+    Returns
+    -------
+    str
+        'numba' or 'numpy'
+
+    """
+    if backend == "numba" or backend == "numpy":
+        return backend
+
+    elif backend == "auto":
+        if solver != HLLC or scheme != MUSCL or variables != "conserved":
+            return "numba"
+
+        if kernels_cached(STEP_KERNELS, pmesh.Un.dtype, accum_dtype):
+            return "numba"
+
+        n_steps = tmax / calculate_timestep(pmesh, cfl, gamma)
+
+        if pmesh.nx1 * pmesh.nx2 * n_steps < NUMPY_BACKEND_MAX_WORK:
+            return "numpy"
+
+        return "numba"
+
+    else:
+        raise ValueError("Please use an implemented backend type")
@@ -0,0 +1,50 @@
+###################################################################
+#                                                                 #
+#              Threaded builds of the numba kernels               #
+#                                                                 #
+###################################################################
+
+import types
+
+import numba
+from numba import njit
+
+
+def parallel_build(
+    kernel: numba.core.registry.CPUDispatcher, **options
+) -> numba.core.registry.CPUDispatcher:
+    """Compiles the threaded build of a serial kernel
+
+    The prange loops of the kernel are split over the numba threads. The
+    build runs a copy of the kernel's Python function under the name
+    `<name>_parallel`, since numba's cache index is keyed by the function
+    name and would otherwise mix the two builds up. It is cached on disk
+    like the serial kernel.
+
+    Parameters
+    ----------
+    kernel : CPUDispatcher
+        Serial kernel, compiled with njit
+    **options
+        Further njit options of the threaded build, such as nogil
+
+    Returns
+    -------
+    CPUDispatcher
+        The threaded build
+
+    """
+    py_func = kernel.py_func
+
+    threaded = types.FunctionType(
+        py_func.__code__,
+        py_func.__globals__,
+        py_func.__name__ + "_parallel",
+        py_func.__defaults__,
+        py_func.__closure__,
+    )
+    threaded.__qualname__ = py_func.__qualname__ + "_parallel"
+    threaded.__module__ = py_func.__module__
+    threaded.__doc__ = py_func.__doc__
+
+    return njit(parallel=True, cache=True, **options)(threaded)
@@ -42,12 +42,12 @@ def ProblemGenerator(pin: src.input.FIEFS_Input, pmesh: src.mesh.FIEFS_Array) ->
     np.linspace(
         pin.value_dict["x1min"],
         pin.value_dict["x1max"],
-        pin.value_dict["nx1"] + 2 * pin.value_dict["ng"],
+        pin.value_dict["nx1"] + 2 * pmesh.ng,
     )
     y = np.linspace(
         pin.value_dict["x2min"],
         pin.value_dict["x2max"],
-        pin.value_dict["nx2"] + 2 * pin.value_dict["ng"],
+        pin.value_dict["nx2"] + 2 * pmesh.ng,
     )
 
     # make empty pressure array for storage
@@ -1,4 +1,7 @@
+from typing import Tuple
+
 import numpy as np
+from numba import njit
 
 
 def get_unlimited_slopes(
@@ -160,3 +163,634 @@ def get_limited_slopes(
     )
 
     return delta_i, delta_j
+
+
+@njit(cache=True)
+def limited_slope(delta_moh: float, delta_poh: float, beta: float) -> float:
+    """Limited slope of a single cell from its two one-sided differences
+
+    Scalar form of the `beta` limiter in `get_limited_slopes`, with the
+    same order of operations so both give identical slopes.
+
+    Parameters
+    ----------
+    delta_moh : float
+        Difference to the cell behind, U_i - U_{i-1}
+
+    delta_poh : float
+        Difference to the cell ahead, U_{i+1} - U_i
+
+    beta : float
+        Weight value determining type of limiter, 1.0 is minmod
+        and 2.0 is superbee
+
+    Returns
+    -------
+    float
+        Limited slope
+
+    """
+    if delta_poh > 0.0:
+        return max(
+            0.0,
+            max(min(beta * delta_moh, delta_poh), min(delta_moh, beta * delta_poh)),
+        )
+
+    return min(
+        0.0,
+        min(max(beta * delta_moh, delta_poh), max(delta_moh, beta * delta_poh)),
+    )
+
+
+@njit(cache=True)
+def van_leer_slope(delta_moh: float, delta_poh: float) -> float:
+    """van Leer limited slope, the harmonic mean of the one-sided differences"""
+    if delta_moh * delta_poh <= 0.0:
+        return 0.0
+
+    return 2.0 * delta_moh * delta_poh / (delta_moh + delta_poh)
+
+
+@njit(cache=True)
+def mc_slope(delta_moh: float, delta_poh: float) -> float:
+    """Monotonized central limited slope, the central difference capped at
+    twice either one-sided difference"""
+    if delta_moh * delta_poh <= 0.0:
+        return 0.0
+
+    slope = min(
+        0.5 * abs(delta_moh + delta_poh), 2.0 * abs(delta_moh), 2.0 * abs(delta_poh)
+    )
+
+    if delta_moh > 0.0:
+        return slope
+
+    return -slope
+
+
+@njit(cache=True)
+def van_albada_slope(delta_moh: float, delta_poh: float) -> float:
+    """van Albada limited slope, which switches smoothly between the
+    one-sided differences"""
+    if delta_moh * delta_poh <= 0.0:
+        return 0.0
+
+    return (
+        delta_moh
+        * delta_poh
+        * (delta_moh + delta_poh)
+        / (delta_moh * delta_moh + delta_poh * delta_poh)
+    )
+
+
+# Slope limiter registry, keyed by the `limiter` input value
+MINMOD = 0
+VANLEER = 1
+MC = 2
+SUPERBEE = 3
+VANALBADA = 4
+
+LIMITERS = {
+    "minmod": MINMOD,
+    "vanleer": VANLEER,
+    "mc": MC,
+    "superbee": SUPERBEE,
+    "vanalbada": VANALBADA,
+}
+
+
+def get_limiter(name: str) -> int:
+    """Looks up a slope limiter in the registry
+
+    Parameters
+    ----------
+    name : str
+        Name of the limiter: 'minmod', 'vanleer', 'mc', 'superbee' or
+        'vanalbada'
+
+    Returns
+    -------
+    int
+        Limiter id to be passed to `get_limited_slopes_into`
+
+    """
+    if name.lower() in LIMITERS:
+        return LIMITERS[name.lower()]
+
+    else:
+        raise ValueError("Please use an implemented slope limiter")
+
+
+@njit(cache=True)
+def slope_limiter(
+    limiter: int, delta_moh: float, delta_poh: float, beta: float
+) -> float:
+    """Limited slope of a single cell with the limiter selected by id
+
+    Minmod is the `beta` limiter of `get_limited_slopes`, with `beta` taken
+    from the caller, and superbee is the same limiter at beta = 2.
+    """
+    if limiter == VANLEER:
+        return van_leer_slope(delta_moh, delta_poh)
+    elif limiter == MC:
+        return mc_slope(delta_moh, delta_poh)
+    elif limiter == SUPERBEE:
+        return limited_slope(delta_moh, delta_poh, 2.0)
+    elif limiter == VANALBADA:
+        return van_albada_slope(delta_moh, delta_poh)
+
+    return limited_slope(delta_moh, delta_poh, beta)
+
+
+@njit(cache=True)
+def get_limited_slopes_into(
+    Un: np.ndarray,
+    beta: float,
+    delta_i: np.ndarray,
+    delta_j: np.ndarray,
+    limiter: int = MINMOD,
+):
+    """Limited slopes of every cell but the outermost layer, in one pass
+
+    Compiled equivalent of `get_limited_slopes` called with the shifted
+    views of `Un`. The slopes are written into `delta_i` and `delta_j`, so
+    no index arrays or temporaries are allocated.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables including ghost zones, shape (nvar, nx, ny)
+
+    beta : float
+        Weight value of the minmod limiter, 1.0 is minmod. Not used by
+        the other limiters
+
+    delta_i : ndarray[float]
+        Output slopes in the x-direction, shape (nvar, nx - 2, ny - 2)
+
+    delta_j : ndarray[float]
+        Output slopes in the y-direction, shape (nvar, nx - 2, ny - 2)
+
+    limiter : int
+        Limiter id from `LIMITERS`, minmod by default
+
+    Returns
+    -------
+    delta_i, delta_j : ndarray[float]
+        The filled output arrays
+
+    """
+    for n in range(Un.shape[0]):
+        for i in range(1, Un.shape[1] - 1):
+            for j in range(1, Un.shape[2] - 1):
+                U = Un[n, i, j]
+
+                delta_i[n, i - 1, j - 1] = slope_limiter(
+                    limiter, U - Un[n, i - 1, j], Un[n, i + 1, j] - U, beta
+                )
+                delta_j[n, i - 1, j - 1] = slope_limiter(
+                    limiter, U - Un[n, i, j - 1], Un[n, i, j + 1] - U, beta
+                )
+
+    return delta_i, delta_j
+
+
+# Regularization of the WENO weights
+WENO_EPSILON = 1.0e-6
+
+
+@njit(cache=True)
+def ppm_faces(
+    U_m2: float, U_m1: float, U_0: float, U_p1: float, U_p2: float
+) -> Tuple[float, float]:
+    """Left and right face values of a cell from the piecewise parabolic
+    method of [1], without flattening or contact steepening
+
+    Parameters
+    ----------
+    U_m2, U_m1, U_0, U_p1, U_p2 : float
+        Values of U in cells i-2 to i+2
+
+    Returns
+    -------
+    U_L, U_R : float
+        Values of U on the left and right faces of cell i
+
+    References
+    ----------
+    [1] Colella, P., & Woodward, P. R. (1984). The Piecewise Parabolic Method
+    (PPM) for gas-dynamical simulations. Journal of Computational Physics,
+    54(1), 174-201.
+
+    """
+    delta_m1 = mc_slope(U_m1 - U_m2, U_0 - U_m1)
+    delta_0 = mc_slope(U_0 - U_m1, U_p1 - U_0)
+    delta_p1 = mc_slope(U_p1 - U_0, U_p2 - U_p1)
+
+    # Fourth order interface values
+    U_L = 0.5 * (U_m1 + U_0) - (delta_0 - delta_m1) / 6.0
+    U_R = 0.5 * (U_0 + U_p1) - (delta_p1 - delta_0) / 6.0
+
+    # Monotonicity constraints, eq. 1.10 of [1]
+    if (U_R - U_0) * (U_0 - U_L) <= 0.0:
+        return U_0, U_0
+
+    jump = U_R - U_L
+    curvature = jump * (U_0 - 0.5 * (U_L + U_R))
+
+    if curvature > jump * jump / 6.0:
+        U_L = 3.0 * U_0 - 2.0 * U_R
+    elif -jump * jump / 6.0 > curvature:
+        U_R = 3.0 * U_0 - 2.0 * U_L
+
+    return U_L, U_R
+
+
+@njit(cache=True)
+def weno5_face(U_m2: float, U_m1: float, U_0: float, U_p1: float, U_p2: float) -> float:
+    """Fifth order WENO value on the face between cells i and i+1, biased
+    towards cell i, with the smoothness indicators of [1]
+
+    The face value on the other side of cell i is found by passing the
+    stencil in reverse order.
+
+    Parameters
+    ----------
+    U_m2, U_m1, U_0, U_p1, U_p2 : float
+        Values of U in cells i-2 to i+2
+
+    Returns
+    -------
+    float
+        Value of U on the face between cells i and i+1
+
+    References
+    ----------
+    [1] Jiang, G.-S., & Shu, C.-W. (1996). Efficient implementation of
+    weighted ENO schemes. Journal of Computational Physics, 126(1), 202-228.
+
+    """
+    # Third order candidates from the three sub-stencils
+    p_0 = (2.0 * U_m2 - 7.0 * U_m1 + 11.0 * U_0) / 6.0
+    p_1 = (-U_m1 + 5.0 * U_0 + 2.0 * U_p1) / 6.0
+    p_2 = (2.0 * U_0 + 5.0 * U_p1 - U_p2) / 6.0
+
+    # Smoothness indicators
+    b_0 = (13.0 / 12.0) * (U_m2 - 2.0 * U_m1 + U_0) ** 2 + 0.25 * (
+        U_m2 - 4.0 * U_m1 + 3.0 * U_0
+    ) ** 2
+    b_1 = (13.0 / 12.0) * (U_m1 - 2.0 * U_0 + U_p1) ** 2 + 0.25 * (U_m1 - U_p1) ** 2
+    b_2 = (13.0 / 12.0) * (U_0 - 2.0 * U_p1 + U_p2) ** 2 + 0.25 * (
+        3.0 * U_0 - 4.0 * U_p1 + U_p2
+    ) ** 2
+
+    # Nonlinear weights around the optimal weights 1/10, 6/10 and 3/10
+    a_0 = 0.1 / (WENO_EPSILON + b_0) ** 2
+    a_1 = 0.6 / (WENO_EPSILON + b_1) ** 2
+    a_2 = 0.3 / (WENO_EPSILON + b_2) ** 2
+
+    return (a_0 * p_0 + a_1 * p_1 + a_2 * p_2) / (a_0 + a_1 + a_2)
+
+
+# Reconstruction registry, keyed by the `reconstruction` input value
+MUSCL = 0
+PPM = 1
+WENO5 = 2
+
+RECONSTRUCTIONS = {
+    "muscl": MUSCL,
+    "ppm": PPM,
+    "weno5": WENO5,
+}
+
+# Ghost zones needed by the stencil of each reconstruction
+RECONSTRUCTION_GHOST_ZONES = {
+    MUSCL: 2,
+    PPM: 3,
+    WENO5: 3,
+}
+
+
+def get_reconstruction(name: str) -> int:
+    """Looks up a reconstruction scheme in the registry
+
+    Parameters
+    ----------
+    name : str
+        Name of the scheme: 'muscl', 'ppm' or 'weno5'
+
+    Returns
+    -------
+    int
+        Scheme id to be passed to `get_face_values_into`
+
+    """
+    if name.lower() in RECONSTRUCTIONS:
+        return RECONSTRUCTIONS[name.lower()]
+
+    else:
+        raise ValueError("Please use an implemented reconstruction type")
+
+
+@njit(cache=True)
+def cell_faces(
+    scheme: int,
+    limiter: int,
+    beta: float,
+    U_m2: float,
+    U_m1: float,
+    U_0: float,
+    U_p1: float,
+    U_p2: float,
+) -> Tuple[float, float]:
+    """Left and right face values of a cell with the scheme selected by id"""
+    if scheme == PPM:
+        return ppm_faces(U_m2, U_m1, U_0, U_p1, U_p2)
+    elif scheme == WENO5:
+        return (
+            weno5_face(U_p2, U_p1, U_0, U_m1, U_m2),
+            weno5_face(U_m2, U_m1, U_0, U_p1, U_p2),
+        )
+
+    slope = slope_limiter(limiter, U_0 - U_m1, U_p1 - U_0, beta)
+
+    return U_0 - 1 / 2 * slope, U_0 + 1 / 2 * slope
+
+
+@njit(cache=True)
+def cell_face_values(
+    Un: np.ndarray, n: int, i: int, j: int, scheme: int, limiter: int, beta: float
+) -> Tuple[float, float, float, float]:
+    """Left, right, bottom and top face values of variable n of cell (i, j)"""
+    if scheme == MUSCL:
+        U_m2 = Un[n, i, j]
+        U_p2 = Un[n, i, j]
+    else:
+        U_m2 = Un[n, i - 2, j]
+        U_p2 = Un[n, i + 2, j]
+
+    U_i_L, U_i_R = cell_faces(
+        scheme,
+        limiter,
+        beta,
+        U_m2,
+        Un[n, i - 1, j],
+        Un[n, i, j],
+        Un[n, i + 1, j],
+        U_p2,
+    )
+
+    if scheme != MUSCL:
+        U_m2 = Un[n, i, j - 2]
+        U_p2 = Un[n, i, j + 2]
+
+    U_j_L, U_j_R = cell_faces(
+        scheme,
+        limiter,
+        beta,
+        U_m2,
+        Un[n, i, j - 1],
+        Un[n, i, j],
+        Un[n, i, j + 1],
+        U_p2,
+    )
+
+    return U_i_L, U_i_R, U_j_L, U_j_R
+
+
+@njit(cache=True)
+def get_face_values_into(
+    Un: np.ndarray,
+    ng: int,
+    beta: float,
+    U_i_L: np.ndarray,
+    U_i_R: np.ndarray,
+    U_j_L: np.ndarray,
+    U_j_R: np.ndarray,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+):
+    """Face values of the interior cells and of one ghost layer around them
+
+    The faces in each direction are reconstructed for cells ng-1 to
+    nx+ng of `Un` and written into the output arrays, whose first entry
+    is cell ng-1. With MUSCL the faces are the cell value minus and plus
+    half the limited slope of `get_limited_slopes_into`.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables including ghost zones, shape (nvar, nx, ny)
+
+    ng : int
+        Number of ghost zones of `Un`, at least the number required by the
+        scheme in `RECONSTRUCTION_GHOST_ZONES`
+
+    beta : float
+        Weight value of the minmod limiter, 1.0 is minmod
+
+    U_i_L, U_i_R : ndarray[float]
+        Output values on the left and right x faces, shape
+        (nvar, nx - 2 * ng + 2, ny - 2 * ng + 2)
+
+    U_j_L, U_j_R : ndarray[float]
+        Output values on the bottom and top y faces
+
+    scheme : int
+        Reconstruction id from `RECONSTRUCTIONS`, MUSCL by default
+
+    limiter : int
+        Limiter id from `LIMITERS` used by MUSCL, minmod by default
+
+    Returns
+    -------
+    U_i_L, U_i_R, U_j_L, U_j_R : ndarray[float]
+        The filled output arrays
+
+    """
+    for n in range(Un.shape[0]):
+        for i in range(ng - 1, Un.shape[1] - ng + 1):
+            for j in range(ng - 1, Un.shape[2] - ng + 1):
+                k = i - ng + 1
+                m = j - ng + 1
+
+                (
+                    U_i_L[n, k, m],
+                    U_i_R[n, k, m],
+                    U_j_L[n, k, m],
+                    U_j_R[n, k, m],
+                ) = cell_face_values(Un, n, i, j, scheme, limiter, beta)
+
+    return U_i_L, U_i_R, U_j_L, U_j_R
+
+
+@njit(cache=True)
+def to_characteristic(
+    rho_c: float, c: float, rho: float, un: float, ut: float, p: float
+) -> Tuple[float, float, float, float]:
+    """Projects a primitive state onto the left eigenvectors of the
+    primitive Euler equations of a reference cell with density `rho_c` and
+    sound speed `c`, in the frame of the face normal"""
+    c2_inv = 1.0 / (c * c)
+    half_z = 0.5 * rho_c / c
+
+    return (
+        0.5 * p * c2_inv - half_z * un,
+        rho - p * c2_inv,
+        ut,
+        0.5 * p * c2_inv + half_z * un,
+    )
+
+
+@njit(cache=True)
+def from_characteristic(
+    rho_c: float, c: float, w0: float, w1: float, w2: float, w3: float
+) -> Tuple[float, float, float, float]:
+    """Inverse of `to_characteristic`, returns rho, un, ut and p"""
+    return w0 + w1 + w3, c / rho_c * (w3 - w0), w2, c * c * (w0 + w3)
+
+
+@njit(cache=True)
+def characteristic_faces(
+    W: np.ndarray,
+    i: int,
+    j: int,
+    di: int,
+    dj: int,
+    gamma: float,
+    scheme: int,
+    limiter: int,
+    beta: float,
+):
+    """Face values of cell (i, j) along (di, dj), reconstructed in the
+    characteristic variables of the cell
+
+    Returns the primitive states on the two faces as (rho, un, ut, p)
+    tuples in the frame of the face normal.
+    """
+    n = 1 if di == 1 else 2
+    t = 2 if di == 1 else 1
+
+    rho_c = W[0, i, j]
+    c = np.sqrt(gamma * W[3, i, j] / rho_c)
+
+    # MUSCL only reads the nearest neighbours, which also keeps its stencil
+    # inside two ghost zones
+    reach = 1 if scheme == MUSCL else 2
+
+    w_m2 = to_characteristic(
+        rho_c,
+        c,
+        W[0, i - reach * di, j - reach * dj],
+        W[n, i - reach * di, j - reach * dj],
+        W[t, i - reach * di, j - reach * dj],
+        W[3, i - reach * di, j - reach * dj],
+    )
+    w_m1 = to_characteristic(
+        rho_c,
+        c,
+        W[0, i - di, j - dj],
+        W[n, i - di, j - dj],
+        W[t, i - di, j - dj],
+        W[3, i - di, j - dj],
+    )
+    w_0 = to_characteristic(rho_c, c, W[0, i, j], W[n, i, j], W[t, i, j], W[3, i, j])
+    w_p1 = to_characteristic(
+        rho_c,
+        c,
+        W[0, i + di, j + dj],
+        W[n, i + di, j + dj],
+        W[t, i + di, j + dj],
+        W[3, i + di, j + dj],
+    )
+    w_p2 = to_characteristic(
+        rho_c,
+        c,
+        W[0, i + reach * di, j + reach * dj],
+        W[n, i + reach * di, j + reach * dj],
+        W[t, i + reach * di, j + reach * dj],
+        W[3, i + reach * di, j + reach * dj],
+    )
+
+    L_0, R_0 = cell_faces(
+        scheme, limiter, beta, w_m2[0], w_m1[0], w_0[0], w_p1[0], w_p2[0]
+    )
+    L_1, R_1 = cell_faces(
+        scheme, limiter, beta, w_m2[1], w_m1[1], w_0[1], w_p1[1], w_p2[1]
+    )
+    L_2, R_2 = cell_faces(
+        scheme, limiter, beta, w_m2[2], w_m1[2], w_0[2], w_p1[2], w_p2[2]
+    )
+    L_3, R_3 = cell_faces(
+        scheme, limiter, beta, w_m2[3], w_m1[3], w_0[3], w_p1[3], w_p2[3]
+    )
+
+    return (
+        from_characteristic(rho_c, c, L_0, L_1, L_2, L_3),
+        from_characteristic(rho_c, c, R_0, R_1, R_2, R_3),
+    )
+
+
+@njit(cache=True)
+def get_characteristic_face_values_into(
+    W: np.ndarray,
+    ng: int,
+    gamma: float,
+    beta: float,
+    W_i_L: np.ndarray,
+    W_i_R: np.ndarray,
+    W_j_L: np.ndarray,
+    W_j_R: np.ndarray,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+):
+    """Primitive face values reconstructed in characteristic variables
+
+    Same cells and output layout as `get_face_values_into`, but each
+    stencil is projected onto the eigenvectors of the primitive Euler
+    equations of the cell being reconstructed, so each wave family is
+    limited on its own and contacts are not clipped by the sound waves.
+
+    Parameters
+    ----------
+    W : ndarray[float]
+        Primitive variables including ghost zones, shape (4, nx, ny)
+
+    ng : int
+        Number of ghost zones of `W`
+
+    gamma : float
+        Specific heat ratio
+
+    beta : float
+        Weight value of the minmod limiter, 1.0 is minmod
+
+    W_i_L, W_i_R, W_j_L, W_j_R : ndarray[float]
+        Output primitive values on the left, right, bottom and top faces
+
+    scheme : int
+        Reconstruction id from `RECONSTRUCTIONS`, MUSCL by default
+
+    limiter : int
+        Limiter id from `LIMITERS` used by MUSCL, minmod by default
+
+    Returns
+    -------
+    W_i_L, W_i_R, W_j_L, W_j_R : ndarray[float]
+        The filled output arrays
+
+    """
+    for i in range(ng - 1, W.shape[1] - ng + 1):
+        for j in range(ng - 1, W.shape[2] - ng + 1):
+            k = i - ng + 1
+            m = j - ng + 1
+
+            L, R = characteristic_faces(W, i, j, 1, 0, gamma, scheme, limiter, beta)
+            W_i_L[0, k, m], W_i_L[1, k, m], W_i_L[2, k, m], W_i_L[3, k, m] = L
+            W_i_R[0, k, m], W_i_R[1, k, m], W_i_R[2, k, m], W_i_R[3, k, m] = R
+
+            L, R = characteristic_faces(W, i, j, 0, 1, gamma, scheme, limiter, beta)
+            W_j_L[0, k, m], W_j_L[2, k, m], W_j_L[1, k, m], W_j_L[3, k, m] = L
+            W_j_R[0, k, m], W_j_R[2, k, m], W_j_R[1, k, m], W_j_R[3, k, m] = R
+
+    return W_i_L, W_i_R, W_j_L, W_j_R
@@ -2,23 +2,856 @@ import os
 import sys
 
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
 current_script_path = os.path.abspath(__file__)
 parent_directory = os.path.dirname(os.path.dirname(current_script_path))
 sys.path.append(parent_directory)
 
-from src.tools import get_fluxes_1d
+from src.eos import p_EOS
+from src.parallel import parallel_build
 
 
-@njit()
-def solve_riemann(
-    U_l: np.ndarray, U_r: np.ndarray, gamma: float, direction: str
+@njit(cache=True)
+def conserved_state(rho: float, mn: float, mt: float, E: float, gamma: float):
+    """Returns a single state given in conserved variables as the solvers
+    take it
+
+    The solvers work on tuples holding both the conserved variables and
+    the velocities and pressure of a state, so a state is converted once
+    however many times a solver uses it. The products are evaluated in
+    the same order as `get_fluxes_1d` so the fluxes are bitwise identical.
+
+    Parameters
+    ----------
+    rho : float
+        Density
+    mn : float
+        Momentum normal to the interface
+    mt : float
+        Momentum tangential to the interface
+    E : float
+        Total energy
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    rho, mn, mt, E, un, ut, p : float
+        Density, normal and tangential momentum, total energy, normal and
+        tangential velocity and pressure
+
+    """
+    un = mn / rho
+    ut = mt / rho
+    e = E / rho - 1 / 2 * rho * (un * un + ut * ut)
+
+    return rho, mn, mt, E, un, ut, p_EOS(rho, e, gamma)
+
+
+@njit(cache=True)
+def primitive_state(rho: float, un: float, ut: float, p: float, gamma: float):
+    """Returns a single state given in primitive variables as the solvers
+    take it
+
+    Same as `conserved_state` for a state given by its velocities and
+    pressure, with the total energy built with the inverse of the
+    conversion in `get_primitive_variables_2d`. There are no divisions
+    by the density.
+
+    Parameters
+    ----------
+    rho : float
+        Density
+    un : float
+        Velocity normal to the interface
+    ut : float
+        Velocity tangential to the interface
+    p : float
+        Pressure
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    rho, mn, mt, E, un, ut, p : float
+        Density, normal and tangential momentum, total energy, normal and
+        tangential velocity and pressure
+
+    """
+    E = p * (1.0 / (gamma - 1.0)) + 1 / 2 * rho * rho * (un * un + ut * ut)
+
+    return rho, rho * un, rho * ut, E, un, ut, p
+
+
+@njit(cache=True)
+def state_flux(state: tuple, ydir: bool):
+    """Returns the flux of a single state in the face-normal frame
+
+    Scalar version of `get_fluxes_1d` which takes the state as returned
+    by `conserved_state` or `primitive_state` and returns the flux in
+    the same frame, so no array is allocated.
+
+    Parameters
+    ----------
+    state : tuple
+        State from `conserved_state` or `primitive_state`
+    ydir : bool
+        True if the interface normal is the y direction
+
+    Returns
+    -------
+    f0, fn, ft, f3 : float
+        Mass, normal momentum, tangential momentum and energy fluxes
+
+    """
+    rho, mn, mt, E, un, ut, p = state
+
+    if ydir:
+        return rho * un, rho * un * un + p, rho * ut * un, un * (E + p)
+
+    return rho * un, rho * un**2 + p, rho * un * ut, un * (E + p)
+
+
+# Branch counters kept by `riemann_branch_counts`: which pressure estimate
+# was used, which region of the HLLC fan the interface flux came from, and
+# how many interfaces took the cheap path of the hybrid solver
+BRANCH_PVRS = 0
+BRANCH_TWO_RAREFACTION = 1
+BRANCH_TWO_SHOCK = 2
+BRANCH_R = 3
+BRANCH_R_STAR = 4
+BRANCH_L_STAR = 5
+BRANCH_L = 6
+BRANCH_SMOOTH = 7
+N_BRANCHES = 8
+
+BRANCH_NAMES = ["pvrs", "two_rarefaction", "two_shock", "R", "R*", "L*", "L", "smooth"]
+
+
+@njit(cache=True)
+def hllc_wave_speeds(L: tuple, R: tuple, gamma: float):
+    """Wave speed estimates of the HLLC solver at a single interface
+
+    Estimates the star pressure with the primitive variable solver, or the
+    two-rarefaction or two-shock solvers when the pressure ratio is large
+    (see [1], section 10.5), and from it the left, right and contact wave
+    speeds.
+
+    Parameters
+    ----------
+    L, R : tuple
+        Left and right states from `conserved_state` or `primitive_state`
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    un_l, ut_l, p_l, un_r, ut_r, p_r : float
+        Normal and tangential velocity and pressure of the left and
+        right states
+    S_l, S_r, S_c : float
+        Left, right and contact wave speeds
+    estimate : int
+        Pressure estimate that was used: `BRANCH_PVRS`,
+        `BRANCH_TWO_RAREFACTION` or `BRANCH_TWO_SHOCK`
+
+    References
+    -----------
+    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
+    A practical introduction. Springer.
+
+    """
+    rho_l, mn_l, mt_l, E_l, un_l, ut_l, _ = L
+    rho_r, mn_r, mt_r, E_r, un_r, ut_r, _ = R
+
+    rhoe_l = E_l - 0.5 * rho_l * (un_l**2 + ut_l**2)
+    p_l = rhoe_l * (gamma - 1.0)
+    p_l = max(p_l, 1e-5)
+
+    rhoe_r = E_r - 0.5 * rho_r * (un_r**2 + ut_r**2)
+    p_r = rhoe_r * (gamma - 1.0)
+    p_r = max(p_r, 1e-5)
+
+    # compute the sound speeds
+    c_l = max(1e-5, np.sqrt(gamma * p_l / rho_l))
+    c_r = max(1e-5, np.sqrt(gamma * p_r / rho_r))
+
+    p_max = max(p_l, p_r)
+    p_min = min(p_l, p_r)
+
+    Q = p_max / p_min
+
+    rho_avg = 0.5 * (rho_l + rho_r)
+    c_avg = 0.5 * (c_l + c_r)
+
+    # primitive variable Riemann solver (Toro, 9.3)
+    factor = rho_avg * c_avg
+
+    pstar = 0.5 * (p_l + p_r) + 0.5 * (un_l - un_r) * factor
+    ustar = 0.5 * (un_l + un_r) + 0.5 * (p_l - p_r) / factor
+
+    estimate = BRANCH_PVRS
+
+    if Q > 2 and (pstar < p_min or pstar > p_max):
+        # use a more accurate Riemann solver for the estimate here
+
+        if pstar < p_min:
+            # 2-rarefaction Riemann solver
+            estimate = BRANCH_TWO_RAREFACTION
+            z = (gamma - 1.0) / (2.0 * gamma)
+            p_lr = (p_l / p_r) ** z
+
+            ustar = (
+                p_lr * un_l / c_l + un_r / c_r + 2.0 * (p_lr - 1.0) / (gamma - 1.0)
+            ) / (p_lr / c_l + 1.0 / c_r)
+
+            pstar = 0.5 * (
+                p_l * (1.0 + (gamma - 1.0) * (un_l - ustar) / (2.0 * c_l)) ** (1.0 / z)
+                + p_r
+                * (1.0 + (gamma - 1.0) * (ustar - un_r) / (2.0 * c_r)) ** (1.0 / z)
+            )
+
+        else:
+            # 2-shock Riemann solver
+            estimate = BRANCH_TWO_SHOCK
+            A_r = 2.0 / ((gamma + 1.0) * rho_r)
+            B_r = p_r * (gamma - 1.0) / (gamma + 1.0)
+
+            A_l = 2.0 / ((gamma + 1.0) * rho_l)
+            B_l = p_l * (gamma - 1.0) / (gamma + 1.0)
+
+            # guess of the pressure
+            p_guess = max(0.0, pstar)
+
+            g_l = np.sqrt(A_l / (p_guess + B_l))
+            g_r = np.sqrt(A_r / (p_guess + B_r))
+
+            pstar = (g_l * p_l + g_r * p_r - (un_r - un_l)) / (g_l + g_r)
+
+            ustar = 0.5 * (un_l + un_r) + 0.5 * (
+                (pstar - p_r) * g_r - (pstar - p_l) * g_l
+            )
+
+    if pstar <= p_l:
+        # rarefaction
+        S_l = un_l - c_l
+    else:
+        # shock
+        S_l = un_l - c_l * np.sqrt(
+            1.0 + ((gamma + 1.0) / (2.0 * gamma)) * (pstar / p_l - 1.0)
+        )
+
+    if pstar <= p_r:
+        # rarefaction
+        S_r = un_r + c_r
+    else:
+        # shock
+        S_r = un_r + c_r * np.sqrt(
+            1.0 + ((gamma + 1.0) / (2.0 / gamma)) * (pstar / p_r - 1.0)
+        )
+
+    # This is from Toro
+    S_c = (p_r - p_l + rho_l * un_l * (S_l - un_l) - rho_r * un_r * (S_r - un_r)) / (
+        rho_l * (S_l - un_l) - rho_r * (S_r - un_r)
+    )
+
+    return un_l, ut_l, p_l, un_r, ut_r, p_r, S_l, S_r, S_c, estimate
+
+
+@njit(cache=True)
+def hllc_region(S_l: float, S_r: float, S_c: float) -> int:
+    """Returns the region of the HLLC fan that contains the interface
+
+    Parameters
+    ----------
+    S_l, S_r, S_c : float
+        Left, right and contact wave speeds
+
+    Returns
+    -------
+    int
+        `BRANCH_R`, `BRANCH_R_STAR`, `BRANCH_L_STAR` or `BRANCH_L`
+
+    """
+    if S_r <= 0.0:
+        return BRANCH_R
+
+    elif S_r > 0.0 and S_c <= 0:
+        return BRANCH_R_STAR
+
+    elif S_c > 0.0 and S_l < 0.0:
+        return BRANCH_L_STAR
+
+    return BRANCH_L
+
+
+@njit(cache=True)
+def hllc_flux(L: tuple, R: tuple, gamma: float, ydir: bool):
+    """HLLC flux at a single interface
+
+    HLLC Riemann solver outlined in Toro, adapted from page 322 (see [1]),
+    with the wave speeds from `hllc_wave_speeds`. The states are given in
+    the face-normal frame and the flux is computed inline, without any
+    temporary arrays.
+
+    Parameters
+    ----------
+    L, R : tuple
+        Left and right states from `conserved_state` or `primitive_state`
+    gamma : float
+        Specific heat ratio
+    ydir : bool
+        True if the interface normal is the y direction
+
+    Returns
+    -------
+    f0, fn, ft, f3 : float
+        Mass, normal momentum, tangential momentum and energy fluxes
+    s : float
+        Fastest signal speed at the interface, max(|S_l|, |S_r|)
+
+    References
+    -----------
+    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
+    A practical introduction. Springer.
+
+    """
+    (
+        un_l,
+        ut_l,
+        p_l,
+        un_r,
+        ut_r,
+        p_r,
+        S_l,
+        S_r,
+        S_c,
+        estimate,
+    ) = hllc_wave_speeds(L, R, gamma)
+
+    rho_l, mn_l, mt_l, E_l, _, _, _ = L
+    rho_r, mn_r, mt_r, E_r, _, _, _ = R
+
+    s = max(abs(S_l), abs(S_r))
+
+    region = hllc_region(S_l, S_r, S_c)
+
+    if region == BRANCH_R:
+        # R region
+        f0, fn, ft, f3 = state_flux(R, ydir)
+
+        return f0, fn, ft, f3, s
+
+    elif region == BRANCH_R_STAR:
+        # R* region
+        HLLCfactor = rho_r * (S_r - un_r) / (S_r - S_c)
+        E_star = HLLCfactor * (
+            E_r / rho_r + (S_c - un_r) * (S_c + p_r / (rho_r * (S_r - un_r)))
+        )
+
+        f0, fn, ft, f3 = state_flux(R, ydir)
+
+        # correct the flux
+        return (
+            f0 + S_r * (HLLCfactor - rho_r),
+            fn + S_r * (HLLCfactor * S_c - mn_r),
+            ft + S_r * (HLLCfactor * ut_r - mt_r),
+            f3 + S_r * (E_star - E_r),
+            s,
+        )
+
+    elif region == BRANCH_L_STAR:
+        # L* region
+        HLLCfactor = rho_l * (S_l - un_l) / (S_l - S_c)
+        E_star = HLLCfactor * (
+            E_l / rho_l + (S_c - un_l) * (S_c + p_l / (rho_l * (S_l - un_l)))
+        )
+
+        f0, fn, ft, f3 = state_flux(L, ydir)
+
+        # correct the flux
+        return (
+            f0 + S_l * (HLLCfactor - rho_l),
+            fn + S_l * (HLLCfactor * S_c - mn_l),
+            ft + S_l * (HLLCfactor * ut_l - mt_l),
+            f3 + S_l * (E_star - E_l),
+            s,
+        )
+
+    # L region
+    f0, fn, ft, f3 = state_flux(L, ydir)
+
+    return f0, fn, ft, f3, s
+
+
+@njit(cache=True)
+def normal_state(state: tuple, gamma: float):
+    """Returns the velocities, pressure and sound speed of a single state
+
+    Parameters
+    ----------
+    state : tuple
+        State from `conserved_state` or `primitive_state`
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    un, ut : float
+        Normal and tangential velocity
+    p : float
+        Pressure (floored like in `hllc_flux`)
+    c : float
+        Sound speed
+
+    """
+    rho, _, _, E, un, ut, _ = state
+    p = max((E - 0.5 * rho * (un**2 + ut**2)) * (gamma - 1.0), 1e-5)
+    c = max(1e-5, np.sqrt(gamma * p / rho))
+
+    return un, ut, p, c
+
+
+@njit(cache=True)
+def hll_flux(L: tuple, R: tuple, gamma: float, ydir: bool):
+    """HLL flux at a single interface
+
+    Two-wave HLL solver with the Davis wave speed estimates (see [1],
+    section 10.5). There is no star-state pressure estimate, so the
+    cost is two sound speeds and two physical fluxes, at the price of
+    smearing contact and shear waves. Arguments and returns are the
+    same as `hllc_flux`.
+
+    References
+    -----------
+    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
+    A practical introduction. Springer.
+
+    """
+    un_l, ut_l, p_l, c_l = normal_state(L, gamma)
+    un_r, ut_r, p_r, c_r = normal_state(R, gamma)
+
+    S_l = min(un_l - c_l, un_r - c_r)
+    S_r = max(un_l + c_l, un_r + c_r)
+
+    f0, fn, ft, f3 = hll_combine(S_l, S_r, L, R, ydir)
+
+    return f0, fn, ft, f3, max(abs(S_l), abs(S_r))
+
+
+@njit(cache=True)
+def hll_combine(S_l: float, S_r: float, L: tuple, R: tuple, ydir: bool):
+    """HLL flux for given left and right wave speed estimates
+
+    Parameters
+    ----------
+    S_l, S_r : float
+        Slowest and fastest signal speeds at the interface
+    L, R, ydir
+        Same as `hllc_flux`
+
+    Returns
+    -------
+    f0, fn, ft, f3 : float
+        Mass, normal momentum, tangential momentum and energy fluxes
+
+    """
+    if S_l >= 0.0:
+        return state_flux(L, ydir)
+
+    if S_r <= 0.0:
+        return state_flux(R, ydir)
+
+    f0_l, fn_l, ft_l, f3_l = state_flux(L, ydir)
+    f0_r, fn_r, ft_r, f3_r = state_flux(R, ydir)
+
+    rho_l, mn_l, mt_l, E_l, _, _, _ = L
+    rho_r, mn_r, mt_r, E_r, _, _, _ = R
+
+    inv_dS = 1.0 / (S_r - S_l)
+    SlSr = S_l * S_r
+
+    return (
+        (S_r * f0_l - S_l * f0_r + SlSr * (rho_r - rho_l)) * inv_dS,
+        (S_r * fn_l - S_l * fn_r + SlSr * (mn_r - mn_l)) * inv_dS,
+        (S_r * ft_l - S_l * ft_r + SlSr * (mt_r - mt_l)) * inv_dS,
+        (S_r * f3_l - S_l * f3_r + SlSr * (E_r - E_l)) * inv_dS,
+    )
+
+
+@njit(cache=True)
+def rusanov_flux(L: tuple, R: tuple, gamma: float, ydir: bool):
+    """Rusanov (local Lax-Friedrichs) flux at a single interface
+
+    Central flux plus dissipation scaled by the fastest signal speed at
+    the interface (see [1], section 10.5.1). The cheapest and most
+    dissipative of the solvers. Arguments and returns are the same as
+    `hllc_flux`.
+
+    References
+    -----------
+    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
+    A practical introduction. Springer.
+
+    """
+    un_l, ut_l, p_l, c_l = normal_state(L, gamma)
+    un_r, ut_r, p_r, c_r = normal_state(R, gamma)
+
+    S_max = max(abs(un_l) + c_l, abs(un_r) + c_r)
+
+    f0_l, fn_l, ft_l, f3_l = state_flux(L, ydir)
+    f0_r, fn_r, ft_r, f3_r = state_flux(R, ydir)
+
+    rho_l, mn_l, mt_l, E_l, _, _, _ = L
+    rho_r, mn_r, mt_r, E_r, _, _, _ = R
+
+    return (
+        0.5 * (f0_l + f0_r - S_max * (rho_r - rho_l)),
+        0.5 * (fn_l + fn_r - S_max * (mn_r - mn_l)),
+        0.5 * (ft_l + ft_r - S_max * (mt_r - mt_l)),
+        0.5 * (f3_l + f3_r - S_max * (E_r - E_l)),
+        S_max,
+    )
+
+
+@njit(cache=True)
+def roe_flux(L: tuple, R: tuple, gamma: float, ydir: bool):
+    """Roe flux at a single interface
+
+    Linearized Roe solver with the Harten entropy fix (see [1], chapter
+    11). The wave strengths are computed directly from the jumps, so
+    there are no powers and only one square root for the Roe-averaged
+    sound speed. Arguments and returns are the same as `hllc_flux`, the
+    signal speed being the faster of the Roe-averaged and the left and
+    right acoustic waves, as the Roe average alone can miss the fastest
+    wave of a strong shock.
+
+    References
+    -----------
+    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
+    A practical introduction. Springer.
+
+    """
+    un_l, ut_l, p_l, c_l = normal_state(L, gamma)
+    un_r, ut_r, p_r, c_r = normal_state(R, gamma)
+
+    rho_l, _, _, E_l, _, _, _ = L
+    rho_r, _, _, E_r, _, _, _ = R
+
+    H_l = (E_l + p_l) / rho_l
+    H_r = (E_r + p_r) / rho_r
+
+    # Roe averages
+    sqrt_l = np.sqrt(rho_l)
+    sqrt_r = np.sqrt(rho_r)
+    w = 1.0 / (sqrt_l + sqrt_r)
+
+    rho_t = sqrt_l * sqrt_r
+    un_t = (sqrt_l * un_l + sqrt_r * un_r) * w
+    ut_t = (sqrt_l * ut_l + sqrt_r * ut_r) * w
+    H_t = (sqrt_l * H_l + sqrt_r * H_r) * w
+    q2_t = un_t * un_t + ut_t * ut_t
+    c_t = np.sqrt(max((gamma - 1.0) * (H_t - 0.5 * q2_t), 1e-10))
+
+    # Wave strengths
+    d_p = p_r - p_l
+    d_un = un_r - un_l
+    a_1 = (d_p - rho_t * c_t * d_un) / (2.0 * c_t * c_t)
+    a_2 = (rho_r - rho_l) - d_p / (c_t * c_t)
+    a_3 = rho_t * (ut_r - ut_l)
+    a_4 = (d_p + rho_t * c_t * d_un) / (2.0 * c_t * c_t)
+
+    # Wave speeds with the Harten entropy fix on the acoustic waves
+    delta = 0.1 * c_t
+    l_1 = abs(un_t - c_t)
+    l_2 = abs(un_t)
+    l_4 = abs(un_t + c_t)
+
+    if l_1 < delta:
+        l_1 = 0.5 * (l_1 * l_1 + delta * delta) / delta
+
+    if l_4 < delta:
+        l_4 = 0.5 * (l_4 * l_4 + delta * delta) / delta
+
+    f0_l, fn_l, ft_l, f3_l = state_flux(L, ydir)
+    f0_r, fn_r, ft_r, f3_r = state_flux(R, ydir)
+
+    # Sum of |lambda_k| * alpha_k * K_k over the four waves
+    w_1 = l_1 * a_1
+    w_2 = l_2 * a_2
+    w_3 = l_2 * a_3
+    w_4 = l_4 * a_4
+
+    d_0 = w_1 + w_2 + w_4
+    d_n = w_1 * (un_t - c_t) + w_2 * un_t + w_4 * (un_t + c_t)
+    d_t = (w_1 + w_2 + w_4) * ut_t + w_3
+    d_3 = (
+        w_1 * (H_t - un_t * c_t)
+        + w_2 * 0.5 * q2_t
+        + w_3 * ut_t
+        + w_4 * (H_t + un_t * c_t)
+    )
+
+    return (
+        0.5 * (f0_l + f0_r - d_0),
+        0.5 * (fn_l + fn_r - d_n),
+        0.5 * (ft_l + ft_r - d_t),
+        0.5 * (f3_l + f3_r - d_3),
+        max(abs(un_t) + c_t, abs(un_l) + c_l, abs(un_r) + c_r),
+    )
+
+
+# Jumps below which the hybrid solver treats an interface as smooth
+HYBRID_PRESSURE_RATIO = 1.1
+HYBRID_DENSITY_RATIO = 1.1
+HYBRID_VELOCITY_JUMP = 0.1  # as a fraction of the smaller sound speed
+
+
+@njit(cache=True)
+def smooth_interface(
+    rho_l: float,
+    un_l: float,
+    ut_l: float,
+    p_l: float,
+    c_l: float,
+    rho_r: float,
+    un_r: float,
+    ut_r: float,
+    p_r: float,
+    c_r: float,
+) -> bool:
+    """Checks whether the jump across an interface is small
+
+    An interface is smooth when the pressure and density ratios are
+    close to one and the normal and tangential velocity jumps are small
+    compared with the sound speed, so there is no shock, contact or
+    shear layer to resolve.
+
+    Parameters
+    ----------
+    rho_l, un_l, ut_l, p_l, c_l : float
+        Density, normal and tangential velocity, pressure and sound speed
+        of the left state
+    rho_r, un_r, ut_r, p_r, c_r : float
+        Same for the right state
+
+    Returns
+    -------
+    bool
+        True if the cheap flux can be used at this interface
+
+    """
+    c_min = min(c_l, c_r)
+
+    return (
+        max(p_l, p_r) < HYBRID_PRESSURE_RATIO * min(p_l, p_r)
+        and max(rho_l, rho_r) < HYBRID_DENSITY_RATIO * min(rho_l, rho_r)
+        and abs(un_r - un_l) < HYBRID_VELOCITY_JUMP * c_min
+        and abs(ut_r - ut_l) < HYBRID_VELOCITY_JUMP * c_min
+    )
+
+
+@njit(cache=True)
+def hybrid_flux(L: tuple, R: tuple, gamma: float, ydir: bool):
+    """Adaptive HLL/HLLC flux at a single interface
+
+    Smooth interfaces (see `smooth_interface`) are solved with the HLL
+    flux, reusing the sound speeds computed for the check. Everything
+    else, i.e. shocks, contacts and shear layers, falls back to
+    `hllc_flux`. Arguments and returns are the same as `hllc_flux`.
+
+    """
+    un_l, ut_l, p_l, c_l = normal_state(L, gamma)
+    un_r, ut_r, p_r, c_r = normal_state(R, gamma)
+
+    if smooth_interface(L[0], un_l, ut_l, p_l, c_l, R[0], un_r, ut_r, p_r, c_r):
+        S_l = min(un_l - c_l, un_r - c_r)
+        S_r = max(un_l + c_l, un_r + c_r)
+
+        f0, fn, ft, f3 = hll_combine(S_l, S_r, L, R, ydir)
+
+        return f0, fn, ft, f3, max(abs(S_l), abs(S_r))
+
+    return hllc_flux(L, R, gamma, ydir)
+
+
+# Riemann solver registry, keyed by the `riemann_solver` input value
+HLLC = 0
+HLL = 1
+RUSANOV = 2
+ROE = 3
+HYBRID = 4
+
+RIEMANN_SOLVERS = {
+    "hllc": HLLC,
+    "hll": HLL,
+    "rusanov": RUSANOV,
+    "roe": ROE,
+    "hybrid": HYBRID,
+}
+
+
+def get_riemann_solver(name: str) -> int:
+    """Looks up a Riemann solver in the registry
+
+    Parameters
+    ----------
+    name : str
+        Name of the solver: 'hllc', 'hll', 'rusanov', 'roe' or 'hybrid'
+
+    Returns
+    -------
+    int
+        Solver id to be passed to the Riemann kernels
+
+    """
+    if name.lower() in RIEMANN_SOLVERS:
+        return RIEMANN_SOLVERS[name.lower()]
+
+    else:
+        raise ValueError("Please use an implemented Riemann solver")
+
+
+@njit(cache=True)
+def state_riemann_flux(solver: int, L: tuple, R: tuple, gamma: float, ydir: bool):
+    """Flux at a single interface from the selected Riemann solver
+
+    Parameters
+    ----------
+    solver : int
+        Solver id from `RIEMANN_SOLVERS`
+    L, R, gamma, ydir
+        Same as `hllc_flux`
+
+    Returns
+    -------
+    f0, fn, ft, f3 : float
+        Mass, normal momentum, tangential momentum and energy fluxes
+    s : float
+        Fastest signal speed the solver used at the interface
+
+    """
+    if solver == HLL:
+        return hll_flux(L, R, gamma, ydir)
+
+    elif solver == RUSANOV:
+        return rusanov_flux(L, R, gamma, ydir)
+
+    elif solver == ROE:
+        return roe_flux(L, R, gamma, ydir)
+
+    elif solver == HYBRID:
+        return hybrid_flux(L, R, gamma, ydir)
+
+    return hllc_flux(L, R, gamma, ydir)
+
+
+@njit(cache=True)
+def riemann_flux(
+    solver: int,
+    rho_l: float,
+    mn_l: float,
+    mt_l: float,
+    E_l: float,
+    rho_r: float,
+    mn_r: float,
+    mt_r: float,
+    E_r: float,
+    gamma: float,
+    ydir: bool,
+):
+    """Flux at a single interface between two conserved states
+
+    Parameters
+    ----------
+    solver : int
+        Solver id from `RIEMANN_SOLVERS`
+    rho_l, mn_l, mt_l, E_l : float
+        Density, normal momentum, tangential momentum and total energy
+        of the left state
+    rho_r, mn_r, mt_r, E_r : float
+        Density, normal momentum, tangential momentum and total energy
+        of the right state
+    gamma : float
+        Specific heat ratio
+    ydir : bool
+        True if the interface normal is the y direction
+
+    Returns
+    -------
+    f0, fn, ft, f3, s : float
+        Same as `state_riemann_flux`
+
+    """
+    return state_riemann_flux(
+        solver,
+        conserved_state(rho_l, mn_l, mt_l, E_l, gamma),
+        conserved_state(rho_r, mn_r, mt_r, E_r, gamma),
+        gamma,
+        ydir,
+    )
+
+
+@njit(cache=True)
+def riemann_flux_primitive(
+    solver: int,
+    rho_l: float,
+    un_l: float,
+    ut_l: float,
+    p_l: float,
+    rho_r: float,
+    un_r: float,
+    ut_r: float,
+    p_r: float,
+    gamma: float,
+    ydir: bool,
+):
+    """Flux at a single interface between two primitive states
+
+    Same as `riemann_flux` for states given by their velocities and
+    pressure, which the solvers use without dividing by the density.
+
+    Parameters
+    ----------
+    solver : int
+        Solver id from `RIEMANN_SOLVERS`
+    rho_l, un_l, ut_l, p_l : float
+        Density, normal velocity, tangential velocity and pressure of the
+        left state
+    rho_r, un_r, ut_r, p_r : float
+        Density, normal velocity, tangential velocity and pressure of the
+        right state
+    gamma : float
+        Specific heat ratio
+    ydir : bool
+        True if the interface normal is the y direction
+
+    Returns
+    -------
+    f0, fn, ft, f3, s : float
+        Same as `state_riemann_flux`
+
+    """
+    return state_riemann_flux(
+        solver,
+        primitive_state(rho_l, un_l, ut_l, p_l, gamma),
+        primitive_state(rho_r, un_r, ut_r, p_r, gamma),
+        gamma,
+        ydir,
+    )
+
+
+@njit(cache=True)
+def solve_riemann_x(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, F: np.ndarray, solver: int = HLLC
 ) -> np.ndarray:
-    """Solve the Riemann problem
+    """Riemann fluxes through the x interfaces
 
-    Solves the Riemann problem using a HLLC Riemann solver - outlined in Toro
-    adapted from page 322 (see [1])
+    Direction-specialized kernel: the x momentum is the normal component
+    for every interface, so there is no direction test in the loop.
+    `solve_riemann_x_parallel` is the same kernel compiled with
+    ``parallel=True``, which splits the rows of interfaces across threads.
 
     Parameters
     ----------
@@ -28,211 +861,540 @@ def solve_riemann(
         Conserved variables at the right cell face
     gamma : float
         Specific heat ratio
-    direction : str
-        Specify the 'x' or 'y' direction
+    F : ndarray[float]
+        Output array for the flux, same shape as U_l
+    solver : int
+        Riemann solver id from `RIEMANN_SOLVERS`, HLLC by default
 
     Returns
     -------
     F : ndarray[float]
-        The flux in the specified direction returned from the
-        Riemann problem
+        The x flux returned from the Riemann problem (the same array
+        that was passed in)
 
+    """
+    for i in prange(U_r.shape[1]):
+        for j in range(U_r.shape[2]):
+            f0, f1, f2, f3, _ = riemann_flux(
+                solver,
+                U_l[0, i, j],
+                U_l[1, i, j],
+                U_l[2, i, j],
+                U_l[3, i, j],
+                U_r[0, i, j],
+                U_r[1, i, j],
+                U_r[2, i, j],
+                U_r[3, i, j],
+                gamma,
+                False,
+            )
 
-    References
-    -----------
-    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
-    A practical introduction. Springer.
+            F[0, i, j] = f0
+            F[1, i, j] = f1
+            F[2, i, j] = f2
+            F[3, i, j] = f3
 
-    """
+    return F
 
-    U_state = np.zeros(4)
-    F = np.zeros_like(U_l)
 
-    for i in range(U_r.shape[1]):
+@njit(cache=True)
+def solve_riemann_y(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, F: np.ndarray, solver: int = HLLC
+) -> np.ndarray:
+    """Riemann fluxes through the y interfaces
+
+    Same as `solve_riemann_x`, with the momentum components swapped once
+    when the states are read and again when the flux is written.
+    `solve_riemann_y_parallel` is the threaded build of this kernel.
+
+    Parameters
+    ----------
+    U_l : ndarray[float]
+        Conserved variables at the lower cell face
+    U_r : ndarray[float]
+        Conserved variables at the upper cell face
+    gamma : float
+        Specific heat ratio
+    F : ndarray[float]
+        Output array for the flux, same shape as U_l
+    solver : int
+        Riemann solver id from `RIEMANN_SOLVERS`, HLLC by default
+
+    Returns
+    -------
+    F : ndarray[float]
+        The y flux returned from the Riemann problem (the same array
+        that was passed in)
+
+    """
+    for i in prange(U_r.shape[1]):
         for j in range(U_r.shape[2]):
-            rho_l = U_l[0, i, j]
-
-            if direction == "x":
-                un_l = U_l[1, i, j] / rho_l
-                ut_l = U_l[2, i, j] / rho_l
-            else:
-                un_l = U_l[2, i, j] / rho_l
-                ut_l = U_l[1, i, j] / rho_l
-
-            E_l = U_l[3, i, j]
-            rhoe_l = E_l - 0.5 * rho_l * (un_l**2 + ut_l**2)
-            p_l = rhoe_l * (gamma - 1.0)
-            p_l = max(p_l, 1e-5)
-
-            rho_r = U_r[0, i, j]
-
-            if direction == "x":
-                un_r = U_r[1, i, j] / rho_r
-                ut_r = U_r[2, i, j] / rho_r
-            else:
-                un_r = U_r[2, i, j] / rho_r
-                ut_r = U_r[1, i, j] / rho_r
-
-            E_r = U_r[3, i, j]
-            rhoe_r = E_r - 0.5 * rho_r * (un_r**2 + ut_r**2)
-            p_r = rhoe_r * (gamma - 1.0)
-            p_r = max(p_r, 1e-5)
-
-            # compute the sound speeds
-            c_l = max(1e-5, np.sqrt(gamma * p_l / rho_l))
-            c_r = max(1e-5, np.sqrt(gamma * p_r / rho_r))
-
-            p_max = max(p_l, p_r)
-            p_min = min(p_l, p_r)
-
-            Q = p_max / p_min
-
-            rho_avg = 0.5 * (rho_l + rho_r)
-            c_avg = 0.5 * (c_l + c_r)
-
-            # primitive variable Riemann solver (Toro, 9.3)
-            factor = rho_avg * c_avg
-
-            pstar = 0.5 * (p_l + p_r) + 0.5 * (un_l - un_r) * factor
-            ustar = 0.5 * (un_l + un_r) + 0.5 * (p_l - p_r) / factor
-
-            if Q > 2 and (pstar < p_min or pstar > p_max):
-                # use a more accurate Riemann solver for the estimate here
-
-                if pstar < p_min:
-                    # 2-rarefaction Riemann solver
-                    z = (gamma - 1.0) / (2.0 * gamma)
-                    p_lr = (p_l / p_r) ** z
-
-                    ustar = (
-                        p_lr * un_l / c_l
-                        + un_r / c_r
-                        + 2.0 * (p_lr - 1.0) / (gamma - 1.0)
-                    ) / (p_lr / c_l + 1.0 / c_r)
-
-                    pstar = 0.5 * (
-                        p_l
-                        * (1.0 + (gamma - 1.0) * (un_l - ustar) / (2.0 * c_l))
-                        ** (1.0 / z)
-                        + p_r
-                        * (1.0 + (gamma - 1.0) * (ustar - un_r) / (2.0 * c_r))
-                        ** (1.0 / z)
-                    )
+            f0, f2, f1, f3, _ = riemann_flux(
+                solver,
+                U_l[0, i, j],
+                U_l[2, i, j],
+                U_l[1, i, j],
+                U_l[3, i, j],
+                U_r[0, i, j],
+                U_r[2, i, j],
+                U_r[1, i, j],
+                U_r[3, i, j],
+                gamma,
+                True,
+            )
 
-                else:
-                    # 2-shock Riemann solver
-                    A_r = 2.0 / ((gamma + 1.0) * rho_r)
-                    B_r = p_r * (gamma - 1.0) / (gamma + 1.0)
+            F[0, i, j] = f0
+            F[1, i, j] = f1
+            F[2, i, j] = f2
+            F[3, i, j] = f3
+
+    return F
+
+
+@njit(cache=True)
+def riemann_update(
+    U_i_L: np.ndarray,
+    U_i_R: np.ndarray,
+    U_j_L: np.ndarray,
+    U_j_R: np.ndarray,
+    gamma: float,
+    dtdx1: float,
+    dtdx2: float,
+    Un: np.ndarray,
+    ng: int,
+    flux_rows: np.ndarray,
+    wave_speeds: np.ndarray,
+    solver: int = HLLC,
+    primitive: bool = False,
+) -> np.ndarray:
+    """Riemann solve fused with the conservative update of Un
 
-                    A_l = 2.0 / ((gamma + 1.0) * rho_l)
-                    B_l = p_l * (gamma - 1.0) / (gamma + 1.0)
+    Each interface flux is accumulated into the cells it separates right
+    after it is computed, so no flux arrays are stored. The x fluxes of
+    one row of interfaces are kept in a small rolling buffer. Once the
+    next row is done, the row of cells between them is updated, with the
+    y fluxes along the row computed on the fly and the previous one
+    carried over. The products and sums are those of `solve_riemann_x`,
+    `solve_riemann_y` and the update on the flux arrays, so the results
+    are bitwise identical. Only the fluxes the update uses are computed.
 
-                    # guess of the pressure
-                    p_guess = max(0.0, pstar)
+    The rows of cells are split into one block per entry of `flux_rows`.
+    `riemann_update_parallel` is the threaded build, which runs the
+    blocks on separate threads. The interface row between two blocks is
+    solved by both of them.
 
-                    g_l = np.sqrt(A_l / (p_guess + B_l))
-                    g_r = np.sqrt(A_r / (p_guess + B_r))
+    Each block also raises its row of `wave_speeds` to the fastest x and y
+    signal speeds of the interfaces it solved, which the solvers computed
+    anyway, so the timestep of the next step can be taken from them
+    without another pass over the mesh.
 
-                    pstar = (g_l * p_l + g_r * p_r - (un_r - un_l)) / (g_l + g_r)
+    With `primitive` the face values are density, velocities and
+    pressure, as predicted by `primitive_hancock_into`, and the solvers
+    take them without dividing by the density.
 
-                    ustar = 0.5 * (un_l + un_r) + 0.5 * (
-                        (pstar - p_r) * g_r - (pstar - p_l) * g_l
+    Parameters
+    ----------
+    U_i_L, U_i_R, U_j_L, U_j_R : ndarray[float]
+        Left, right, bottom and top face values of the interior cells and
+        one ghost layer, shape (nvar, nx1 + 2, nx2 + 2), conserved unless
+        `primitive`
+    gamma : float
+        Specific heat ratio
+    dtdx1, dtdx2 : float
+        Timestep over the cell sizes
+    Un : ndarray[float]
+        Conserved variables including ghost zones, updated in place
+    ng : int
+        Number of ghost zones of Un
+    flux_rows : ndarray[float]
+        Scratch for two rows of x fluxes per block, shape
+        (n_blocks, 2, nvar, nx2)
+    wave_speeds : ndarray[float64]
+        Fastest x and y signal speeds seen by each block, shape
+        (n_blocks, 2), raised in place
+    solver : int
+        Riemann solver id from `RIEMANN_SOLVERS`, HLLC by default
+    primitive : bool
+        True if the face values are primitive variables
+
+    Returns
+    -------
+    Un : ndarray[float]
+        The updated conserved variables
+
+    """
+    nx1 = Un.shape[1] - 2 * ng
+    nx2 = Un.shape[2] - 2 * ng
+    n_blocks = min(flux_rows.shape[0], nx1)
+
+    for block in prange(n_blocks):
+        start = block * nx1 // n_blocks
+        end = (block + 1) * nx1 // n_blocks
+
+        F_prev = flux_rows[block, 0]
+        F_next = flux_rows[block, 1]
+
+        s1 = wave_speeds[block, 0]
+        s2 = wave_speeds[block, 1]
+
+        # Interface row a lies between cell rows a - 1 and a
+        for a in range(start, end + 1):
+            for m in range(nx2):
+                if primitive:
+                    (
+                        F_next[0, m],
+                        F_next[1, m],
+                        F_next[2, m],
+                        F_next[3, m],
+                        s,
+                    ) = riemann_flux_primitive(
+                        solver,
+                        U_i_R[0, a, m + 1],
+                        U_i_R[1, a, m + 1],
+                        U_i_R[2, a, m + 1],
+                        U_i_R[3, a, m + 1],
+                        U_i_L[0, a + 1, m + 1],
+                        U_i_L[1, a + 1, m + 1],
+                        U_i_L[2, a + 1, m + 1],
+                        U_i_L[3, a + 1, m + 1],
+                        gamma,
+                        False,
                     )
 
-            if pstar <= p_l:
-                # rarefaction
-                S_l = un_l - c_l
-            else:
-                # shock
-                S_l = un_l - c_l * np.sqrt(
-                    1.0 + ((gamma + 1.0) / (2.0 * gamma)) * (pstar / p_l - 1.0)
-                )
-
-            if pstar <= p_r:
-                # rarefaction
-                S_r = un_r + c_r
-            else:
-                # shock
-                S_r = un_r + c_r * np.sqrt(
-                    1.0 + ((gamma + 1.0) / (2.0 / gamma)) * (pstar / p_r - 1.0)
-                )
-
-            # This is from Toro
-            S_c = (
-                p_r - p_l + rho_l * un_l * (S_l - un_l) - rho_r * un_r * (S_r - un_r)
-            ) / (rho_l * (S_l - un_l) - rho_r * (S_r - un_r))
-
-            # Simpler assumption
-            # S_c = ustar
-
-            if S_r <= 0.0:
-                # R region
-                U_state[:] = U_r[:, i, j]
-
-                if direction == "x":
-                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "x")
                 else:
-                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "y")
+                    (
+                        F_next[0, m],
+                        F_next[1, m],
+                        F_next[2, m],
+                        F_next[3, m],
+                        s,
+                    ) = riemann_flux(
+                        solver,
+                        U_i_R[0, a, m + 1],
+                        U_i_R[1, a, m + 1],
+                        U_i_R[2, a, m + 1],
+                        U_i_R[3, a, m + 1],
+                        U_i_L[0, a + 1, m + 1],
+                        U_i_L[1, a + 1, m + 1],
+                        U_i_L[2, a + 1, m + 1],
+                        U_i_L[3, a + 1, m + 1],
+                        gamma,
+                        False,
+                    )
 
-            elif S_r > 0.0 and S_c <= 0:
-                # R* region
-                HLLCfactor = rho_r * (S_r - un_r) / (S_r - S_c)
+                s1 = max(s1, s)
 
-                U_state[0] = HLLCfactor
+            if a > start:
+                k = a - 1
 
-                if direction == "x":
-                    U_state[1] = HLLCfactor * S_c
-                    U_state[2] = HLLCfactor * ut_r
-                else:
-                    U_state[1] = HLLCfactor * ut_r
-                    U_state[2] = HLLCfactor * S_c
+                g0 = 0.0
+                g1 = 0.0
+                g2 = 0.0
+                g3 = 0.0
 
-                U_state[3] = HLLCfactor * (
-                    U_r[3, i, j] / rho_r
-                    + (S_c - un_r) * (S_c + p_r / (rho_r * (S_r - un_r)))
-                )
+                # Interface b lies between cells b - 1 and b of the row
+                for b in range(nx2 + 1):
+                    if primitive:
+                        h0, h2, h1, h3, s = riemann_flux_primitive(
+                            solver,
+                            U_j_R[0, k + 1, b],
+                            U_j_R[2, k + 1, b],
+                            U_j_R[1, k + 1, b],
+                            U_j_R[3, k + 1, b],
+                            U_j_L[0, k + 1, b + 1],
+                            U_j_L[2, k + 1, b + 1],
+                            U_j_L[1, k + 1, b + 1],
+                            U_j_L[3, k + 1, b + 1],
+                            gamma,
+                            True,
+                        )
 
-                if direction == "x":
-                    # find the flux on the right interface
-                    F[:, i, j] = get_fluxes_1d(U_r[:, i, j], gamma, "x")
-                else:
-                    F[:, i, j] = get_fluxes_1d(U_r[:, i, j], gamma, "y")
-                # correct the flux
-                F[:, i, j] = F[:, i, j] + S_r * (U_state[:] - U_r[:, i, j])
+                    else:
+                        h0, h2, h1, h3, s = riemann_flux(
+                            solver,
+                            U_j_R[0, k + 1, b],
+                            U_j_R[2, k + 1, b],
+                            U_j_R[1, k + 1, b],
+                            U_j_R[3, k + 1, b],
+                            U_j_L[0, k + 1, b + 1],
+                            U_j_L[2, k + 1, b + 1],
+                            U_j_L[1, k + 1, b + 1],
+                            U_j_L[3, k + 1, b + 1],
+                            gamma,
+                            True,
+                        )
 
-            elif S_c > 0.0 and S_l < 0.0:
-                # L* region
-                HLLCfactor = rho_l * (S_l - un_l) / (S_l - S_c)
+                    s2 = max(s2, s)
 
-                U_state[0] = HLLCfactor
+                    if b > 0:
+                        m = b - 1
 
-                if direction == "x":
-                    U_state[1] = HLLCfactor * S_c
-                    U_state[2] = HLLCfactor * ut_l
-                else:
-                    U_state[1] = HLLCfactor * ut_l
-                    U_state[2] = HLLCfactor * S_c
+                        Un[0, k + ng, m + ng] += dtdx1 * (
+                            F_prev[0, m] - F_next[0, m]
+                        ) + dtdx2 * (g0 - h0)
+                        Un[1, k + ng, m + ng] += dtdx1 * (
+                            F_prev[1, m] - F_next[1, m]
+                        ) + dtdx2 * (g1 - h1)
+                        Un[2, k + ng, m + ng] += dtdx1 * (
+                            F_prev[2, m] - F_next[2, m]
+                        ) + dtdx2 * (g2 - h2)
+                        Un[3, k + ng, m + ng] += dtdx1 * (
+                            F_prev[3, m] - F_next[3, m]
+                        ) + dtdx2 * (g3 - h3)
 
-                U_state[3] = HLLCfactor * (
-                    U_l[3, i, j] / rho_l
-                    + (S_c - un_l) * (S_c + p_l / (rho_l * (S_l - un_l)))
-                )
+                    g0 = h0
+                    g1 = h1
+                    g2 = h2
+                    g3 = h3
 
-                if direction == "x":
-                    # find the flux on the right interface
-                    F[:, i, j] = get_fluxes_1d(U_l[:, i, j], gamma, "x")
-                else:
-                    F[:, i, j] = get_fluxes_1d(U_l[:, i, j], gamma, "y")
+            F_prev, F_next = F_next, F_prev
 
-                # correct the flux
-                F[:, i, j] = F[:, i, j] + S_l * (U_state[:] - U_l[:, i, j])
+        wave_speeds[block, 0] = s1
+        wave_speeds[block, 1] = s2
 
-            else:
-                U_state[:] = U_l[:, i, j]
+    return Un
 
-                if direction == "x":
-                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "x")
-                else:
-                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "y")
 
-    return F
+solve_riemann_x_parallel = parallel_build(solve_riemann_x)
+solve_riemann_y_parallel = parallel_build(solve_riemann_y)
+riemann_update_parallel = parallel_build(riemann_update)
+
+
+@njit(parallel=True, cache=True)
+def count_smooth_interfaces(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, direction: str
+) -> int:
+    """Counts the interfaces the hybrid solver treats as smooth
+
+    Applies the same `smooth_interface` check as `hybrid_flux`, so the
+    fraction of interfaces that took the cheap path can be reported
+    without adding counters to the solve itself.
+
+    Parameters
+    ----------
+    U_l : ndarray[float]
+        Conserved variables at the left cell face
+    U_r : ndarray[float]
+        Conserved variables at the right cell face
+    gamma : float
+        Specific heat ratio
+    direction : str
+        Specify the 'x' or 'y' direction
+
+    Returns
+    -------
+    int
+        Number of smooth interfaces
+
+    """
+    n = 2 if direction == "y" else 1
+    t = 1 if direction == "y" else 2
+
+    count = 0
+    for i in prange(U_r.shape[1]):
+        for j in range(U_r.shape[2]):
+            L = conserved_state(
+                U_l[0, i, j], U_l[n, i, j], U_l[t, i, j], U_l[3, i, j], gamma
+            )
+            R = conserved_state(
+                U_r[0, i, j], U_r[n, i, j], U_r[t, i, j], U_r[3, i, j], gamma
+            )
+
+            un_l, ut_l, p_l, c_l = normal_state(L, gamma)
+            un_r, ut_r, p_r, c_r = normal_state(R, gamma)
+
+            if smooth_interface(
+                U_l[0, i, j], un_l, ut_l, p_l, c_l, U_r[0, i, j], un_r, ut_r, p_r, c_r
+            ):
+                count += 1
+
+    return count
+
+
+@njit(parallel=True, cache=True)
+def riemann_branch_counts(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, direction: str, solver: int
+) -> np.ndarray:
+    """Counts which branches of the HLLC solver each interface takes
+
+    Instrumentation kernel, separate from the solve so the normal
+    kernels carry no counters. For each interface it records the
+    pressure estimate and the HLLC fan region (see `BRANCH_NAMES`). With
+    the hybrid solver, interfaces that take the cheap path are counted
+    as `BRANCH_SMOOTH` instead. For the other solvers the counts show
+    what HLLC would have done on the same states.
+
+    Parameters
+    ----------
+    U_l : ndarray[float]
+        Conserved variables at the left cell face
+    U_r : ndarray[float]
+        Conserved variables at the right cell face
+    gamma : float
+        Specific heat ratio
+    direction : str
+        Specify the 'x' or 'y' direction
+    solver : int
+        Riemann solver id from `RIEMANN_SOLVERS`
+
+    Returns
+    -------
+    ndarray[int]
+        Number of interfaces in each branch, indexed as `BRANCH_NAMES`
+
+    """
+    n = 2 if direction == "y" else 1
+    t = 1 if direction == "y" else 2
+
+    # One row of counters per row of interfaces, so threads never share one
+    row_counts = np.zeros((U_r.shape[1], N_BRANCHES), dtype=np.int64)
+
+    for i in prange(U_r.shape[1]):
+        for j in range(U_r.shape[2]):
+            L = conserved_state(
+                U_l[0, i, j], U_l[n, i, j], U_l[t, i, j], U_l[3, i, j], gamma
+            )
+            R = conserved_state(
+                U_r[0, i, j], U_r[n, i, j], U_r[t, i, j], U_r[3, i, j], gamma
+            )
+
+            if solver == HYBRID:
+                un_l, ut_l, p_l, c_l = normal_state(L, gamma)
+                un_r, ut_r, p_r, c_r = normal_state(R, gamma)
+
+                if smooth_interface(
+                    L[0], un_l, ut_l, p_l, c_l, R[0], un_r, ut_r, p_r, c_r
+                ):
+                    row_counts[i, BRANCH_SMOOTH] += 1
+                    continue
+
+            (
+                un_l,
+                ut_l,
+                p_l,
+                un_r,
+                ut_r,
+                p_r,
+                S_l,
+                S_r,
+                S_c,
+                estimate,
+            ) = hllc_wave_speeds(L, R, gamma)
+
+            row_counts[i, estimate] += 1
+            row_counts[i, hllc_region(S_l, S_r, S_c)] += 1
+
+    return row_counts.sum(axis=0)
+
+
+@njit(cache=True)
+def solve_riemann_into(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, direction: str, F: np.ndarray
+) -> np.ndarray:
+    """Solve the Riemann problem into a preallocated flux array
+
+    Thin wrapper over `solve_riemann_x` and `solve_riemann_y`. The flux
+    at each interface is computed inline and written straight into `F`,
+    so no memory is allocated per interface.
+
+    Parameters
+    ----------
+    U_l : ndarray[float]
+        Conserved variables at the left cell face
+    U_r : ndarray[float]
+        Conserved variables at the right cell face
+    gamma : float
+        Specific heat ratio
+    direction : str
+        Specify the 'x' or 'y' direction
+    F : ndarray[float]
+        Output array for the flux, same shape as U_l
+
+    Returns
+    -------
+    F : ndarray[float]
+        The flux in the specified direction returned from the
+        Riemann problem (the same array that was passed in)
+
+    """
+    if direction == "x":
+        return solve_riemann_x(U_l, U_r, gamma, F)
+
+    return solve_riemann_y(U_l, U_r, gamma, F)
+
+
+@njit(cache=True)
+def solve_riemann_into_parallel(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, direction: str, F: np.ndarray
+) -> np.ndarray:
+    """Multi-threaded version of `solve_riemann_into`
+
+    Thin wrapper over `solve_riemann_x_parallel` and
+    `solve_riemann_y_parallel`. Rows of interfaces are split across numba
+    threads, and each interface is solved in scalar registers, so nothing
+    is shared between threads except the read-only inputs and disjoint
+    rows of `F`. The number of threads is set with
+    `numba.set_num_threads` (see `set_threads` in tools.py).
+
+    Parameters
+    ----------
+    U_l : ndarray[float]
+        Conserved variables at the left cell face
+    U_r : ndarray[float]
+        Conserved variables at the right cell face
+    gamma : float
+        Specific heat ratio
+    direction : str
+        Specify the 'x' or 'y' direction
+    F : ndarray[float]
+        Output array for the flux, same shape as U_l
+
+    Returns
+    -------
+    F : ndarray[float]
+        The flux in the specified direction returned from the
+        Riemann problem (the same array that was passed in)
+
+    """
+    if direction == "x":
+        return solve_riemann_x_parallel(U_l, U_r, gamma, F)
+
+    return solve_riemann_y_parallel(U_l, U_r, gamma, F)
+
+
+@njit(cache=True)
+def solve_riemann(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, direction: str
+) -> np.ndarray:
+    """Solve the Riemann problem
+
+    Solves the Riemann problem using a HLLC Riemann solver - outlined in Toro
+    adapted from page 322 (see [1]). Thin wrapper which allocates the flux
+    array and calls the direction-specialized kernel.
+
+    Parameters
+    ----------
+    U_l : ndarray[float]
+        Conserved variables at the left cell face
+    U_r : ndarray[float]
+        Conserved variables at the right cell face
+    gamma : float
+        Specific heat ratio
+    direction : str
+        Specify the 'x' or 'y' direction
+
+    Returns
+    -------
+    F : ndarray[float]
+        The flux in the specified direction returned from the
+        Riemann problem
+
+
+    References
+    -----------
+    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
+    A practical introduction. Springer.
+
+    """
+
+    return solve_riemann_into(U_l, U_r, gamma, direction, np.zeros_like(U_l))
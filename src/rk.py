@@ -0,0 +1,83 @@
+###################################################################
+#                                                                 #
+#     Strong stability preserving Runge-Kutta stage weights       #
+#                                                                 #
+###################################################################
+
+import os
+import sys
+
+import numpy as np
+from numba import njit, prange
+
+current_script_path = os.path.abspath(__file__)
+parent_directory = os.path.dirname(os.path.dirname(current_script_path))
+sys.path.append(parent_directory)
+
+from src.parallel import parallel_build
+
+# Weight of the start of step state in each stage of the Shu-Osher form,
+# U = a U0 + (1 - a) (U + dt L(U)), of the SSP Runge-Kutta integrators
+SSP_WEIGHTS = {
+    "rk2": (0.0, 1 / 2),
+    "rk3": (0.0, 3 / 4, 1 / 3),
+}
+
+
+def get_ssp_weights(name: str) -> tuple:
+    """Looks up the stage weights of an SSP Runge-Kutta integrator
+
+    Parameters
+    ----------
+    name : str
+        Name of the integrator: 'rk2' or 'rk3'
+
+    Returns
+    -------
+    tuple
+        Weight of the start of step state in each stage
+
+    """
+    if name.lower() in SSP_WEIGHTS:
+        return SSP_WEIGHTS[name.lower()]
+
+    else:
+        raise ValueError("Please use an implemented SSP Runge-Kutta integrator")
+
+
+@njit(cache=True)
+def ssp_combine(Un: np.ndarray, U0: np.ndarray, ng: int, a: float) -> np.ndarray:
+    """Convex combination of a stage with the start of step state
+
+    Sets the interior of Un to a U0 + (1 - a) Un, the ghost zones are
+    left to the next boundary fill. `ssp_combine_parallel`, the threaded
+    build, splits the rows of cells over the numba threads.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables after the stage's update, combined in place
+    U0 : ndarray[float]
+        Conserved variables at the start of the step, same shape as Un
+    ng : int
+        Number of ghost zones
+    a : float
+        Weight of U0
+
+    Returns
+    -------
+    Un : ndarray[float]
+        The combined conserved variables
+
+    """
+    b = 1.0 - a
+
+    for i in prange(ng, Un.shape[1] - ng):
+        for n in range(Un.shape[0]):
+            for j in range(ng, Un.shape[2] - ng):
+                Un[n, i, j] = a * U0[n, i, j] + b * Un[n, i, j]
+
+    return Un
+
+
+ssp_combine_parallel = parallel_build(ssp_combine)
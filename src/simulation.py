@@ -0,0 +1,478 @@
+###################################################################
+#                                                                 #
+#     Simulation object driving a problem through time in-process #
+#                                                                 #
+###################################################################
+
+import os
+import sys
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+current_script_path = os.path.abspath(__file__)
+parent_directory = os.path.dirname(os.path.dirname(current_script_path))
+sys.path.append(parent_directory)
+
+from src import numpy_backend
+from src.decomposition import DomainDecomposition
+from src.input import FIEFS_Input
+from src.integrator import ctu_step, muscl_hancock_step, split_step, ssp_rk_step
+from src.mesh import FIEFS_Array, Workspace, get_precision
+from src.reconstruct import get_limiter, get_reconstruction
+from src.riemann import get_riemann_solver
+from src.tiles import threaded_timestep
+from src.tools import calculate_timestep, set_threads, wave_speed_timestep
+
+
+class Simulation:
+    """Owns the mesh, workspace, time and iteration count of one problem
+
+    Builds the mesh from the input, sets the initial conditions with the
+    problem generator and selects the kernels from the input keys, so a
+    single Python process can run any number of cases back to back
+    without re-importing or recompiling anything.
+
+    Parameters
+    ----------
+    pin : FIEFS_Input
+        Parsed input of the problem
+
+    problem_generator : Callable[[FIEFS_Input, FIEFS_Array], None]
+        Sets the initial conditions on the mesh
+
+    dtype : dtype
+        Type of the conserved variables, set by the `precision` of the
+        input if not given
+
+    Attributes
+    ----------
+    pin : FIEFS_Input
+        Input of the problem
+
+    pmesh : FIEFS_Array
+        Mesh holding the conserved variables
+
+    ws : Workspace
+        Scratch buffers of the step, None when the mesh is split over
+        processes
+
+    dtype, accum_dtype : dtype
+        Type of the mesh and face values, and type the fluxes are
+        accumulated in
+
+    t : float
+        Current time
+
+    iter : int
+        Number of steps taken
+
+    tmax, cfl, gamma : float
+        End time, CFL number and specific heat ratio from the input
+
+    solver, reconstruction, limiter : int
+        Registry ids of the Riemann solver, reconstruction and limiter
+
+    variables : str
+        Variables the reconstruction works on
+
+    num_threads : int
+        Threads used by the parallel kernels, or by the thread pool of the
+        tiled step
+
+    backend : str
+        Kernel backend the step runs on, 'numba' or 'numpy'
+
+    tile_size : int
+        Cells per side of the tiles of the step, 0 if untiled
+
+    num_ranks : int
+        Processes the mesh is split over along x1
+
+    ranks : DomainDecomposition
+        Processes stepping the slabs of the mesh, None on one process
+
+    integrator : str
+        Time integrator, 'unsplit' for the MUSCL-Hancock step of both
+        directions at once, 'split' for Strang split sweeps, 'ctu' for
+        corner transport upwind, or 'rk2' and 'rk3' for the SSP
+        Runge-Kutta integrators of the method of lines
+
+    timestep_mode : str
+        'reduction' to reduce the crossing time over the mesh every step,
+        or 'riemann' to take it from the signal speeds of the last step's
+        Riemann solves
+
+    timestep_safety : float
+        Fraction of the CFL step taken from the Riemann signal speeds, 1
+        unless set lower for flows whose speeds grow quickly
+
+    next_dt : float
+        Timestep from the Riemann signal speeds of the last step, None
+        until the first step is taken or when it is not available
+
+    """
+
+    def __init__(
+        self,
+        pin: FIEFS_Input,
+        problem_generator: Callable[[FIEFS_Input, FIEFS_Array], None],
+        dtype: np.dtype = None,
+    ) -> None:
+        self.pin = pin
+
+        # Storage and accumulation types, double unless set in the input file
+        if dtype is None:
+            self.dtype, self.accum_dtype = get_precision(
+                pin.value_dict.get("precision", "double")
+            )
+        else:
+            self.dtype, self.accum_dtype = dtype, dtype
+
+        # Initialize the mesh and the initial conditions
+        self.pmesh = FIEFS_Array(pin, self.dtype)
+        problem_generator(pin, self.pmesh)
+
+        self.t = 0.0
+        self.iter = 0
+
+        self.tmax = float(pin.value_dict["tmax"])
+        self.cfl = float(pin.value_dict["CFL"])
+        self.gamma = float(pin.value_dict["gamma"])
+
+        # Riemann solver from the registry, HLLC unless set in the input file
+        self.solver = get_riemann_solver(pin.value_dict.get("riemann_solver", "hllc"))
+
+        # Reconstruction and slope limiter from the registries, MUSCL with
+        # minmod unless set in the input file
+        self.reconstruction = get_reconstruction(
+            pin.value_dict.get("reconstruction", "muscl")
+        )
+        self.limiter = get_limiter(pin.value_dict.get("limiter", "minmod"))
+
+        # Variables the reconstruction works on, primitive and characteristic
+        # convert the cells to primitives once per step, and with the numba
+        # backend the predicted faces reach the Riemann solve as primitives
+        self.variables = pin.value_dict.get("reconstruction_variables", "conserved")
+
+        if (
+            self.variables != "conserved"
+            and self.variables != "primitive"
+            and self.variables != "characteristic"
+        ):
+            raise ValueError("Please use an implemented reconstruction variable type")
+
+        # Threads for the parallel kernels, serial unless set in the input file
+        self.num_threads = set_threads(pin.value_dict.get("num_threads", 1))
+
+        # Time integrator, the unsplit MUSCL-Hancock step unless set in the
+        # input file
+        self.integrator = pin.value_dict.get("integrator", "unsplit")
+
+        if (
+            self.integrator != "unsplit"
+            and self.integrator != "split"
+            and self.integrator != "ctu"
+            and self.integrator != "rk2"
+            and self.integrator != "rk3"
+        ):
+            raise ValueError("Please use an implemented integrator")
+
+        # Kernel backend, the NumPy kernels skip the JIT warm-up on small runs
+        # with a cold cache.
+        # The other integrators only have numba kernels.
+        if self.integrator == "unsplit":
+            self.backend = numpy_backend.choose_backend(
+                pin.value_dict.get("backend", "auto"),
+                self.pmesh,
+                self.tmax,
+                self.cfl,
+                self.gamma,
+                self.solver,
+                self.reconstruction,
+                self.variables,
+                self.accum_dtype,
+            )
+        else:
+            self.backend = "numba"
+
+        # Cells per side of the tiles the step runs on, untiled unless set
+        # in the input file
+        self.tile_size = pin.value_dict.get("tile_size", 0)
+
+        if self.tile_size > 0 and self.variables != "conserved":
+            raise ValueError(
+                "The tiled step only implements conserved reconstruction variables"
+            )
+
+        # Processes the mesh is split over, one unless set in the input file
+        self.num_ranks = pin.value_dict.get("num_ranks", 1)
+
+        if self.integrator != "unsplit" and (
+            self.variables != "conserved" or self.tile_size > 0 or self.num_ranks > 1
+        ):
+            raise ValueError(
+                f"The {self.integrator} integrator only implements conserved "
+                "reconstruction variables on one untiled process"
+            )
+
+        self.ws = None
+        self.ranks = None
+
+        if self.num_ranks > 1:
+            # The ranks hold their own slabs and scratch buffers
+            self.ranks = DomainDecomposition(
+                pin,
+                self.pmesh,
+                self.cfl,
+                self.gamma,
+                self.solver,
+                self.reconstruction,
+                self.limiter,
+                self.variables,
+                self.backend,
+                self.tile_size,
+                self.num_ranks,
+                self.accum_dtype,
+            )
+        else:
+            # Scratch buffers of the step, allocated once for the whole run
+            self.ws = Workspace(
+                self.pmesh,
+                None,
+                self.backend,
+                self.variables,
+                self.num_threads,
+                self.tile_size,
+                self.accum_dtype,
+                self.integrator,
+            )
+
+        if self.backend == "numpy":
+            self.timestep = numpy_backend.calculate_timestep
+        elif self.ws is not None and self.ws.pool is not None:
+            # The tiled step's threads also reduce the signal speed
+            self.timestep = lambda pmesh, cfl, gamma: threaded_timestep(
+                self.ws.pool,
+                pmesh.Un,
+                pmesh.ng,
+                gamma,
+                cfl,
+                pmesh.dx1,
+                pmesh.dx2,
+                self.tile_size,
+                self.num_threads,
+            )
+        else:
+            self.timestep = lambda pmesh, cfl, gamma: calculate_timestep(
+                pmesh, cfl, gamma, self.num_threads
+            )
+
+        # Source of the timestep, a full reduction every step unless set in
+        # the input file
+        self.timestep_mode = pin.value_dict.get("timestep", "reduction")
+
+        if self.timestep_mode != "reduction" and self.timestep_mode != "riemann":
+            raise ValueError("Please use an implemented timestep")
+
+        self.timestep_safety = float(pin.value_dict.get("timestep_safety", 1.0))
+
+        # The first step, and every step of the NumPy backend, the ranks and
+        # the split integrator, which keep no signal speeds, falls back to
+        # the reduction
+        self.next_dt = None
+
+        self.callbacks: List[Tuple[float, Callable[["Simulation", float], None]]] = []
+
+    def add_callback(
+        self, callback: Callable[["Simulation", float], None], every: float = 1
+    ) -> None:
+        """Registers a function to be called after every `every` steps
+
+        Callbacks are called as `callback(sim, dt)` after the conserved
+        update of a step whose iteration is a multiple of `every`, before
+        the time and iteration are advanced, so they see the same time and
+        iteration FIEFS has always labelled its outputs with. The Riemann
+        states of an unsplit step are still in `sim.ws`, for the last tile
+        only when the step is tiled, the other integrators do not leave
+        them there, and there is no workspace when the mesh is split over
+        processes.
+
+        Parameters
+        ----------
+        callback : Callable[[Simulation, float], None]
+            Function of the simulation and the timestep just taken
+        every : float
+            Number of steps between calls
+
+        """
+        self.callbacks.append((every, callback))
+
+    def step(self, t_end: float = None) -> float:
+        """Advances the simulation by one CFL-limited step
+
+        Parameters
+        ----------
+        t_end : float
+            Time the step may not go past, the input tmax if not given
+
+        Returns
+        -------
+        float
+            The timestep that was taken
+
+        """
+        if t_end is None:
+            t_end = self.tmax
+
+        if self.ranks is not None:
+            return self.advance_ranks(t_end, 1)
+
+        if self.next_dt is None:
+            dt = self.timestep(self.pmesh, self.cfl, self.gamma)
+        else:
+            dt = self.next_dt
+
+        if self.t + dt > t_end:
+            dt = t_end - self.t
+
+        if self.integrator == "split":
+            # Strang splitting, the order of the sweeps alternates
+            split_step(
+                self.pin,
+                self.pmesh,
+                self.ws,
+                dt,
+                self.gamma,
+                self.solver,
+                self.reconstruction,
+                self.limiter,
+                self.num_threads,
+                self.iter % 2 == 0,
+            )
+        elif self.integrator == "ctu":
+            ctu_step(
+                self.pin,
+                self.pmesh,
+                self.ws,
+                dt,
+                self.gamma,
+                self.solver,
+                self.reconstruction,
+                self.limiter,
+                self.num_threads,
+            )
+        elif self.integrator == "rk2" or self.integrator == "rk3":
+            ssp_rk_step(
+                self.pin,
+                self.pmesh,
+                self.ws,
+                dt,
+                self.gamma,
+                self.solver,
+                self.reconstruction,
+                self.limiter,
+                self.num_threads,
+                self.integrator,
+            )
+        else:
+            muscl_hancock_step(
+                self.pin,
+                self.pmesh,
+                self.ws,
+                dt,
+                self.gamma,
+                self.solver,
+                self.reconstruction,
+                self.limiter,
+                self.variables,
+                self.backend,
+                self.num_threads,
+                self.tile_size,
+            )
+
+        if (
+            self.timestep_mode == "riemann"
+            and self.backend != "numpy"
+            and self.integrator != "split"
+        ):
+            self.next_dt = wave_speed_timestep(
+                self.ws.wave_speeds,
+                self.cfl,
+                self.pmesh.dx1,
+                self.pmesh.dx2,
+                self.timestep_safety,
+            )
+
+        self.end_step(dt)
+
+        return dt
+
+    def advance_ranks(self, t_end: float, max_steps: int) -> float:
+        """Advances a decomposed simulation by up to max_steps steps
+
+        The ranks only gather the mesh after their last step, so the
+        callbacks are run for that step alone and callers should stop at
+        the steps the callbacks are due.
+
+        Parameters
+        ----------
+        t_end : float
+            Time the steps may not go past
+        max_steps : int
+            Largest number of steps to take
+
+        Returns
+        -------
+        float
+            The last timestep that was taken
+
+        """
+        t, steps, dt = self.ranks.advance(self.t, t_end, max_steps)
+
+        self.t = t
+        self.iter += steps - 1
+
+        self.end_step(dt)
+
+        return dt
+
+    def end_step(self, dt: float) -> None:
+        """Runs the callbacks due this step and advances time and iteration"""
+        for every, callback in self.callbacks:
+            if self.iter % every == 0:
+                callback(self, dt)
+
+        self.t += dt
+        self.iter += 1
+
+    def run_until(self, t_end: float = None) -> None:
+        """Steps the simulation until it reaches t_end
+
+        Parameters
+        ----------
+        t_end : float
+            Time to stop at, the input tmax if not given
+
+        """
+        if t_end is None:
+            t_end = self.tmax
+
+        while self.t < t_end:
+            if self.ranks is None:
+                self.step(t_end)
+                continue
+
+            # Steps up to and including the next one a callback is due on
+            max_steps = min(
+                [(-self.iter) % every + 1 for every, _ in self.callbacks],
+                default=np.iinfo(np.int64).max,
+            )
+
+            self.advance_ranks(t_end, int(max_steps))
+
+    def close(self) -> None:
+        """Stops the ranks of a decomposed simulation"""
+        if self.ranks is not None:
+            self.ranks.close()
+            self.ranks = None
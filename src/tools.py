@@ -6,14 +6,19 @@ parent_directory = os.path.dirname(os.path.dirname(current_script_path))
 sys.path.append(parent_directory)
 
 
+from typing import Tuple
+
+import numba
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
 from src.eos import p_EOS
 from src.mesh import FIEFS_Array
+from src.parallel import parallel_build
+from src.reconstruct import MINMOD, MUSCL, cell_face_values
 
 
-@njit()
+@njit(cache=True)
 def get_primitive_variables_1d(Un: np.ndarray, gamma: float):
     """Returns the primitive variables at a point provided Un.
 
@@ -49,7 +54,7 @@ def get_primitive_variables_1d(Un: np.ndarray, gamma: float):
     return rho, u, v, p
 
 
-@njit()
+@njit(cache=True)
 def get_primitive_variables_2d(Un: np.ndarray, gamma: float):
     """Returns the primitive variables for all points provided Un.
 
@@ -86,12 +91,71 @@ def get_primitive_variables_2d(Un: np.ndarray, gamma: float):
     return rho, u, v, p
 
 
-@njit()
+@njit(cache=True)
+def get_fluxes_1d_x(Un: np.ndarray, gamma: float) -> np.ndarray:
+    """Returns x fluxes provided the conserved variables, Un, at a point
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    F : ndarray[float]
+        The computed flux vector at one cell in the x direction
+
+    """
+
+    F = np.zeros_like(Un)
+    rho, u, v, p = get_primitive_variables_1d(Un, gamma)
+
+    F[0] = rho * u
+    F[1] = rho * u**2 + p
+    F[2] = rho * u * v
+    F[3] = u * (Un[3] + p)
+
+    return F
+
+
+@njit(cache=True)
+def get_fluxes_1d_y(Un: np.ndarray, gamma: float) -> np.ndarray:
+    """Returns y fluxes provided the conserved variables, Un, at a point
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    F : ndarray[float]
+        The computed flux vector at one cell in the y direction
+
+    """
+
+    F = np.zeros_like(Un)
+    rho, u, v, p = get_primitive_variables_1d(Un, gamma)
+
+    F[0] = rho * v
+    F[1] = rho * u * v
+    F[2] = rho * v * v + p
+    F[3] = v * (Un[3] + p)
+
+    return F
+
+
+@njit(cache=True)
 def get_fluxes_1d(Un: np.ndarray, gamma: float, direction: str) -> np.ndarray:
     """Returns fluxes provided the conserved variables, Un, at a point
 
     This function returns the fluxes in the x or y direction at one specified
-    cell provided the conserved variables, Un, at the specified cell
+    cell provided the conserved variables, Un, at the specified cell. Thin
+    wrapper over `get_fluxes_1d_x` and `get_fluxes_1d_y`.
 
     Parameters
     ----------
@@ -109,30 +173,80 @@ def get_fluxes_1d(Un: np.ndarray, gamma: float, direction: str) -> np.ndarray:
 
     """
 
-    F = np.zeros_like(Un)
-    rho, u, v, p = get_primitive_variables_1d(Un, gamma)
-
     if direction == "x":
-        F[0] = rho * u
-        F[1] = rho * u**2 + p
-        F[2] = rho * u * v
-        F[3] = u * (Un[3] + p)
+        return get_fluxes_1d_x(Un, gamma)
 
     elif direction == "y":
-        F[0] = rho * v
-        F[1] = rho * u * v
-        F[2] = rho * v * v + p
-        F[3] = v * (Un[3] + p)
+        return get_fluxes_1d_y(Un, gamma)
+
+    return np.zeros_like(Un)
+
+
+@njit(cache=True)
+def get_fluxes_2d_x(Un: np.ndarray, gamma: float) -> np.ndarray:
+    """Returns x fluxes provided the conserved variables, Un, for all cells
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    F : ndarray[float]
+        The computed flux vector at all cells in the x direction
+
+    """
+
+    F = np.zeros_like(Un)
+    rho, u, v, p = get_primitive_variables_2d(Un, gamma)
+
+    F[0, :, :] = rho * u
+    F[1, :, :] = rho * u * u + p
+    F[2, :, :] = rho * u * v
+    F[3, :, :] = u * (Un[3, :, :] + p)
 
     return F
 
 
-@njit()
+@njit(cache=True)
+def get_fluxes_2d_y(Un: np.ndarray, gamma: float) -> np.ndarray:
+    """Returns y fluxes provided the conserved variables, Un, for all cells
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+
+    Returns
+    -------
+    F : ndarray[float]
+        The computed flux vector at all cells in the y direction
+
+    """
+
+    F = np.zeros_like(Un)
+    rho, u, v, p = get_primitive_variables_2d(Un, gamma)
+
+    F[0, :, :] = rho * v
+    F[1, :, :] = rho * u * v
+    F[2, :, :] = rho * v * v + p
+    F[3, :, :] = v * (Un[3, :, :] + p)
+
+    return F
+
+
+@njit(cache=True)
 def get_fluxes_2d(Un: np.ndarray, gamma: float, direction: str) -> np.ndarray:
     """Returns fluxes provided the conserved variables, Un, for all cells
 
     This function returns the fluxes in the x or y direction for all cells
-    provided the conserved variables, Un.
+    provided the conserved variables, Un. Thin wrapper over
+    `get_fluxes_2d_x` and `get_fluxes_2d_y`.
 
     Parameters
     ----------
@@ -150,27 +264,518 @@ def get_fluxes_2d(Un: np.ndarray, gamma: float, direction: str) -> np.ndarray:
 
     """
 
-    F = np.zeros_like(Un)
-    rho, u, v, p = get_primitive_variables_2d(Un, gamma)
-
     if direction == "x":
-        F[0, :, :] = rho * u
-        F[1, :, :] = rho * u * u + p
-        F[2, :, :] = rho * u * v
-        F[3, :, :] = u * (Un[3, :, :] + p)
+        return get_fluxes_2d_x(Un, gamma)
 
     elif direction == "y":
-        F[0, :, :] = rho * v
-        F[1, :, :] = rho * u * v
-        F[2, :, :] = rho * v * v + p
-        F[3, :, :] = v * (Un[3, :, :] + p)
+        return get_fluxes_2d_y(Un, gamma)
+
+    return np.zeros_like(Un)
+
+
+@njit(cache=True)
+def get_fluxes_2d_x_into(Un: np.ndarray, gamma: float, F: np.ndarray) -> np.ndarray:
+    """Writes the x fluxes of the conserved variables Un into F
+
+    In-place version of `get_fluxes_2d_x`, one pass over the cells with no
+    temporary arrays.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+    F : ndarray[float]
+        Output flux vector, same shape as Un
+
+    Returns
+    -------
+    F : ndarray[float]
+        The filled output array
+
+    """
+    for i in range(Un.shape[1]):
+        for j in range(Un.shape[2]):
+            rho = Un[0, i, j]
+            u = Un[1, i, j] / rho
+            v = Un[2, i, j] / rho
+            e = Un[3, i, j] / rho - 1 / 2 * rho * (u * u + v * v)
+            p = p_EOS(rho, e, gamma)
+
+            F[0, i, j] = rho * u
+            F[1, i, j] = rho * u * u + p
+            F[2, i, j] = rho * u * v
+            F[3, i, j] = u * (Un[3, i, j] + p)
+
+    return F
+
+
+@njit(cache=True)
+def get_fluxes_2d_y_into(Un: np.ndarray, gamma: float, F: np.ndarray) -> np.ndarray:
+    """Writes the y fluxes of the conserved variables Un into F
+
+    In-place version of `get_fluxes_2d_y`, one pass over the cells with no
+    temporary arrays.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+    F : ndarray[float]
+        Output flux vector, same shape as Un
+
+    Returns
+    -------
+    F : ndarray[float]
+        The filled output array
+
+    """
+    for i in range(Un.shape[1]):
+        for j in range(Un.shape[2]):
+            rho = Un[0, i, j]
+            u = Un[1, i, j] / rho
+            v = Un[2, i, j] / rho
+            e = Un[3, i, j] / rho - 1 / 2 * rho * (u * u + v * v)
+            p = p_EOS(rho, e, gamma)
+
+            F[0, i, j] = rho * v
+            F[1, i, j] = rho * u * v
+            F[2, i, j] = rho * v * v + p
+            F[3, i, j] = v * (Un[3, i, j] + p)
 
     return F
 
 
-def calculate_timestep(pmesh: FIEFS_Array, cfl: float, gamma: float) -> float:
+@njit(cache=True, nogil=True)
+def min_crossing_time(
+    Un: np.ndarray,
+    ng: int,
+    gamma: float,
+    dx1: float,
+    dx2: float,
+    i_begin: int = 0,
+    i_end: int = -1,
+) -> float:
+    """Returns the smallest of dx1 / (|u| + a) and dx2 / (|v| + a) over the
+    interior cells
+
+    Single pass over the interior with no temporary arrays, the CFL
+    timestep being this time scaled by the CFL number. Only the rows of
+    cells from i_begin to i_end are reduced, so strips of the mesh can be
+    reduced by concurrent threads, and the kernel releases the GIL.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables including ghost zones
+    ng : int
+        Number of ghost zones
+    gamma : float
+        Specific heat ratio
+    dx1, dx2 : float
+        Cell sizes in the x1 and x2 directions
+    i_begin, i_end : int
+        Interior rows of cells to reduce, the whole mesh by default
+
+    Returns
+    -------
+    float
+        Time for the fastest signal to cross a cell in either direction
+
+    """
+    nx2 = Un.shape[2] - 2 * ng
+
+    if i_end < 0:
+        i_end = Un.shape[1] - 2 * ng
+
+    # Largest crossing rate (|u| + a) / dx1 or (|v| + a) / dx2, so the
+    # division is only taken once
+    inv_dx1 = 1.0 / dx1
+    inv_dx2 = 1.0 / dx2
+
+    max_rate = 0.0
+
+    for r in prange(i_end - i_begin):
+        i = i_begin + r + ng
+        row_rate = 0.0
+
+        for j in range(ng, nx2 + ng):
+            rho = Un[0, i, j]
+            u = Un[1, i, j] / rho
+            v = Un[2, i, j] / rho
+            e = Un[3, i, j] / rho - 1 / 2 * rho * (u * u + v * v)
+            a = np.sqrt(gamma * p_EOS(rho, e, gamma) / rho)
+
+            row_rate = max(row_rate, (abs(u) + a) * inv_dx1, (abs(v) + a) * inv_dx2)
+
+        max_rate = max(max_rate, row_rate)
+
+    return 1.0 / max_rate
+
+
+min_crossing_time_parallel = parallel_build(min_crossing_time, nogil=True)
+
+
+@njit(cache=True)
+def get_primitive_variables_into(Un: np.ndarray, gamma: float, W: np.ndarray):
+    """Writes the primitive variables of every cell into W
+
+    In-place version of `get_primitive_variables_2d`, so the cells are
+    converted once per step and the reconstruction, the predictor and the
+    Riemann solve all work on primitives from there.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables
+    gamma : float
+        Specific heat ratio
+    W : ndarray[float]
+        Output density, velocities and pressure, same shape as Un
+
+    Returns
+    -------
+    W : ndarray[float]
+        The filled output array
+
+    """
+    for i in range(Un.shape[1]):
+        for j in range(Un.shape[2]):
+            rho = Un[0, i, j]
+            u = Un[1, i, j] / rho
+            v = Un[2, i, j] / rho
+            e = Un[3, i, j] / rho - 1 / 2 * rho * (u * u + v * v)
+
+            W[0, i, j] = rho
+            W[1, i, j] = u
+            W[2, i, j] = v
+            W[3, i, j] = p_EOS(rho, e, gamma)
+
+    return W
+
+
+@njit(cache=True)
+def primitive_hancock_into(
+    W: np.ndarray,
+    ng: int,
+    gamma: float,
+    dtdx1: float,
+    dtdx2: float,
+    W_i_L: np.ndarray,
+    W_i_R: np.ndarray,
+    W_j_L: np.ndarray,
+    W_j_R: np.ndarray,
+):
+    """Half-step Hancock predictor for face values reconstructed in
+    primitive variables
+
+    The fluxes are evaluated straight from the primitive face values, so
+    no division is needed. The change of the conserved variables they
+    give is the same on the four faces of a cell, and it is turned into
+    a change of the primitives with the derivatives of the conversion in
+    `get_primitive_variables_2d` at the cell's own primitives (see [1],
+    section 14.4). That takes one division per cell, and the faces are
+    updated in place and stay primitive for `riemann_update`.
+
+    Parameters
+    ----------
+    W : ndarray[float]
+        Primitive variables of every cell, ghost zones included
+    ng : int
+        Number of ghost zones of W
+    gamma : float
+        Specific heat ratio
+    dtdx1, dtdx2 : float
+        Timestep over the cell sizes
+    W_i_L, W_i_R, W_j_L, W_j_R : ndarray[float]
+        Primitive values on the left, right, bottom and top faces of the
+        interior cells and one ghost layer, advanced by half a timestep
+        in place
+
+    Returns
+    -------
+    W_i_L, W_i_R, W_j_L, W_j_R : ndarray[float]
+        The evolved face values
+
+    References
+    -----------
+    [1] Toro, E. F. (2011). Riemann solvers and Numerical Methods for fluid dynamics:
+    A practical introduction. Springer.
+
+    """
+    gm1_inv = 1.0 / (gamma - 1.0)
+    faces = (W_i_L, W_i_R, W_j_L, W_j_R)
+
+    for i in range(W_i_L.shape[1]):
+        for j in range(W_i_L.shape[2]):
+            d0 = 0.0
+            d1 = 0.0
+            d2 = 0.0
+            d3 = 0.0
+
+            for f in range(4):
+                W_f = faces[f]
+                rho = W_f[0, i, j]
+                u = W_f[1, i, j]
+                v = W_f[2, i, j]
+                p = W_f[3, i, j]
+                E = p * gm1_inv + 1 / 2 * rho * rho * (u * u + v * v)
+
+                # Left and bottom faces add their flux, right and top subtract
+                if f < 2:
+                    scale = 1 / 2 * dtdx1 if f == 0 else -1 / 2 * dtdx1
+                    un = u
+                else:
+                    scale = 1 / 2 * dtdx2 if f == 2 else -1 / 2 * dtdx2
+                    un = v
+
+                d0 += scale * rho * un
+                d1 += scale * (rho * u * un + (p if f < 2 else 0.0))
+                d2 += scale * (rho * v * un + (p if f >= 2 else 0.0))
+                d3 += scale * un * (E + p)
+
+            # The pressure rho (gamma - 1) (E / rho - rho |u|^2 / 2) only
+            # depends on the total energy and the momenta
+            rho = W[0, i + ng - 1, j + ng - 1]
+            u = W[1, i + ng - 1, j + ng - 1]
+            v = W[2, i + ng - 1, j + ng - 1]
+            rho_inv = 1.0 / rho
+
+            dW1 = (d1 - u * d0) * rho_inv
+            dW2 = (d2 - v * d0) * rho_inv
+            dW3 = (gamma - 1.0) * (d3 - rho * (u * d1 + v * d2))
+
+            for f in range(4):
+                W_f = faces[f]
+                W_f[0, i, j] += d0
+                W_f[1, i, j] += dW1
+                W_f[2, i, j] += dW2
+                W_f[3, i, j] += dW3
+
+    return W_i_L, W_i_R, W_j_L, W_j_R
+
+
+@njit(cache=True)
+def get_conserved_variables_into(W: np.ndarray, gamma: float, U: np.ndarray):
+    """Writes the conserved variables of primitive values W into U
+
+    Inverse of `get_primitive_variables_into`, used to hand primitive
+    face values to the kernels that take conserved ones.
+
+    Parameters
+    ----------
+    W : ndarray[float]
+        Density, velocities and pressure
+    gamma : float
+        Specific heat ratio
+    U : ndarray[float]
+        Output conserved variables, same shape as W
+
+    Returns
+    -------
+    U : ndarray[float]
+        The filled output array
+
+    """
+    gm1_inv = 1.0 / (gamma - 1.0)
+
+    for i in range(W.shape[1]):
+        for j in range(W.shape[2]):
+            rho = W[0, i, j]
+            u = W[1, i, j]
+            v = W[2, i, j]
+
+            U[0, i, j] = rho
+            U[1, i, j] = rho * u
+            U[2, i, j] = rho * v
+            U[3, i, j] = W[3, i, j] * gm1_inv + 1 / 2 * rho * rho * (u * u + v * v)
+
+    return U
+
+
+@njit(cache=True)
+def cell_flux(
+    rho: float, mx: float, my: float, E: float, gamma: float, ydir: bool
+) -> Tuple[float, float, float, float]:
+    """Flux of a single conserved state in the x or y direction
+
+    Scalar version of `get_fluxes_2d_x` and `get_fluxes_2d_y`, with the
+    products in the same order so the results are bitwise identical.
+
+    """
+    u = mx / rho
+    v = my / rho
+    e = E / rho - 1 / 2 * rho * (u * u + v * v)
+    p = p_EOS(rho, e, gamma)
+
+    if ydir:
+        return rho * v, rho * u * v, rho * v * v + p, v * (E + p)
+
+    return rho * u, rho * u * u + p, rho * u * v, u * (E + p)
+
+
+@njit(cache=True)
+def muscl_hancock_predictor_into(
+    Un: np.ndarray,
+    ng: int,
+    beta: float,
+    gamma: float,
+    half_dtdx1: float,
+    half_dtdx2: float,
+    U_i_L: np.ndarray,
+    U_i_R: np.ndarray,
+    U_j_L: np.ndarray,
+    U_j_R: np.ndarray,
+    scheme: int = MUSCL,
+    limiter: int = MINMOD,
+):
+    """Reconstruction and half-step Hancock predictor in one pass over Un
+
+    Fused version of `get_face_values_into` followed by the conserved
+    predictor: the four faces of a cell are reconstructed, their fluxes
+    evaluated and the half-step update applied while the cell is in
+    cache, so the mesh is read once and each face array written once.
+    The arithmetic is the same as the unfused path, so the results are
+    bitwise identical.
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables including ghost zones
+    ng : int
+        Number of ghost zones of Un
+    beta : float
+        Weight value of the minmod limiter, 1.0 is minmod
+    gamma : float
+        Specific heat ratio
+    half_dtdx1, half_dtdx2 : float
+        Half the timestep over the cell sizes
+    U_i_L, U_i_R, U_j_L, U_j_R : ndarray[float]
+        Output face values half a timestep later, for cells ng-1 to
+        nx+ng of Un
+    scheme : int
+        Reconstruction id
+    limiter : int
+        Slope limiter id
+
+    Returns
+    -------
+    U_i_L, U_i_R, U_j_L, U_j_R : ndarray[float]
+        The filled output arrays
+
+    """
+    for i in range(ng - 1, Un.shape[1] - ng + 1):
+        for j in range(ng - 1, Un.shape[2] - ng + 1):
+            k = i - ng + 1
+            m = j - ng + 1
+
+            for n in range(Un.shape[0]):
+                (
+                    U_i_L[n, k, m],
+                    U_i_R[n, k, m],
+                    U_j_L[n, k, m],
+                    U_j_R[n, k, m],
+                ) = cell_face_values(Un, n, i, j, scheme, limiter, beta)
+
+            F_L = cell_flux(
+                U_i_L[0, k, m],
+                U_i_L[1, k, m],
+                U_i_L[2, k, m],
+                U_i_L[3, k, m],
+                gamma,
+                False,
+            )
+            F_R = cell_flux(
+                U_i_R[0, k, m],
+                U_i_R[1, k, m],
+                U_i_R[2, k, m],
+                U_i_R[3, k, m],
+                gamma,
+                False,
+            )
+            G_L = cell_flux(
+                U_j_L[0, k, m],
+                U_j_L[1, k, m],
+                U_j_L[2, k, m],
+                U_j_L[3, k, m],
+                gamma,
+                True,
+            )
+            G_R = cell_flux(
+                U_j_R[0, k, m],
+                U_j_R[1, k, m],
+                U_j_R[2, k, m],
+                U_j_R[3, k, m],
+                gamma,
+                True,
+            )
+
+            d0 = (F_L[0] - F_R[0]) * half_dtdx1 + (G_L[0] - G_R[0]) * half_dtdx2
+            d1 = (F_L[1] - F_R[1]) * half_dtdx1 + (G_L[1] - G_R[1]) * half_dtdx2
+            d2 = (F_L[2] - F_R[2]) * half_dtdx1 + (G_L[2] - G_R[2]) * half_dtdx2
+            d3 = (F_L[3] - F_R[3]) * half_dtdx1 + (G_L[3] - G_R[3]) * half_dtdx2
+
+            for U in (U_i_L, U_i_R, U_j_L, U_j_R):
+                U[0, k, m] += d0
+                U[1, k, m] += d1
+                U[2, k, m] += d2
+                U[3, k, m] += d3
+
+    return U_i_L, U_i_R, U_j_L, U_j_R
+
+
+@njit(cache=True)
+def conservative_update(
+    Un: np.ndarray,
+    F: np.ndarray,
+    G: np.ndarray,
+    ng: int,
+    dtdx1: float,
+    dtdx2: float,
+) -> np.ndarray:
+    """Adds the flux differences through the faces of every interior cell
+    to Un in place
+
+    Parameters
+    ----------
+    Un : ndarray[float]
+        Conserved variables, ghost zones included
+    F : ndarray[float]
+        Fluxes through the x interfaces, shape (nvar, nx1 + 1, nx2 + 2)
+    G : ndarray[float]
+        Fluxes through the y interfaces, shape (nvar, nx1 + 2, nx2 + 1)
+    ng : int
+        Number of ghost zones of Un
+    dtdx1, dtdx2 : float
+        Timestep over the cell sizes
+
+    Returns
+    -------
+    Un : ndarray[float]
+        The updated conserved variables
+
+    """
+    for k in range(Un.shape[0]):
+        for i in range(Un.shape[1] - 2 * ng):
+            for j in range(Un.shape[2] - 2 * ng):
+                Un[k, i + ng, j + ng] += dtdx1 * (
+                    F[k, i, j + 1] - F[k, i + 1, j + 1]
+                ) + dtdx2 * (G[k, i + 1, j] - G[k, i + 1, j + 1])
+
+    return Un
+
+
+def calculate_timestep(
+    pmesh: FIEFS_Array, cfl: float, gamma: float, num_threads: int = 1
+) -> float:
     """Calculates the maximum timestep allowed for a given CFL to remain stable
 
+    The timestep is limited by the signal crossing time in both
+    directions, min(dx1 / (|u| + a), dx2 / (|v| + a)) over the interior,
+    so grids with unequal cell sizes take the step each direction allows.
 
     Parameters
     ----------
@@ -182,7 +787,8 @@ def calculate_timestep(pmesh: FIEFS_Array, cfl: float, gamma: float) -> float:
         choosing the timestep
     gamma: float
         Specific heat ratio
-
+    num_threads : int
+        Threads of the reduction, the threaded kernel is used above one
 
     Returns
     -------
@@ -190,12 +796,72 @@ def calculate_timestep(pmesh: FIEFS_Array, cfl: float, gamma: float) -> float:
         The calculated timestep for the provided conditions
 
     """
-    # print(type(cfl), type(gamma))
-    rho, u, v, p = get_primitive_variables_2d(pmesh.Un, gamma)
+    if num_threads > 1:
+        reduction = min_crossing_time_parallel
+    else:
+        reduction = min_crossing_time
+
+    return cfl * reduction(pmesh.Un, pmesh.ng, gamma, pmesh.dx1, pmesh.dx2)
+
+
+def wave_speed_timestep(
+    wave_speeds: np.ndarray, cfl: float, dx1: float, dx2: float, safety: float
+) -> float:
+    """Timestep from the signal speeds of the last Riemann solve
+
+    The Riemann solves of a step see the face states at the half step,
+    and their wave speed estimates bound the cell signal speeds from
+    above in most flows, but the speeds can still grow over the next
+    step. The step is therefore the CFL step of those speeds scaled by
+    a safety factor: one keeps the step of the reduction on smooth flows,
+    strong shocks whose speeds grow within a step need less.
+
+    Parameters
+    ----------
+    wave_speeds : ndarray[float64]
+        Fastest x and y signal speeds of the solves, shape (n_blocks, 2),
+        see `riemann_update`
+    cfl : float
+        Courant-Freidrichs-Lewy number
+    dx1, dx2 : float
+        Cell sizes in the x1 and x2 directions
+    safety : float
+        Fraction of the CFL step that is taken
+
+    Returns
+    -------
+    float
+        The timestep for the provided conditions
+
+    """
+    max_rate = max(
+        wave_speeds[:, 0].max() * (1.0 / dx1), wave_speeds[:, 1].max() * (1.0 / dx2)
+    )
+
+    return safety * cfl * (1.0 / max_rate)
+
+
+def set_threads(num_threads: int) -> int:
+    """Sets the number of threads used by the parallel numba kernels
+
+    Parameters
+    ----------
+    num_threads : int
+        Requested number of threads. Values below 1 select every
+        thread available to numba, and requests above that are
+        capped to it.
+
+    Returns
+    -------
+    int
+        The number of threads that will be used
+
+    """
+    max_threads = numba.config.NUMBA_NUM_THREADS
 
-    a = np.sqrt(gamma * p / rho)
-    # print(np.abs(u) + a)
+    if num_threads < 1 or num_threads > max_threads:
+        num_threads = max_threads
 
-    max_vel = max(np.amax(np.abs(u) + a), np.amax(np.abs(v) + a))
+    numba.set_num_threads(num_threads)
 
-    return cfl * pmesh.dx1 / max_vel
+    return num_threads
@@ -5,7 +5,12 @@ current_script_path = os.path.abspath(__file__)
 parent_directory = os.path.dirname(os.path.dirname(current_script_path))
 sys.path.append(parent_directory)
 
+import subprocess
+import tracemalloc
+
+import numba
 import numpy as np
+import pytest
 from numpy import genfromtxt
 
 from GUI.GUI_tabs import (
@@ -14,18 +19,64 @@ from GUI.GUI_tabs import (
     FlowParametersTab,
 )
 from plotting.plotter import Plotter
+from src import numpy_backend
 from src.data_saver import FIEFS_Output
 from src.eos import e_EOS, p_EOS
 from src.input import FIEFS_Input
-from src.mesh import FIEFS_Array, get_interm_array
+from src.integrator import ctu_step, muscl_hancock_step, split_step, ssp_rk_step
+from src.jit import STEP_KERNELS, kernel_signatures, kernels_cached
+from src.mesh import FIEFS_Array, Workspace, get_interm_array, get_precision
 from src.pgen.kh import ProblemGenerator
 from src.pgen.sample import sampleProblemGenerator
-from src.reconstruct import get_limited_slopes
+from src.reconstruct import (
+    LIMITERS,
+    MINMOD,
+    MUSCL,
+    RECONSTRUCTIONS,
+    SUPERBEE,
+    WENO5,
+    get_characteristic_face_values_into,
+    get_face_values_into,
+    get_limited_slopes,
+    get_limited_slopes_into,
+    get_limiter,
+    get_reconstruction,
+)
+from src.riemann import (
+    BRANCH_SMOOTH,
+    HLLC,
+    HYBRID,
+    RIEMANN_SOLVERS,
+    count_smooth_interfaces,
+    get_riemann_solver,
+    riemann_branch_counts,
+    riemann_update,
+    riemann_update_parallel,
+    solve_riemann,
+    solve_riemann_into,
+    solve_riemann_into_parallel,
+    solve_riemann_x,
+    solve_riemann_y,
+)
+from src.rk import SSP_WEIGHTS, get_ssp_weights
+from src.simulation import Simulation
+from src.tiles import threaded_timestep
 from src.tools import (
+    calculate_timestep,
+    conservative_update,
+    get_conserved_variables_into,
     get_fluxes_1d,
     get_fluxes_2d,
+    get_fluxes_2d_x,
+    get_fluxes_2d_x_into,
+    get_fluxes_2d_y,
+    get_fluxes_2d_y_into,
     get_primitive_variables_1d,
     get_primitive_variables_2d,
+    get_primitive_variables_into,
+    muscl_hancock_predictor_into,
+    primitive_hancock_into,
+    set_threads,
 )
 
 
@@ -226,10 +277,10 @@ def test_top_bc_enforced():
     pmesh = FIEFS_Array(pin, np.float64)
 
     if pin.value_dict["top_bc"] == "transmissive":
-        assert np.array_equal(pmesh.Un[:, :, :ng], pmesh.Un[:, :, ng : 2 * ng])
+        assert np.array_equal(pmesh.Un[:, :, -ng:], pmesh.Un[:, :, -2 * ng : -ng])
 
     elif pin.value_dict["top_bc"] == "periodic":
-        assert np.array_equal(pmesh.Un[:, :ng], pmesh.Un[:, -2 * ng : -ng, :])
+        assert np.array_equal(pmesh.Un[:, :, -ng:], pmesh.Un[:, :, ng : 2 * ng])
 
 
 def test_bottom_bc_enforced():
@@ -365,8 +416,10 @@ def test_FIEFS_data_file_existence():
     pin = FIEFS_Input("inputs/kh.in")
     pin.parse_input_file()
 
+    pmesh = FIEFS_Array(pin, np.float64)
+
     pout = FIEFS_Output("inputs/kh.in")
-    pout.data_preferences(pin)
+    pout.data_preferences(pin, pmesh.ng)
 
     if "txt" in pout.file_type:
         if "x-velocity" in pout.variables:
@@ -405,7 +458,7 @@ def test_FIEFS_data_saved_to_file():
     ProblemGenerator(pin=pin, pmesh=pmesh)
 
     pout = FIEFS_Output("inputs/kh.in")
-    pout.data_preferences(pin)
+    pout.data_preferences(pin, pmesh.ng)
 
     nx1 = pin.value_dict["nx1"]
     nx2 = pin.value_dict["nx2"]
@@ -553,3 +606,1432 @@ def test_plotter_figure():
     assert os.path.exists("./output/plots/0001.png")
 
     os.remove("./output/plots/0001.png")
+
+
+# Frozen copy of the HLLC loop of the original solve_riemann, built on
+# get_fluxes_1d, which the solvers must keep reproducing bit for bit
+@numba.njit()
+def baseline_solve_riemann(
+    U_l: np.ndarray, U_r: np.ndarray, gamma: float, direction: str
+) -> np.ndarray:
+    """The HLLC solver FIEFS shipped with, kept as the reference of the
+    in-place kernels"""
+    U_state = np.zeros(4)
+    F = np.zeros_like(U_l)
+
+    for i in range(U_r.shape[1]):
+        for j in range(U_r.shape[2]):
+            rho_l = U_l[0, i, j]
+
+            if direction == "x":
+                un_l = U_l[1, i, j] / rho_l
+                ut_l = U_l[2, i, j] / rho_l
+            else:
+                un_l = U_l[2, i, j] / rho_l
+                ut_l = U_l[1, i, j] / rho_l
+
+            E_l = U_l[3, i, j]
+            rhoe_l = E_l - 0.5 * rho_l * (un_l**2 + ut_l**2)
+            p_l = rhoe_l * (gamma - 1.0)
+            p_l = max(p_l, 1e-5)
+
+            rho_r = U_r[0, i, j]
+
+            if direction == "x":
+                un_r = U_r[1, i, j] / rho_r
+                ut_r = U_r[2, i, j] / rho_r
+            else:
+                un_r = U_r[2, i, j] / rho_r
+                ut_r = U_r[1, i, j] / rho_r
+
+            E_r = U_r[3, i, j]
+            rhoe_r = E_r - 0.5 * rho_r * (un_r**2 + ut_r**2)
+            p_r = rhoe_r * (gamma - 1.0)
+            p_r = max(p_r, 1e-5)
+
+            # compute the sound speeds
+            c_l = max(1e-5, np.sqrt(gamma * p_l / rho_l))
+            c_r = max(1e-5, np.sqrt(gamma * p_r / rho_r))
+
+            p_max = max(p_l, p_r)
+            p_min = min(p_l, p_r)
+
+            Q = p_max / p_min
+
+            rho_avg = 0.5 * (rho_l + rho_r)
+            c_avg = 0.5 * (c_l + c_r)
+
+            # primitive variable Riemann solver (Toro, 9.3)
+            factor = rho_avg * c_avg
+
+            pstar = 0.5 * (p_l + p_r) + 0.5 * (un_l - un_r) * factor
+            ustar = 0.5 * (un_l + un_r) + 0.5 * (p_l - p_r) / factor
+
+            if Q > 2 and (pstar < p_min or pstar > p_max):
+                # use a more accurate Riemann solver for the estimate here
+
+                if pstar < p_min:
+                    # 2-rarefaction Riemann solver
+                    z = (gamma - 1.0) / (2.0 * gamma)
+                    p_lr = (p_l / p_r) ** z
+
+                    ustar = (
+                        p_lr * un_l / c_l
+                        + un_r / c_r
+                        + 2.0 * (p_lr - 1.0) / (gamma - 1.0)
+                    ) / (p_lr / c_l + 1.0 / c_r)
+
+                    pstar = 0.5 * (
+                        p_l
+                        * (1.0 + (gamma - 1.0) * (un_l - ustar) / (2.0 * c_l))
+                        ** (1.0 / z)
+                        + p_r
+                        * (1.0 + (gamma - 1.0) * (ustar - un_r) / (2.0 * c_r))
+                        ** (1.0 / z)
+                    )
+
+                else:
+                    # 2-shock Riemann solver
+                    A_r = 2.0 / ((gamma + 1.0) * rho_r)
+                    B_r = p_r * (gamma - 1.0) / (gamma + 1.0)
+
+                    A_l = 2.0 / ((gamma + 1.0) * rho_l)
+                    B_l = p_l * (gamma - 1.0) / (gamma + 1.0)
+
+                    # guess of the pressure
+                    p_guess = max(0.0, pstar)
+
+                    g_l = np.sqrt(A_l / (p_guess + B_l))
+                    g_r = np.sqrt(A_r / (p_guess + B_r))
+
+                    pstar = (g_l * p_l + g_r * p_r - (un_r - un_l)) / (g_l + g_r)
+
+                    ustar = 0.5 * (un_l + un_r) + 0.5 * (
+                        (pstar - p_r) * g_r - (pstar - p_l) * g_l
+                    )
+
+            if pstar <= p_l:
+                # rarefaction
+                S_l = un_l - c_l
+            else:
+                # shock
+                S_l = un_l - c_l * np.sqrt(
+                    1.0 + ((gamma + 1.0) / (2.0 * gamma)) * (pstar / p_l - 1.0)
+                )
+
+            if pstar <= p_r:
+                # rarefaction
+                S_r = un_r + c_r
+            else:
+                # shock
+                S_r = un_r + c_r * np.sqrt(
+                    1.0 + ((gamma + 1.0) / (2.0 / gamma)) * (pstar / p_r - 1.0)
+                )
+
+            # This is from Toro
+            S_c = (
+                p_r - p_l + rho_l * un_l * (S_l - un_l) - rho_r * un_r * (S_r - un_r)
+            ) / (rho_l * (S_l - un_l) - rho_r * (S_r - un_r))
+
+            # Simpler assumption
+            # S_c = ustar
+
+            if S_r <= 0.0:
+                # R region
+                U_state[:] = U_r[:, i, j]
+
+                if direction == "x":
+                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "x")
+                else:
+                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "y")
+
+            elif S_r > 0.0 and S_c <= 0:
+                # R* region
+                HLLCfactor = rho_r * (S_r - un_r) / (S_r - S_c)
+
+                U_state[0] = HLLCfactor
+
+                if direction == "x":
+                    U_state[1] = HLLCfactor * S_c
+                    U_state[2] = HLLCfactor * ut_r
+                else:
+                    U_state[1] = HLLCfactor * ut_r
+                    U_state[2] = HLLCfactor * S_c
+
+                U_state[3] = HLLCfactor * (
+                    U_r[3, i, j] / rho_r
+                    + (S_c - un_r) * (S_c + p_r / (rho_r * (S_r - un_r)))
+                )
+
+                if direction == "x":
+                    # find the flux on the right interface
+                    F[:, i, j] = get_fluxes_1d(U_r[:, i, j], gamma, "x")
+                else:
+                    F[:, i, j] = get_fluxes_1d(U_r[:, i, j], gamma, "y")
+                # correct the flux
+                F[:, i, j] = F[:, i, j] + S_r * (U_state[:] - U_r[:, i, j])
+
+            elif S_c > 0.0 and S_l < 0.0:
+                # L* region
+                HLLCfactor = rho_l * (S_l - un_l) / (S_l - S_c)
+
+                U_state[0] = HLLCfactor
+
+                if direction == "x":
+                    U_state[1] = HLLCfactor * S_c
+                    U_state[2] = HLLCfactor * ut_l
+                else:
+                    U_state[1] = HLLCfactor * ut_l
+                    U_state[2] = HLLCfactor * S_c
+
+                U_state[3] = HLLCfactor * (
+                    U_l[3, i, j] / rho_l
+                    + (S_c - un_l) * (S_c + p_l / (rho_l * (S_l - un_l)))
+                )
+
+                if direction == "x":
+                    # find the flux on the right interface
+                    F[:, i, j] = get_fluxes_1d(U_l[:, i, j], gamma, "x")
+                else:
+                    F[:, i, j] = get_fluxes_1d(U_l[:, i, j], gamma, "y")
+
+                # correct the flux
+                F[:, i, j] = F[:, i, j] + S_l * (U_state[:] - U_l[:, i, j])
+
+            else:
+                U_state[:] = U_l[:, i, j]
+
+                if direction == "x":
+                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "x")
+                else:
+                    F[:, i, j] = get_fluxes_1d(U_state, gamma, "y")
+
+    return F
+
+
+def test_solve_riemann_into():
+    """Checks that the in-place HLLC solver is bitwise identical to the
+    original solve_riemann in both directions, for states spanning all
+    wave patterns"""
+    rng = np.random.default_rng(1)
+
+    def random_states(nx1, nx2):
+        rho = rng.uniform(0.1, 3.0, (nx1, nx2))
+        u = rng.normal(0.0, 2.0, (nx1, nx2))
+        v = rng.normal(0.0, 2.0, (nx1, nx2))
+        p = 10.0 ** rng.uniform(-2.0, 2.0, (nx1, nx2))
+
+        return np.array([rho, rho * u, rho * v, p / 0.4 + 0.5 * rho * (u * u + v * v)])
+
+    U_l = random_states(32, 40)
+    U_r = random_states(32, 40)
+
+    for direction in ["x", "y"]:
+        F = np.zeros_like(U_l)
+        solve_riemann_into(U_l, U_r, 1.4, direction, F)
+
+        assert np.array_equal(F, baseline_solve_riemann(U_l, U_r, 1.4, direction))
+        assert np.array_equal(F, solve_riemann(U_l, U_r, 1.4, direction))
+
+        F_parallel = np.zeros_like(U_l)
+        solve_riemann_into_parallel(U_l, U_r, 1.4, direction, F_parallel)
+
+        assert np.array_equal(F_parallel, F)
+
+
+def test_solve_riemann_directions():
+    """The y kernel on a transposed problem with the momenta swapped must
+    give the x kernel's fluxes with the momentum fluxes swapped"""
+    rng = np.random.default_rng(2)
+
+    rho = rng.uniform(0.5, 2.0, (2, 16, 24))
+    u = rng.normal(0.0, 1.0, (2, 16, 24))
+    v = rng.normal(0.0, 1.0, (2, 16, 24))
+    E = 1.0 / 0.4 + 0.5 * rho * (u * u + v * v)
+
+    U_l = np.array([rho[0], rho[0] * u[0], rho[0] * v[0], E[0]])
+    U_r = np.array([rho[1], rho[1] * u[1], rho[1] * v[1], E[1]])
+
+    F = solve_riemann_x(U_l, U_r, 1.4, np.zeros_like(U_l))
+
+    swap = [0, 2, 1, 3]
+    U_l_t = np.ascontiguousarray(U_l[swap].transpose(0, 2, 1))
+    U_r_t = np.ascontiguousarray(U_r[swap].transpose(0, 2, 1))
+
+    G = solve_riemann_y(U_l_t, U_r_t, 1.4, np.zeros_like(U_l_t))
+
+    assert np.allclose(G[swap].transpose(0, 2, 1), F, rtol=1e-12, atol=1e-12)
+
+
+def test_riemann_solver_registry():
+    """Every registered solver must be consistent, F(U, U) = f(U), and
+    unknown names must be rejected"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+
+    assert get_riemann_solver(pin.value_dict["riemann_solver"]) in (
+        RIEMANN_SOLVERS.values()
+    )
+
+    rng = np.random.default_rng(3)
+    rho = rng.uniform(0.5, 2.0, (16, 16))
+    u = rng.normal(0.0, 1.0, (16, 16))
+    v = rng.normal(0.0, 1.0, (16, 16))
+    p = rng.uniform(0.5, 2.0, (16, 16))
+    U = np.array([rho, rho * u, rho * v, p / 0.4 + 0.5 * rho * (u * u + v * v)])
+
+    for name in RIEMANN_SOLVERS:
+        solver = get_riemann_solver(name)
+
+        F = solve_riemann_x(U, U, 1.4, np.zeros_like(U), solver)
+        G = solve_riemann_y(U, U, 1.4, np.zeros_like(U), solver)
+
+        assert np.allclose(F, get_fluxes_2d_x(U, 1.4), rtol=1e-12, atol=1e-12)
+        assert np.allclose(G, get_fluxes_2d_y(U, 1.4), rtol=1e-12, atol=1e-12)
+
+    with pytest.raises(ValueError):
+        get_riemann_solver("exact")
+
+
+def test_count_smooth_interfaces():
+    """The hybrid solver's smoothness check accepts a uniform flow and
+    rejects every interface of a shear layer"""
+    U = np.zeros((4, 8, 8))
+    U[0] = 1.0
+    U[1] = 0.3
+    U[3] = 1.0 / 0.4 + 0.5 * 0.3**2
+
+    assert count_smooth_interfaces(U, U, 1.4, "x") == 64
+    assert count_smooth_interfaces(U, U, 1.4, "y") == 64
+
+    U_shear = U.copy()
+    U_shear[1] = -0.3
+
+    assert count_smooth_interfaces(U, U_shear, 1.4, "y") == 0
+
+
+def test_riemann_branch_counts():
+    """Every interface is counted once by pressure estimate and once by
+    HLLC region, unless the hybrid solver took its smooth path"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 32
+    pin.value_dict["nx2"] = 32
+
+    pmesh = FIEFS_Array(pin, np.float64)
+    ProblemGenerator(pin=pin, pmesh=pmesh)
+
+    U_l = pmesh.Un[:, :, :-1]
+    U_r = pmesh.Un[:, :, 1:]
+    n_interfaces = U_l[0].size
+
+    for solver in [HLLC, HYBRID]:
+        counts = riemann_branch_counts(U_l, U_r, 1.4, "y", solver)
+        n_solved = n_interfaces - counts[BRANCH_SMOOTH]
+
+        assert counts[:3].sum() == n_solved
+        assert counts[3:BRANCH_SMOOTH].sum() == n_solved
+
+        if solver == HLLC:
+            assert counts[BRANCH_SMOOTH] == 0
+        else:
+            assert counts[BRANCH_SMOOTH] > 0
+
+
+def test_set_threads():
+    """Thread requests are capped to what numba can use, and 0 selects all"""
+    max_threads = numba.config.NUMBA_NUM_THREADS
+
+    assert set_threads(1) == 1
+    assert set_threads(0) == max_threads
+    assert set_threads(max_threads + 1) == max_threads
+    assert numba.get_num_threads() == max_threads
+
+    set_threads(1)
+
+
+def test_numpy_backend():
+    """The NumPy HLLC must agree with the numba kernels in both directions"""
+    rng = np.random.default_rng(4)
+
+    rho = rng.uniform(0.5, 2.0, (2, 16, 24))
+    u = rng.normal(0.0, 1.0, (2, 16, 24))
+    v = rng.normal(0.0, 1.0, (2, 16, 24))
+    E = 1.0 / 0.4 + 0.5 * rho * (u * u + v * v)
+
+    U_l = np.array([rho[0], rho[0] * u[0], rho[0] * v[0], E[0]])
+    U_r = np.array([rho[1], rho[1] * u[1], rho[1] * v[1], E[1]])
+
+    for numba_kernel, numpy_kernel in (
+        (solve_riemann_x, numpy_backend.solve_riemann_x),
+        (solve_riemann_y, numpy_backend.solve_riemann_y),
+    ):
+        F = numba_kernel(U_l, U_r, 1.4, np.zeros_like(U_l))
+        F_np = numpy_kernel(U_l, U_r, 1.4, np.zeros_like(U_l))
+
+        assert np.allclose(F_np, F, rtol=1e-12, atol=1e-12)
+
+    assert np.allclose(
+        numpy_backend.get_fluxes_2d_x(U_l, 1.4), get_fluxes_2d_x(U_l, 1.4)
+    )
+    assert np.allclose(
+        numpy_backend.get_fluxes_2d_y(U_l, 1.4), get_fluxes_2d_y(U_l, 1.4)
+    )
+
+    with pytest.raises(ValueError):
+        numpy_backend.solve_riemann_x(U_l, U_r, 1.4, np.zeros_like(U_l), 1)
+
+
+def test_choose_backend(monkeypatch):
+    """Small short runs go to NumPy while the numba kernels are not cached,
+    long runs, cached kernels and non-HLLC solvers to numba"""
+    np.random.seed(0)
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 32
+    pin.value_dict["nx2"] = 32
+
+    pmesh = FIEFS_Array(pin, np.float64)
+    ProblemGenerator(pin=pin, pmesh=pmesh)
+
+    choose = numpy_backend.choose_backend
+
+    # A numba step on a copy of the mesh readies its kernels
+    step_mesh = FIEFS_Array(pin, np.float64)
+    step_mesh.Un[:] = pmesh.Un
+    muscl_hancock_step(pin, step_mesh, Workspace(step_mesh), 1e-4, 1.4)
+    assert kernels_cached(STEP_KERNELS, pmesh.Un.dtype)
+    assert choose("auto", pmesh, 0.1, 0.4, 1.4, HLLC) == "numba"
+
+    monkeypatch.setattr(numpy_backend, "kernels_cached", lambda *args: False)
+    assert choose("auto", pmesh, 0.1, 0.4, 1.4, HLLC) == "numpy"
+    assert choose("auto", pmesh, 1.0e4, 0.4, 1.4, HLLC) == "numba"
+    assert choose("auto", pmesh, 0.1, 0.4, 1.4, HYBRID) == "numba"
+    assert choose("numba", pmesh, 0.1, 0.4, 1.4, HLLC) == "numba"
+
+    with pytest.raises(ValueError):
+        choose("fortran", pmesh, 0.1, 0.4, 1.4, HLLC)
+
+
+def test_kernel_signatures():
+    """The warm-up signatures must match the arrays a FIEFS step builds,
+    otherwise a warmed cache would still compile on the first step"""
+    for dtype in [np.float32, np.float64]:
+        pin = FIEFS_Input("inputs/kh.in")
+        pin.parse_input_file()
+        pin.value_dict["nx1"] = 16
+        pin.value_dict["nx2"] = 16
+
+        pmesh = FIEFS_Array(pin, dtype)
+        ProblemGenerator(pin=pin, pmesh=pmesh)
+
+        U_i_j = pmesh.Un[:, 1:-1, 1:-1]
+        U_i_L = U_i_j - 0.5 * U_i_j
+        F = np.zeros_like(U_i_L[:, :-1, :])
+
+        calls = {
+            "get_primitive_variables_2d": (pmesh.Un, 1.4),
+            "get_fluxes_2d_x": (U_i_L, 1.4),
+            "get_fluxes_2d_x_into": (U_i_L, 1.4, np.empty_like(U_i_L)),
+            "min_crossing_time": (
+                pmesh.Un,
+                pmesh.ng,
+                1.4,
+                pmesh.dx1,
+                pmesh.dx2,
+                0,
+                -1,
+            ),
+            "solve_riemann_x": (U_i_L[:, :-1, :], U_i_L[:, 1:, :], 1.4, F, HLLC),
+            "solve_riemann_y": (U_i_L[:, :, :-1], U_i_L[:, :, 1:], 1.4, F, HLLC),
+        }
+
+        kernels = {
+            name: (kernel, sig) for name, kernel, sig in kernel_signatures(dtype)
+        }
+
+        for name, args in calls.items():
+            assert tuple(numba.typeof(arg) for arg in args) == kernels[name][1]
+
+        # Threaded builds are called like their serial kernels, and cached
+        # under a name of their own
+        for name, (kernel, signature) in kernels.items():
+            if name.endswith("_parallel") and name[: -len("_parallel")] in kernels:
+                serial, serial_signature = kernels[name[: -len("_parallel")]]
+
+                assert signature == serial_signature
+                assert kernel.py_func.__qualname__ != serial.py_func.__qualname__
+
+
+def test_get_limited_slopes_into():
+    """The compiled limiter must reproduce `get_limited_slopes` exactly for
+    minmod, superbee and the limiters in between"""
+    rng = np.random.default_rng(5)
+
+    for dtype in [np.float32, np.float64]:
+        Un = rng.normal(0.0, 1.0, (4, 20, 30)).astype(dtype)
+        Un[:, 5:10, :] = 1.0
+
+        for beta in [1.0, 1.5, 2.0]:
+            delta_i, delta_j = get_limited_slopes(
+                Un[:, 1:-1, 1:-1],
+                Un[:, 2:, 1:-1],
+                Un[:, :-2, 1:-1],
+                Un[:, 1:-1, 2:],
+                Un[:, 1:-1, :-2],
+                beta=beta,
+            )
+
+            delta_i_c = np.full_like(delta_i, np.nan)
+            delta_j_c = np.full_like(delta_j, np.nan)
+            get_limited_slopes_into(Un, beta, delta_i_c, delta_j_c)
+
+            assert np.array_equal(delta_i_c, delta_i)
+            assert np.array_equal(delta_j_c, delta_j)
+
+
+def test_limiter_registry():
+    """Every limiter must stay within the TVD region: zero at extrema,
+    the sign of the differences, and at most twice the smaller one. Minmod
+    and superbee must match the beta limiter, and the NumPy backend must
+    match the compiled kernels"""
+    assert get_limiter("VanLeer") == LIMITERS["vanleer"]
+    with pytest.raises(ValueError):
+        get_limiter("koren")
+
+    rng = np.random.default_rng(6)
+    Un = rng.normal(0.0, 1.0, (4, 20, 30))
+
+    U_i_j = Un[:, 1:-1, 1:-1]
+    delta_moh = U_i_j - Un[:, :-2, 1:-1]
+    delta_poh = Un[:, 2:, 1:-1] - U_i_j
+    bound = 2.0 * np.minimum(np.abs(delta_moh), np.abs(delta_poh))
+
+    for limiter in LIMITERS.values():
+        delta_i = np.zeros_like(U_i_j)
+        delta_j = np.zeros_like(U_i_j)
+        get_limited_slopes_into(Un, 1.0, delta_i, delta_j, limiter)
+
+        assert np.all(delta_i[delta_moh * delta_poh <= 0.0] == 0.0)
+        assert np.all(delta_i * delta_moh >= 0.0)
+        assert np.all(np.abs(delta_i) <= bound + 1e-12)
+
+        delta_i_np = np.zeros_like(U_i_j)
+        delta_j_np = np.zeros_like(U_i_j)
+        numpy_backend.get_limited_slopes_into(Un, 1.0, delta_i_np, delta_j_np, limiter)
+
+        assert np.allclose(delta_i_np, delta_i, rtol=1e-12, atol=1e-12)
+        assert np.allclose(delta_j_np, delta_j, rtol=1e-12, atol=1e-12)
+
+        if limiter == MINMOD or limiter == SUPERBEE:
+            beta = 1.0 if limiter == MINMOD else 2.0
+            delta_i_beta, _ = get_limited_slopes(
+                U_i_j,
+                Un[:, 2:, 1:-1],
+                Un[:, :-2, 1:-1],
+                Un[:, 1:-1, 2:],
+                Un[:, 1:-1, :-2],
+                beta=beta,
+            )
+
+            assert np.array_equal(delta_i, delta_i_beta)
+
+
+def test_face_values():
+    """Every scheme must reconstruct linear data exactly, and MUSCL must give
+    the cell value minus and plus half the limited slope"""
+    ng = 3
+    x = np.arange(20)[:, None] + 0.0 * np.arange(24)[None, :]
+    y = 0.0 * np.arange(20)[:, None] + np.arange(24)[None, :]
+    Un = np.array([1.0 + 0.1 * x + 0.2 * y] * 4)
+
+    shape = (4, 20 - 2 * ng + 2, 24 - 2 * ng + 2)
+    U_c = Un[:, ng - 1 : 20 - ng + 1, ng - 1 : 24 - ng + 1]
+
+    for scheme in RECONSTRUCTIONS.values():
+        faces = [np.zeros(shape) for _ in range(4)]
+        get_face_values_into(Un, ng, 1.0, *faces, scheme, MINMOD)
+
+        assert np.allclose(faces[0], U_c - 0.05)
+        assert np.allclose(faces[1], U_c + 0.05)
+        assert np.allclose(faces[2], U_c - 0.1)
+        assert np.allclose(faces[3], U_c + 0.1)
+
+    rng = np.random.default_rng(7)
+    Un = rng.normal(0.0, 1.0, (4, 20, 24))
+
+    delta_i = np.zeros((4, 18, 22))
+    delta_j = np.zeros((4, 18, 22))
+    get_limited_slopes_into(Un, 1.0, delta_i, delta_j)
+
+    faces = [np.zeros((4, 18, 22)) for _ in range(4)]
+    get_face_values_into(Un, 2, 1.0, *faces, MUSCL, MINMOD)
+
+    assert np.array_equal(faces[0], Un[:, 1:-1, 1:-1] - 1 / 2 * delta_i)
+    assert np.array_equal(faces[3], Un[:, 1:-1, 1:-1] + 1 / 2 * delta_j)
+
+    faces_np = [np.zeros((4, 18, 22)) for _ in range(4)]
+    numpy_backend.get_face_values_into(Un, 2, 1.0, *faces_np, MUSCL, MINMOD)
+
+    for face, face_np in zip(faces, faces_np):
+        assert np.array_equal(face, face_np)
+
+
+def test_reconstruction_ghost_zones():
+    """FIEFS_Array must raise ng to what the reconstruction needs, without
+    changing the input, and the problem generator must fill the raised
+    mesh"""
+    with pytest.raises(ValueError):
+        get_reconstruction("eno3")
+
+    for name, ng in [("muscl", 2), ("ppm", 3), ("weno5", 3)]:
+        pin = FIEFS_Input("inputs/kh.in")
+        pin.parse_input_file()
+        pin.value_dict["reconstruction"] = name
+
+        pmesh = FIEFS_Array(pin, np.float64)
+        ProblemGenerator(pin, pmesh)
+
+        assert pmesh.ng == ng
+        assert pin.value_dict["ng"] == 2
+        assert pmesh.Un.shape[1] == pin.value_dict["nx1"] + 2 * ng
+        assert np.all(pmesh.Un[0] > 0.0)
+
+
+def test_primitive_hancock():
+    """The predictor on primitive faces must match converting the evolved
+    conserved faces back to primitives to well within the size of the
+    update, and the conversions both ways must match
+    `get_primitive_variables_2d`"""
+    rng = np.random.default_rng(8)
+    gamma = 1.4
+
+    W = np.array(
+        [
+            rng.uniform(0.5, 2.0, (12, 14)),
+            rng.normal(0.0, 1.0, (12, 14)),
+            rng.normal(0.0, 1.0, (12, 14)),
+            rng.uniform(0.5, 2.0, (12, 14)),
+        ]
+    )
+
+    def conserved(W):
+        return np.array(
+            [
+                W[0],
+                W[0] * W[1],
+                W[0] * W[2],
+                W[3] / (gamma - 1.0) + 0.5 * W[0] ** 2 * (W[1] ** 2 + W[2] ** 2),
+            ]
+        )
+
+    W_out = np.zeros_like(W)
+    get_primitive_variables_into(conserved(W), gamma, W_out)
+    assert np.allclose(W_out, W, rtol=1e-12, atol=1e-12)
+    assert np.allclose(
+        W_out, np.array(get_primitive_variables_2d(conserved(W), gamma)), rtol=1e-14
+    )
+
+    # Faces of the interior cells and one ghost layer of a mesh with two
+    # ghost zones, around the cell values
+    ng = 2
+    W_c = np.ascontiguousarray(W[:, ng - 1 : -ng + 1, ng - 1 : -ng + 1])
+    faces_W = [W_c * (1.0 + 0.01 * rng.normal(0.0, 1.0, W_c.shape)) for _ in range(4)]
+    evolved = [face.copy() for face in faces_W]
+    primitive_hancock_into(W, ng, gamma, 0.01, 0.02, *evolved)
+
+    U = [conserved(face) for face in faces_W]
+    int_flux = 0.005 * (
+        get_fluxes_2d_x(U[0], gamma) - get_fluxes_2d_x(U[1], gamma)
+    ) + 0.01 * (get_fluxes_2d_y(U[2], gamma) - get_fluxes_2d_y(U[3], gamma))
+
+    # The half-step update is applied to the primitives with the
+    # derivatives at the cell values, which is off from converting the
+    # updated conserved faces by the size of the update times the 1%
+    # spread of the faces around the cell
+    for face_W, face_old, U_face in zip(evolved, faces_W, U):
+        exact = np.array(get_primitive_variables_2d(U_face + int_flux, gamma))
+        change = np.abs(exact - face_old).max()
+        assert np.abs(face_W - exact).max() < 0.1 * change
+
+    U_out = np.zeros_like(W)
+    get_conserved_variables_into(W, gamma, U_out)
+    assert np.allclose(U_out, conserved(W), rtol=1e-14, atol=0.0)
+
+
+def test_characteristic_face_values():
+    """A uniform state must come back unchanged from the characteristic
+    projection, and a jump in one wave family must stay in that family"""
+    ng = 3
+    W = np.ones((4, 16, 18)) * np.array([1.2, 0.3, -0.4, 0.9])[:, None, None]
+    shape = (4, 16 - 2 * ng + 2, 18 - 2 * ng + 2)
+    W_c = W[:, ng - 1 : 16 - ng + 1, ng - 1 : 18 - ng + 1]
+
+    for scheme in RECONSTRUCTIONS.values():
+        faces = [np.zeros(shape) for _ in range(4)]
+        get_characteristic_face_values_into(W, ng, 1.4, 1.0, *faces, scheme, MINMOD)
+
+        for face in faces:
+            assert np.allclose(face, W_c, rtol=1e-14)
+
+    # A contact (density jump alone) only limits the density
+    W[0, 8:, :] = 2.0
+    faces = [np.zeros(shape) for _ in range(4)]
+    get_characteristic_face_values_into(W, ng, 1.4, 1.0, *faces, MUSCL, MINMOD)
+
+    for face in faces:
+        assert np.allclose(face[1:], W_c[1:], rtol=1e-12)
+
+
+def test_calculate_timestep():
+    """The timestep is the CFL number times the smallest crossing time of
+    the interior cells in either direction, on any number of threads"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 16
+    pin.value_dict["nx2"] = 64
+
+    pmesh = FIEFS_Array(pin, np.float64)
+    ProblemGenerator(pin=pin, pmesh=pmesh)
+
+    # Ghost zones must not limit the step
+    pmesh.Un[:, : pmesh.ng] *= 1e3
+
+    gamma = float(pin.value_dict["gamma"])
+    ng = pmesh.ng
+
+    rho, u, v, p = get_primitive_variables_2d(pmesh.Un[:, ng:-ng, ng:-ng], gamma)
+    a = np.sqrt(gamma * p / rho)
+    expected = 0.5 * min(
+        np.amin(pmesh.dx1 / (np.abs(u) + a)), np.amin(pmesh.dx2 / (np.abs(v) + a))
+    )
+
+    dt = calculate_timestep(pmesh, 0.5, gamma)
+
+    # With cells four times finer in x2, the x2 crossing time limits the step
+    assert dt == pytest.approx(expected, rel=1e-14)
+    assert dt < 0.5 * pmesh.dx1 / np.amax(np.abs(u) + a)
+
+    assert dt == calculate_timestep(pmesh, 0.5, gamma, num_threads=2)
+    assert dt == numpy_backend.calculate_timestep(pmesh, 0.5, gamma)
+
+
+def test_riemann_timestep():
+    """The Riemann timestep mode reduces the mesh on the first step only and
+    then follows the signal speeds of the solves, tiled or not, staying
+    within a percent of the full reduction on the KH problem"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 32
+    pin.value_dict["nx2"] = 32
+    pin.value_dict["backend"] = "numba"
+    pin.value_dict["timestep"] = "riemann"
+    pin.value_dict["timestep_safety"] = 1.0
+
+    np.random.seed(0)
+    sim = Simulation(pin, ProblemGenerator)
+    assert sim.next_dt is None
+
+    first = calculate_timestep(sim.pmesh, sim.cfl, sim.gamma)
+    assert sim.step() == first
+
+    for _ in range(5):
+        expected = sim.next_dt
+        reduction = calculate_timestep(sim.pmesh, sim.cfl, sim.gamma)
+
+        assert sim.step() == expected
+        assert expected == pytest.approx(reduction, rel=1e-2)
+
+    # The tiled step sees the same interfaces
+    pin.value_dict["tile_size"] = 8
+    np.random.seed(0)
+    tiled = Simulation(pin, ProblemGenerator)
+
+    for _ in range(6):
+        tiled.step()
+
+    assert tiled.next_dt == sim.next_dt
+
+    pin.value_dict["timestep"] = "cached"
+    with pytest.raises(ValueError):
+        Simulation(pin, ProblemGenerator)
+
+
+def test_workspace_step():
+    """With a workspace a step allocates no arrays once the kernels are
+    compiled, and the in-place kernels match the allocating ones"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 128
+    pin.value_dict["nx2"] = 128
+
+    pmesh = FIEFS_Array(pin, np.float64)
+    ProblemGenerator(pin=pin, pmesh=pmesh)
+    pmesh.enforce_bcs(pin)
+
+    gamma = float(pin.value_dict["gamma"])
+    cfl = float(pin.value_dict["CFL"])
+
+    F = np.full_like(pmesh.Un, np.nan)
+    assert np.array_equal(
+        get_fluxes_2d_x_into(pmesh.Un, gamma, F), get_fluxes_2d_x(pmesh.Un, gamma)
+    )
+    assert np.array_equal(
+        get_fluxes_2d_y_into(pmesh.Un, gamma, F), get_fluxes_2d_y(pmesh.Un, gamma)
+    )
+    assert calculate_timestep(pmesh, cfl, gamma) == numpy_backend.calculate_timestep(
+        pmesh, cfl, gamma
+    )
+
+    for variables in ["conserved", "primitive", "characteristic"]:
+        ws = Workspace(pmesh, variables=variables)
+
+        # Compiles the kernels of this path
+        dt = calculate_timestep(pmesh, cfl, gamma)
+        muscl_hancock_step(pin, pmesh, ws, dt, gamma, variables=variables)
+
+        tracemalloc.start()
+        dt = calculate_timestep(pmesh, cfl, gamma)
+        muscl_hancock_step(pin, pmesh, ws, dt, gamma, variables=variables)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Only the small objects of the array views and of numba's
+        # dispatch, below even one layer of ghost zones
+        assert current < 1024
+        assert peak < pmesh.ghost_buffers[0].nbytes
+
+    assert np.all(np.isfinite(pmesh.Un))
+
+
+def test_simulation():
+    """Simulations run back to back in one process reproduce each other,
+    stop exactly at the requested time and call back on schedule"""
+    results = []
+
+    for _ in range(2):
+        np.random.seed(0)
+
+        pin = FIEFS_Input("inputs/kh.in")
+        pin.parse_input_file()
+        pin.value_dict["nx1"] = 16
+        pin.value_dict["nx2"] = 16
+        pin.value_dict["backend"] = "numba"
+
+        sim = Simulation(pin, ProblemGenerator)
+
+        every_step = []
+        every_other = []
+        sim.add_callback(
+            lambda sim, dt, log=every_step: log.append((sim.iter, sim.t, dt))
+        )
+        sim.add_callback(lambda sim, dt, log=every_other: log.append(sim.iter), 2)
+
+        dt = sim.step(0.01)
+        assert sim.iter == 1 and sim.t == dt == 0.01
+
+        sim.run_until(0.05)
+        assert sim.t == pytest.approx(0.05, abs=1e-15)
+
+        assert [it for it, _, _ in every_step] == list(range(sim.iter))
+        assert every_other == list(range(0, sim.iter, 2))
+        assert sum(dt for _, _, dt in every_step) == pytest.approx(sim.t)
+
+        results.append(sim.pmesh.Un.copy())
+
+    assert np.array_equal(results[0], results[1])
+
+
+def test_precision():
+    """Single and mixed precision keep the mesh and the face values in
+    float32, mixed accumulating the fluxes in float64, and both stay close
+    to the double precision run, with every integrator"""
+    for integrator in ["unsplit", "split", "ctu", "rk3"]:
+        results = {}
+
+        for precision in ["double", "single", "mixed"]:
+            np.random.seed(0)
+
+            pin = FIEFS_Input("inputs/kh.in")
+            pin.parse_input_file()
+            pin.value_dict["nx1"] = 16
+            pin.value_dict["nx2"] = 16
+            pin.value_dict["backend"] = "numba"
+            pin.value_dict["precision"] = precision
+            pin.value_dict["integrator"] = integrator
+
+            sim = Simulation(pin, ProblemGenerator)
+            sim.run_until(0.1)
+
+            dtype, accum_dtype = get_precision(precision)
+            assert sim.pmesh.Un.dtype == dtype
+
+            if integrator == "unsplit":
+                assert sim.ws.U_i_L.dtype == dtype
+                assert sim.ws.flux_rows.dtype == accum_dtype
+
+            results[precision] = sim.pmesh.Un
+
+        for precision in ["single", "mixed"]:
+            assert np.allclose(results[precision], results["double"], atol=1e-5)
+
+    with pytest.raises(ValueError):
+        get_precision("quad")
+
+
+def test_domain_decomposition():
+    """Ranks exchanging ghost zones through shared memory must step the
+    mesh as a single process does, calling back on the same steps, with
+    periodic x1 boundaries and with walls along x1 and periodic x2"""
+    for x1_bc in ["periodic", "wall"]:
+        results = []
+
+        for num_ranks, tile_size in [(1, 0), (3, 0), (4, 3)]:
+            np.random.seed(0)
+
+            pin = FIEFS_Input("inputs/kh.in")
+            pin.parse_input_file()
+            pin.value_dict["nx1"] = 20
+            pin.value_dict["nx2"] = 14
+            pin.value_dict["left_bc"] = x1_bc
+            pin.value_dict["right_bc"] = x1_bc
+            pin.value_dict["backend"] = "numba"
+            pin.value_dict["num_ranks"] = num_ranks
+            pin.value_dict["tile_size"] = tile_size
+
+            sim = Simulation(pin, ProblemGenerator)
+
+            log = []
+            sim.add_callback(
+                lambda sim, dt, log=log: log.append(
+                    (sim.iter, sim.t, dt, sim.pmesh.Un[0].sum())
+                ),
+                3,
+            )
+
+            sim.step()
+            sim.run_until(0.08)
+            sim.close()
+
+            results.append((sim.iter, sim.t, log, sim.pmesh.Un.copy()))
+
+        for it, t, log, Un in results[1:]:
+            assert (it, t, log) == results[0][:3]
+            assert np.array_equal(Un, results[0][3])
+
+    # Every rank needs ng rows to send to its neighbours
+    pin.value_dict["num_ranks"] = 11
+    with pytest.raises(ValueError):
+        Simulation(pin, ProblemGenerator)
+
+
+def test_muscl_hancock_predictor():
+    """The fused predictor must reproduce the reconstruction followed by
+    the flux-based half-step update bit for bit"""
+    rng = np.random.default_rng(11)
+
+    ng = 3
+    gamma = 1.4
+    half_dtdx1, half_dtdx2 = 0.05, 0.07
+
+    W = np.empty((4, 18, 14))
+    W[0] = rng.uniform(0.5, 2.0, W[0].shape)
+    W[1] = rng.normal(0.0, 0.5, W[1].shape)
+    W[2] = rng.normal(0.0, 0.5, W[2].shape)
+    W[3] = rng.uniform(0.5, 2.5, W[3].shape)
+
+    Un = np.empty_like(W)
+    Un[0] = W[0]
+    Un[1] = W[0] * W[1]
+    Un[2] = W[0] * W[2]
+    Un[3] = W[3] / (gamma - 1.0) + 0.5 * W[0] * (W[1] ** 2 + W[2] ** 2)
+
+    shape = (4, Un.shape[1] - 2 * ng + 2, Un.shape[2] - 2 * ng + 2)
+
+    for scheme, limiter in [(MUSCL, MINMOD), (MUSCL, SUPERBEE), (WENO5, MINMOD)]:
+        faces = [np.empty(shape) for _ in range(4)]
+        get_face_values_into(Un, ng, 1.0, *faces, scheme, limiter)
+
+        int_flux = (
+            get_fluxes_2d_x(faces[0], gamma) - get_fluxes_2d_x(faces[1], gamma)
+        ) * half_dtdx1 + (
+            get_fluxes_2d_y(faces[2], gamma) - get_fluxes_2d_y(faces[3], gamma)
+        ) * half_dtdx2
+
+        fused = [np.full(shape, np.nan) for _ in range(4)]
+        muscl_hancock_predictor_into(
+            Un, ng, 1.0, gamma, half_dtdx1, half_dtdx2, *fused, scheme, limiter
+        )
+
+        for face, face_fused in zip(faces, fused):
+            assert np.array_equal(face + int_flux, face_fused)
+
+
+def test_riemann_update():
+    """The Riemann solve fused with the update must match the flux arrays
+    and the update on them bit for bit, serial and threaded, and on the
+    same faces given as primitives up to rounding"""
+    rng = np.random.default_rng(17)
+
+    ng = 2
+    nx1, nx2 = 13, 9
+    gamma = 1.4
+    dtdx1, dtdx2 = 0.3, 0.2
+
+    faces = []
+    for _ in range(4):
+        U = np.empty((4, nx1 + 2, nx2 + 2))
+        U[0] = rng.uniform(0.5, 2.0, U[0].shape)
+        U[1] = U[0] * rng.normal(0.0, 0.8, U[0].shape)
+        U[2] = U[0] * rng.normal(0.0, 0.8, U[0].shape)
+        U[3] = rng.uniform(1.0, 3.0, U[0].shape) / (gamma - 1.0) + 0.5 * (
+            U[1] ** 2 + U[2] ** 2
+        )
+        faces.append(U)
+
+    U_i_L, U_i_R, U_j_L, U_j_R = faces
+    Un = rng.uniform(1.0, 2.0, (4, nx1 + 2 * ng, nx2 + 2 * ng))
+
+    faces_W = [np.array(get_primitive_variables_2d(U, gamma)) for U in faces]
+
+    for solver in RIEMANN_SOLVERS.values():
+        F = solve_riemann_x(
+            U_i_R[:, :-1, :],
+            U_i_L[:, 1:, :],
+            gamma,
+            np.empty((4, nx1 + 1, nx2 + 2)),
+            solver,
+        )
+        G = solve_riemann_y(
+            U_j_R[:, :, :-1],
+            U_j_L[:, :, 1:],
+            gamma,
+            np.empty((4, nx1 + 2, nx2 + 1)),
+            solver,
+        )
+
+        expected = Un.copy()
+        expected[:, ng:-ng, ng:-ng] += dtdx1 * (
+            F[:, :-1, 1:-1] - F[:, 1:, 1:-1]
+        ) + dtdx2 * (G[:, 1:-1, :-1] - G[:, 1:-1, 1:])
+
+        for kernel, n_blocks in [
+            (riemann_update, 1),
+            (riemann_update, 3),
+            (riemann_update_parallel, 4),
+        ]:
+            result = Un.copy()
+            flux_rows = np.empty((n_blocks, 2, 4, nx2))
+            wave_speeds = np.zeros((n_blocks, 2))
+            kernel(
+                *faces, gamma, dtdx1, dtdx2, result, ng, flux_rows, wave_speeds, solver
+            )
+
+            assert np.array_equal(result, expected)
+
+            result_W = Un.copy()
+            kernel(
+                *faces_W,
+                gamma,
+                dtdx1,
+                dtdx2,
+                result_W,
+                ng,
+                flux_rows,
+                np.zeros((n_blocks, 2)),
+                solver,
+                True,
+            )
+
+            assert np.allclose(result_W, expected, rtol=1e-12, atol=1e-12)
+
+            if n_blocks == 1:
+                speeds = wave_speeds[0]
+
+            # Every split of the rows sees the same fastest waves
+            assert np.array_equal(wave_speeds.max(axis=0), speeds)
+
+        if solver == RIEMANN_SOLVERS["rusanov"]:
+            # The Rusanov speed is max(|u_n| + c) of the two states
+            def fastest(U, n):
+                p = (gamma - 1.0) * (U[3] - 0.5 * (U[1] ** 2 + U[2] ** 2) / U[0])
+                return np.max(np.abs(U[n + 1] / U[0]) + np.sqrt(gamma * p / U[0]))
+
+            assert np.isclose(
+                speeds[0],
+                max(fastest(U_i_R[:, :-1, 1:-1], 0), fastest(U_i_L[:, 1:, 1:-1], 0)),
+            )
+            assert np.isclose(
+                speeds[1],
+                max(fastest(U_j_R[:, 1:-1, :-1], 1), fastest(U_j_L[:, 1:-1, 1:], 1)),
+            )
+
+
+def test_tiled_step():
+    """Stepping the mesh tile by tile must give the untiled result bit for
+    bit, whether or not the tiles divide the mesh, when they are narrower
+    than the ghost zones and on any number of threads"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 20
+    pin.value_dict["nx2"] = 14
+    pin.value_dict["reconstruction"] = "weno5"
+
+    pmesh = FIEFS_Array(pin, np.float64)
+    ProblemGenerator(pin=pin, pmesh=pmesh)
+    Un = pmesh.Un.copy()
+
+    gamma = float(pin.value_dict["gamma"])
+    dt = 0.5 * calculate_timestep(pmesh, float(pin.value_dict["CFL"]), gamma)
+
+    results = []
+    for tile_size, num_threads in [
+        (0, 1),
+        (2, 1),
+        (4, 1),
+        (7, 1),
+        (64, 1),
+        (2, 4),
+        (4, 3),
+        (7, 8),
+    ]:
+        pmesh.Un[:] = Un
+        ws = Workspace(pmesh, num_threads=num_threads, tile_size=tile_size)
+
+        for _ in range(2):
+            muscl_hancock_step(
+                pin, pmesh, ws, dt, gamma, scheme=WENO5, tile_size=tile_size
+            )
+
+        results.append(pmesh.Un.copy())
+
+    for result in results[1:]:
+        assert np.array_equal(result, results[0])
+
+    # The thread pool reduces the timestep over strips of the mesh
+    assert threaded_timestep(
+        ws.pool, pmesh.Un, pmesh.ng, gamma, 0.4, pmesh.dx1, pmesh.dx2, 7, 8
+    ) == calculate_timestep(pmesh, 0.4, gamma)
+
+    with pytest.raises(ValueError):
+        muscl_hancock_step(
+            pin, pmesh, ws, dt, gamma, variables="primitive", tile_size=4
+        )
+
+
+def test_split_step():
+    """On a problem that only varies along one direction, the sweep along
+    the other changes nothing and the split step is the unsplit step bit
+    for bit, for every reconstruction and solver and on any number of
+    chunks. A KH run stays close to the unsplit one"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 24
+    pin.value_dict["nx2"] = 20
+
+    gamma = float(pin.value_dict["gamma"])
+
+    for name, scheme in RECONSTRUCTIONS.items():
+        pin.value_dict["reconstruction"] = name
+        pmesh = FIEFS_Array(pin, np.float64)
+
+        for axis in [1, 2]:
+            # Smooth variation and a jump in density and pressure along axis
+            x = np.linspace(0.0, 1.0, pmesh.Un.shape[axis])
+            x = x.reshape((-1, 1) if axis == 1 else (1, -1))
+
+            rho = 1.0 + 0.5 * (x > 0.5) + 0.1 * np.sin(6.0 * x)
+            u_n = 0.3 * np.cos(4.0 * x)
+            p = 1.0 + 0.5 * (x < 0.3)
+
+            Un = np.empty_like(pmesh.Un)
+            Un[0] = rho
+            Un[axis] = rho * u_n
+            Un[3 - axis] = 0.2 * rho
+            Un[3] = p / (gamma - 1.0) + 0.5 * rho * (u_n**2 + 0.04)
+
+            for solver in RIEMANN_SOLVERS.values():
+                pmesh.Un[:] = Un
+                muscl_hancock_step(
+                    pin, pmesh, Workspace(pmesh), 1e-3, gamma, solver, scheme
+                )
+                expected = pmesh.Un.copy()
+
+                # The ghosts are refilled before each sweep, so the sweep along
+                # the varying direction goes second for them to match too
+                for num_threads in [1, 3]:
+                    pmesh.Un[:] = Un
+                    ws = Workspace(pmesh, num_threads=num_threads, integrator="split")
+                    split_step(
+                        pin,
+                        pmesh,
+                        ws,
+                        1e-3,
+                        gamma,
+                        solver,
+                        scheme,
+                        num_threads=num_threads,
+                        x1_first=axis == 2,
+                    )
+
+                    assert np.array_equal(pmesh.Un, expected)
+
+    pin.value_dict["reconstruction"] = "muscl"
+    pin.value_dict["backend"] = "numba"
+
+    np.random.seed(0)
+    unsplit = Simulation(pin, ProblemGenerator)
+    unsplit.run_until(0.2)
+
+    pin.value_dict["integrator"] = "split"
+    np.random.seed(0)
+    split = Simulation(pin, ProblemGenerator)
+    split.run_until(0.2)
+
+    ng = split.pmesh.ng
+    assert split.iter == unsplit.iter
+    assert np.allclose(
+        split.pmesh.Un[:, ng:-ng, ng:-ng],
+        unsplit.pmesh.Un[:, ng:-ng, ng:-ng],
+        atol=1e-2,
+    )
+
+    pin.value_dict["tile_size"] = 4
+    with pytest.raises(ValueError):
+        Simulation(pin, ProblemGenerator)
+
+
+def test_ctu_step():
+    """With no transverse variation the corrections vanish and the CTU
+    step is the unsplit step bit for bit. On KH the CTU step is still
+    well behaved at a CFL number of one, where the unsplit step is not"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 24
+    pin.value_dict["nx2"] = 20
+
+    gamma = float(pin.value_dict["gamma"])
+    pmesh = FIEFS_Array(pin, np.float64)
+
+    for axis in [1, 2]:
+        x = np.linspace(0.0, 1.0, pmesh.Un.shape[axis])
+        x = x.reshape((-1, 1) if axis == 1 else (1, -1))
+
+        rho = 1.0 + 0.5 * (x > 0.5)
+        u_n = 0.3 * np.cos(4.0 * x)
+        p = 1.0 + 0.5 * (x < 0.3)
+
+        Un = np.empty_like(pmesh.Un)
+        Un[0] = rho
+        Un[axis] = rho * u_n
+        Un[3 - axis] = 0.2 * rho
+        Un[3] = p / (gamma - 1.0) + 0.5 * rho * (u_n**2 + 0.04)
+
+        for solver in RIEMANN_SOLVERS.values():
+            pmesh.Un[:] = Un
+            muscl_hancock_step(pin, pmesh, Workspace(pmesh), 1e-3, gamma, solver)
+            expected = pmesh.Un.copy()
+
+            for num_threads in [1, 2]:
+                pmesh.Un[:] = Un
+                ws = Workspace(pmesh, num_threads=num_threads, integrator="ctu")
+                ctu_step(pin, pmesh, ws, 1e-3, gamma, solver, num_threads=num_threads)
+
+                assert np.array_equal(pmesh.Un, expected)
+
+    pin.value_dict["nx1"] = 32
+    pin.value_dict["nx2"] = 32
+    pin.value_dict["backend"] = "numba"
+
+    np.random.seed(0)
+    reference = Simulation(pin, ProblemGenerator)
+    reference.run_until(0.5)
+
+    pin.value_dict["integrator"] = "ctu"
+    pin.value_dict["CFL"] = 1.0
+    np.random.seed(0)
+    ctu = Simulation(pin, ProblemGenerator)
+    ctu.run_until(0.5)
+
+    ng = ctu.pmesh.ng
+    assert ctu.iter < 0.6 * reference.iter
+    assert np.allclose(
+        ctu.pmesh.Un[:, ng:-ng, ng:-ng],
+        reference.pmesh.Un[:, ng:-ng, ng:-ng],
+        atol=5e-2,
+    )
+
+
+def test_ssp_rk_step():
+    """The stages of the SSP steps take the Shu-Osher weights of forward
+    Euler steps of the reconstructed faces, with no predictor, and a step
+    allocates no arrays. On a smooth wave the third order step with WENO5
+    is far more accurate than the MUSCL-Hancock step on the same mesh"""
+    pin = FIEFS_Input("inputs/kh.in")
+    pin.parse_input_file()
+    pin.value_dict["nx1"] = 24
+    pin.value_dict["nx2"] = 20
+
+    gamma = float(pin.value_dict["gamma"])
+    cfl = float(pin.value_dict["CFL"])
+
+    np.random.seed(0)
+    pmesh = FIEFS_Array(pin, np.float64)
+    ProblemGenerator(pin=pin, pmesh=pmesh)
+    pmesh.enforce_bcs(pin)
+
+    ng = pmesh.ng
+    dt = calculate_timestep(pmesh, cfl, gamma)
+    Un = pmesh.Un.copy()
+
+    ws = Workspace(pmesh)
+    F = np.zeros((4, pin.value_dict["nx1"] + 1, pin.value_dict["nx2"] + 2))
+    G = np.zeros((4, pin.value_dict["nx1"] + 2, pin.value_dict["nx2"] + 1))
+
+    def euler(U):
+        """U + dt L(U) from the unfused kernels"""
+        pmesh.Un[:] = U
+        pmesh.enforce_bcs(pin)
+
+        get_face_values_into(pmesh.Un, ng, 1.0, ws.U_i_L, ws.U_i_R, ws.U_j_L, ws.U_j_R)
+        solve_riemann_x(ws.U_l_i, ws.U_r_i, gamma, F, HLLC)
+        solve_riemann_y(ws.U_l_j, ws.U_r_j, gamma, G, HLLC)
+        conservative_update(pmesh.Un, F, G, ng, dt / pmesh.dx1, dt / pmesh.dx2)
+
+        return pmesh.Un.copy()
+
+    for integrator in SSP_WEIGHTS:
+        expected = Un
+        for a in get_ssp_weights(integrator):
+            expected = a * Un + (1.0 - a) * euler(expected)
+
+        results = []
+        for num_threads in [1, 2]:
+            pmesh.Un[:] = Un
+            ws_rk = Workspace(pmesh, num_threads=num_threads, integrator=integrator)
+            ssp_rk_step(
+                pin,
+                pmesh,
+                ws_rk,
+                dt,
+                gamma,
+                num_threads=num_threads,
+                integrator=integrator,
+            )
+            results.append(pmesh.Un.copy())
+
+            assert np.allclose(
+                pmesh.Un[:, ng:-ng, ng:-ng],
+                expected[:, ng:-ng, ng:-ng],
+                rtol=1e-12,
+                atol=1e-12,
+            )
+
+        assert np.array_equal(results[0], results[1])
+
+        tracemalloc.start()
+        ssp_rk_step(pin, pmesh, ws_rk, dt, gamma, integrator=integrator)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Only the small objects of the array views and of numba's
+        # dispatch, no copy of the mesh for the stages
+        assert current < 1024
+        assert peak < pmesh.Un.nbytes // 4
+
+    with pytest.raises(ValueError):
+        get_ssp_weights("rk4")
+
+    pin.value_dict["nx1"] = 32
+    pin.value_dict["nx2"] = 32
+
+    errors = {}
+    for integrator, reconstruction in [("unsplit", "muscl"), ("rk3", "weno5")]:
+        pin.value_dict["reconstruction"] = reconstruction
+        pmesh = FIEFS_Array(pin, np.float64)
+        ng = pmesh.ng
+
+        x = pmesh.x1min + (np.arange(pmesh.Un.shape[1]) - ng + 0.5) * pmesh.dx1
+        y = pmesh.x2min + (np.arange(pmesh.Un.shape[2]) - ng + 0.5) * pmesh.dx2
+        phase = 2.0 * np.pi * (x[:, None] + y[None, :])
+
+        # Density wave advected diagonally at unit pressure
+        rho = 1.0 + 0.2 * np.sinc(pmesh.dx1) ** 2 * np.sin(phase)
+        pmesh.Un[0] = rho
+        pmesh.Un[1] = rho
+        pmesh.Un[2] = rho
+        pmesh.Un[3] = 1.0 / (gamma - 1.0) + rho**2
+
+        ws = Workspace(pmesh, integrator=integrator)
+        scheme = get_reconstruction(reconstruction)
+
+        t = 0.0
+        while t < 0.25:
+            dt = min(calculate_timestep(pmesh, cfl, gamma), 0.25 - t)
+
+            if integrator == "unsplit":
+                muscl_hancock_step(pin, pmesh, ws, dt, gamma, scheme=scheme)
+            else:
+                ssp_rk_step(
+                    pin, pmesh, ws, dt, gamma, scheme=scheme, integrator=integrator
+                )
+
+            t += dt
+
+        # A quarter period along the diagonal shifts the phase by pi
+        errors[integrator] = np.mean(np.abs(pmesh.Un[0] + rho - 2.0)[ng:-ng, ng:-ng])
+
+    assert errors["rk3"] < 0.05 * errors["unsplit"]
+
+    pin.value_dict["nx1"] = 24
+    pin.value_dict["nx2"] = 20
+    pin.value_dict["reconstruction"] = "muscl"
+    pin.value_dict["integrator"] = "rk3"
+
+    np.random.seed(0)
+    sim = Simulation(pin, ProblemGenerator)
+    sim.run_until(0.05)
+
+    assert sim.backend == "numba"
+    assert np.all(np.isfinite(sim.pmesh.Un))
+
+    pin.value_dict["tile_size"] = 4
+    with pytest.raises(ValueError):
+        Simulation(pin, ProblemGenerator)
+
+
+def test_fiefs_integrator_callbacks(tmp_path):
+    """FIEFS.py only reports the hybrid fractions and the Riemann
+    statistics of the unsplit step, the only one that leaves its Riemann
+    states in the workspace, and rejects the statistics of the others"""
+    with open("inputs/kh.in") as f:
+        lines = f.read().splitlines()
+
+    def run(settings):
+        values = {"nx1": 16, "nx2": 16, "tmax": 0.02, "output_frequency": 2}
+        values.update(settings)
+
+        (tmp_path / "inputs").mkdir(exist_ok=True)
+        with open(tmp_path / "inputs" / "case.in", "w") as f:
+            for line in lines:
+                key = line.split("=")[0].strip()
+                f.write(f"{key} = {values[key]}\n" if key in values else line + "\n")
+
+        return subprocess.run(
+            [sys.executable, os.path.join(parent_directory, "FIEFS.py"), "-p", "case"],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+        )
+
+    unsplit = run({"riemann_solver": "hybrid"})
+    assert unsplit.returncode == 0
+    assert "hybrid:" in unsplit.stdout
+
+    split = run({"riemann_solver": "hybrid", "integrator": "split"})
+    assert split.returncode == 0, split.stderr
+    assert "hybrid:" not in split.stdout
+
+    stats = run({"integrator": "split", "riemann_stats": "step"})
+    assert stats.returncode != 0
+    assert "ValueError" in stats.stderr